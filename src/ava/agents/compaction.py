@@ -0,0 +1,216 @@
+"""Prompt-side compaction of the message history.
+
+The checkpointed ``messages`` channel keeps the full history. Before every
+model call, ``MessageCompactionMiddleware`` sends the model a compacted
+view instead. The most recent messages stay verbatim. Stale bookkeeping
+(superseded todo snapshots, old reflections) is always collapsed. When
+the prompt is still over the token budget, old tool results are cut to
+a stub, and then the oldest turns are replaced by one extractive summary
+of their status lines.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+
+from ..metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKENS = histogram(
+    "ava_prompt_tokens", "Estimated prompt tokens per model call, before and after compaction.", ["stage"],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+TOKENS_SAVED = counter("ava_compaction_tokens_saved_total", "Estimated prompt tokens removed by compaction.")
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("AVA_PROMPT_TOKEN_BUDGET", "8000"))
+KEEP_RECENT_MESSAGES = int(os.getenv("AVA_COMPACTION_KEEP_RECENT", "8"))
+# Rough chars-per-token ratio, the same estimate the tool-output policy uses.
+CHARS_PER_TOKEN = 4
+STUB_PREVIEW_CHARS = 160
+TODO_TOOLS = ("write_todo", "read_todo")
+
+
+class CompactionReport(NamedTuple):
+    tokens_before: int
+    tokens_after: int
+    messages_before: int
+    messages_after: int
+
+    @property
+    def saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def estimate_tokens(message: AnyMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    size = len(content)
+    for call in getattr(message, "tool_calls", None) or ():
+        size += len(call["name"]) + len(json.dumps(call.get("args", {}), default=str))
+    return size // CHARS_PER_TOKEN + 4  # per-message framing
+
+
+def _tool_names(messages: List[AnyMessage]) -> Dict[str, str]:
+    """tool_call_id -> tool name, from the AI messages that issued the calls."""
+    names = {}
+    for message in messages:
+        for call in getattr(message, "tool_calls", None) or ():
+            names[call["id"]] = call["name"]
+    return names
+
+
+def _recent_start(messages: List[AnyMessage], keep_recent: int) -> int:
+    """Index where the verbatim tail begins, moved back so a tool result never loses its call."""
+    start = max(0, len(messages) - keep_recent)
+    while start > 0 and isinstance(messages[start], ToolMessage):
+        start -= 1
+    return start
+
+
+def _collapse_bookkeeping(
+        old: List[AnyMessage], names: Dict[str, str], latest_todo: Optional[str]
+) -> List[AnyMessage]:
+    """Drop superseded todo snapshots and reflection echoes from the older part of the history.
+
+    The call ``latest_todo`` (the newest todo snapshot) is kept, so the plan stays visible.
+    """
+    stale = TODO_TOOLS + ("think_tool",)
+    out = []
+    for message in old:
+        if isinstance(message, ToolMessage):
+            tool = names.get(message.tool_call_id, message.name or "")
+            if message.tool_call_id == latest_todo:
+                pass
+            elif tool in TODO_TOOLS:
+                message = message.model_copy(update={"content": "[todo snapshot superseded]"})
+            elif tool == "think_tool":
+                message = message.model_copy(update={"content": "[reflection recorded]"})
+        elif isinstance(message, AIMessage) and any(
+                c["name"] in stale and c["id"] != latest_todo for c in message.tool_calls
+        ):
+            calls = [
+                {**call, "args": {"superseded": True}} if call["name"] in stale and call["id"] != latest_todo else call
+                for call in message.tool_calls
+            ]
+            message = message.model_copy(update={"tool_calls": calls})
+        out.append(message)
+    return out
+
+
+def _stub_tool_results(old: List[AnyMessage], names: Dict[str, str]) -> List[AnyMessage]:
+    out = []
+    for message in old:
+        if isinstance(message, ToolMessage) and isinstance(message.content, str) and len(message.content) > STUB_PREVIEW_CHARS:
+            tool = names.get(message.tool_call_id, message.name or "tool")
+            stub = f"[compacted {tool} result, {len(message.content)} chars] {message.content[:STUB_PREVIEW_CHARS]}"
+            message = message.model_copy(update={"content": stub})
+        out.append(message)
+    return out
+
+
+def _summary(dropped: List[AnyMessage], names: Dict[str, str], latest_todo: Optional[str]) -> HumanMessage:
+    """Extractive summary of dropped turns: what the user asked and each tool's status line."""
+    stale = TODO_TOOLS + ("think_tool",)
+    lines = []
+    for message in dropped:
+        text = message.content if isinstance(message.content, str) else ""
+        first = text.strip().splitlines()[0][:STUB_PREVIEW_CHARS] if text.strip() else ""
+        if isinstance(message, HumanMessage) and first:
+            lines.append(f"- user: {first}")
+        elif isinstance(message, ToolMessage) and first and not first.startswith("["):
+            if names.get(message.tool_call_id) in stale and message.tool_call_id != latest_todo:
+                continue
+            lines.append(f"- {names.get(message.tool_call_id, 'tool')}: {first}")
+    return HumanMessage(
+        f"[Earlier conversation compacted: {len(dropped)} messages omitted. Outcomes so far:]\n"
+        + ("\n".join(lines) if lines else "- (no tool results)")
+    )
+
+
+def compact_messages(
+        messages: List[AnyMessage],
+        budget: int = PROMPT_TOKEN_BUDGET,
+        keep_recent: int = KEEP_RECENT_MESSAGES,
+        reserved: int = 0,
+) -> tuple[List[AnyMessage], CompactionReport]:
+    """Compacted copy of ``messages`` for one model call; ``reserved`` tokens are taken by the system prompt.
+
+    Never modifies the input messages. The tail of ``keep_recent`` messages (extended to whole tool turns)
+    is always sent verbatim, so the budget is a target rather than a hard cap.
+    """
+    before = sum(estimate_tokens(m) for m in messages)
+    start = _recent_start(messages, keep_recent)
+    if start == 0:
+        return messages, CompactionReport(before, before, len(messages), len(messages))
+
+    names = _tool_names(messages)
+    recent = messages[start:]
+    recent_tokens = sum(estimate_tokens(m) for m in recent)
+
+    # 1. Stale bookkeeping never helps the next call
+    latest_todo = next((call_id for call_id, name in reversed(names.items()) if name == "write_todo"), None)
+    old = _collapse_bookkeeping(messages[:start], names, latest_todo)
+    old_tokens = sum(estimate_tokens(m) for m in old)
+
+    # 2. Over budget: cut old tool results to a stub
+    if reserved + old_tokens + recent_tokens > budget:
+        old = _stub_tool_results(old, names)
+        old_tokens = sum(estimate_tokens(m) for m in old)
+
+    # 3. Still over: replace the oldest whole turns (user message onward) by a summary
+    if reserved + old_tokens + recent_tokens > budget:
+        cut = 0
+        remaining = old_tokens
+        while cut < len(old) and reserved + remaining + recent_tokens > budget:
+            remaining -= estimate_tokens(old[cut])
+            cut += 1
+        # Never leave a tool result without its call at the new start
+        while cut < len(old) and isinstance(old[cut], ToolMessage):
+            cut += 1
+        old = [_summary(messages[:cut], names, latest_todo)] + old[cut:]
+
+    compacted = old + recent
+    after = sum(estimate_tokens(m) for m in compacted)
+    return compacted, CompactionReport(before, after, len(messages), len(compacted))
+
+
+class MessageCompactionMiddleware(AgentMiddleware):
+    """Sends each model call a compacted view of the history (see ``compact_messages``)."""
+
+    def __init__(self, budget: Optional[int] = None, keep_recent: Optional[int] = None):
+        super().__init__()
+        self.budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+        self.keep_recent = KEEP_RECENT_MESSAGES if keep_recent is None else keep_recent
+
+    def _compact(self, request: ModelRequest) -> ModelRequest:
+        reserved = estimate_tokens(request.system_message) if request.system_message is not None else 0
+        messages, report = compact_messages(request.messages, self.budget, self.keep_recent, reserved)
+        PROMPT_TOKENS.observe(report.tokens_before + reserved, stage="raw")
+        PROMPT_TOKENS.observe(report.tokens_after + reserved, stage="compacted")
+        if report.saved <= 0:
+            return request
+        TOKENS_SAVED.inc(report.saved)
+        logger.debug(
+            "Compacted prompt %d -> %d tokens (-%d), %d -> %d messages.", report.tokens_before + reserved,
+            report.tokens_after + reserved, report.saved, report.messages_before, report.messages_after,
+        )
+        return request.override(messages=messages)
+
+    def wrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        return handler(self._compact(request))
+
+    async def awrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        return await handler(self._compact(request))
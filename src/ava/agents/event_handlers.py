@@ -0,0 +1,92 @@
+"""Handlers for events consumed from ORCHESTRATOR_QUEUE."""
+
+import logging
+import os
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from ..registry import get_orchestrator_agent
+from ..tools.reminder_tools import REMINDER_DISPATCH, adispatch_reminder_events, dispatch_reminder_events
+
+logger = logging.getLogger(__name__)
+
+# Scheduled reminders are dispatched without the LLM unless their data is missing or ambiguous.
+REMINDER_FAST_PATH = os.getenv("AVA_REMINDER_FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+
+def _reminder_turn(event: Dict[str, Any], reason: str = "") -> Tuple[dict, dict]:
+    """Input and config of the orchestrator run that delegates one reminder."""
+    schedule_id = event["schedule_id"]
+    patient_id = event["patient_id"]
+    note = f" The direct dispatch could not proceed: {reason}." if reason else ""
+    REMINDER_DISPATCH.inc(path="llm")
+    agent_input = {"messages": [{
+        "role": "user",
+        "content": (
+            f"SCHEDULED_REMINDER_TRIGGER fired at {event.get('timestamp')}: delegate to the reminder-agent "
+            f"to process the reminder call for schedule_id {schedule_id} and patient_id {patient_id}.{note}"
+        ),
+    }]}
+    # Each firing is its own short conversation
+    return agent_input, {"configurable": {"thread_id": f"reminder-{schedule_id}-{uuid.uuid4().hex[:8]}"}}
+
+
+def _delegate_reminder_to_agent(event: Dict[str, Any], reason: str = "") -> None:
+    """Slow path: let the orchestrator delegate the reminder to the reminder-agent."""
+    agent_input, config = _reminder_turn(event, reason)
+    get_orchestrator_agent().invoke(agent_input, config=config)
+
+
+async def _adelegate_reminder_to_agent(event: Dict[str, Any], reason: str = "") -> None:
+    agent_input, config = _reminder_turn(event, reason)
+    await get_orchestrator_agent().ainvoke(agent_input, config=config)
+
+
+def _reminders(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    reminders = []
+    for event in events:
+        if event.get("event_type") == "SCHEDULED_REMINDER_TRIGGER":
+            reminders.append(event)
+        else:
+            logger.warning("Ignoring unknown event type %s.", event.get("event_type"))
+    return reminders
+
+
+def handle_orchestrator_events(events: List[Dict[str, Any]]) -> None:
+    """Route a batch of queued events; reminders take the deterministic fast path when possible."""
+    reminders = _reminders(events)
+    if not reminders:
+        return
+    if not REMINDER_FAST_PATH:
+        for event in reminders:
+            _delegate_reminder_to_agent(event)
+        return
+
+    _, needs_llm = dispatch_reminder_events(reminders)
+    for event, reason in needs_llm:
+        logger.info("Falling back to the reminder-agent for %s: %s.", event["schedule_id"], reason)
+        try:
+            _delegate_reminder_to_agent(event, reason)
+        except Exception:
+            # One failed delegation must not lose the rest of the batch
+            logger.exception("Reminder-agent failed for %s.", event["schedule_id"])
+
+
+async def ahandle_orchestrator_events(events: List[Dict[str, Any]]) -> None:
+    """``handle_orchestrator_events`` for async workers: lookups, dialing and agent runs never block the loop."""
+    reminders = _reminders(events)
+    if not reminders:
+        return
+    if not REMINDER_FAST_PATH:
+        for event in reminders:
+            await _adelegate_reminder_to_agent(event)
+        return
+
+    _, needs_llm = await adispatch_reminder_events(reminders)
+    for event, reason in needs_llm:
+        logger.info("Falling back to the reminder-agent for %s: %s.", event["schedule_id"], reason)
+        try:
+            await _adelegate_reminder_to_agent(event, reason)
+        except Exception:
+            # One failed delegation must not lose the rest of the batch
+            logger.exception("Reminder-agent failed for %s.", event["schedule_id"])
@@ -1,19 +1,21 @@
-from datetime import datetime
+import os
 
 from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from ..prompts import TODO_USAGE_INSTRUCTIONS, FILE_USAGE_INSTRUCTIONS, SUBAGENT_USAGE_INSTRUCTIONS, ORCHESTRATOR_INSTRUCTIONS, AMBIENT_SUBAGENT_USAGE_INSTRUCTIONS
+from ..dao.checkpoint import create_checkpointer
+from ..models import ModelRegistry
+from ..prompts import TODO_USAGE_INSTRUCTIONS, FILE_USAGE_INSTRUCTIONS, SUBAGENT_USAGE_INSTRUCTIONS, ORCHESTRATOR_INSTRUCTIONS, AMBIENT_SUBAGENT_USAGE_INSTRUCTIONS, ORCHESTRATOR_PROMPT_DATE, VOICE_ORCHESTRATOR_INSTRUCTIONS
+from ..runtime.cassette import CassetteMiddleware, get_cassette
+from ..runtime.instrumentation import AgentMetricsMiddleware
 from ..states.state import DeepAgentState
 from ..tools.file_tools import ls, read_file, write_file
-from ..tools.task_tool import _create_task_tool
+from ..tools.output_policy import ToolOutputPolicyMiddleware
+from .compaction import MessageCompactionMiddleware
+from .step_budget import StepBudgetMiddleware
+from ..tools.task_tool import _create_task_tools
 from ..tools.todo_tool import write_todo, read_todo
 from ..tools.user_query_parsing_tools import think_tool, parse_and_validate_schedule, persist_in_db
 from ..tools.reminder_tools import process_reminder_call
-import os
-
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash-preview-09-2025", temperature=0.0, google_api_key=os.getenv("GOOGLE_API_KEY"))
 
 built_in_tools = [ls, read_file, write_file, write_todo, read_todo, think_tool]
 
@@ -22,8 +24,12 @@ sub_agent_tools = [parse_and_validate_schedule, process_reminder_call, think_too
 orchestrator_sub_agent = {
     "name": "medication-agent",
     "description": "Delegate medicinal task to the sub-agent medication.",
-    "prompt": ORCHESTRATOR_INSTRUCTIONS.format(date=str(datetime.now())),
+    "prompt": ORCHESTRATOR_INSTRUCTIONS.format(date=ORCHESTRATOR_PROMPT_DATE),
     "tools": ["parse_and_validate_schedule", "think_tool", "persist_in_db"],
+    # Intake extraction keeps the stronger model
+    "model": os.getenv("AVA_MEDICATION_AGENT_MODEL", "strong"),
+    "timeout": float(os.getenv("AVA_MEDICATION_AGENT_TIMEOUT_S", "30")),
+    "max_tokens": int(os.getenv("AVA_MEDICATION_AGENT_MAX_TOKENS", "4096")),
 }
 
 reminder_sub_agent = {
@@ -31,14 +37,12 @@ reminder_sub_agent = {
     "description": "Delegate reminder task to the sub-agent reminder.",
     "prompt": AMBIENT_SUBAGENT_USAGE_INSTRUCTIONS,
     "tools": ["process_reminder_call", "think_tool"],
+    # A single deterministic tool call does not need the strong model
+    "model": os.getenv("AVA_REMINDER_AGENT_MODEL", "fast"),
+    "timeout": float(os.getenv("AVA_REMINDER_AGENT_TIMEOUT_S", "15")),
+    "max_tokens": int(os.getenv("AVA_REMINDER_AGENT_MAX_TOKENS", "1024")),
 }
 
-task_tool = _create_task_tool(
-    sub_agent_tools, [orchestrator_sub_agent, reminder_sub_agent], model, DeepAgentState
-)
-
-delegation_tools = [task_tool]
-all_tools = sub_agent_tools + built_in_tools + delegation_tools
 SUBAGENT_INSTRUCTIONS = SUBAGENT_USAGE_INSTRUCTIONS
 
 INSTRUCTIONS = (
@@ -56,10 +60,80 @@ INSTRUCTIONS = (
     + SUBAGENT_INSTRUCTIONS
 )
 
-# Create agent
-agent = create_agent(
-    model=model,
-    tools=all_tools,
-    system_prompt=INSTRUCTIONS,
-    state_schema=DeepAgentState
-)
\ No newline at end of file
+# Execution profiles of the orchestrator. "full" is the deep agent: todos, files, reflection and
+# delegation, for complex intake. "voice" drops the bookkeeping tools (each one a model round trip
+# with nothing for the caller to hear) and calls the intake tools directly under a compact prompt.
+ORCHESTRATOR_PROFILES = ("full", "voice")
+VOICE_TOOLS = ["parse_and_validate_schedule", "persist_in_db"]
+
+
+def agent_middleware(agent_name: str) -> list:
+    """Middleware for one agent: each run is capped in model calls, every model call sees a
+    history compacted to the prompt budget, every tool result goes through the same size policy,
+    and model/tool latency and tokens are recorded under the agent's name (so it times the calls
+    themselves). With AVA_CASSETTE_MODE
+    set, the innermost layer records or replays the model and tool calls."""
+    middleware = [
+        StepBudgetMiddleware(agent_name),
+        MessageCompactionMiddleware(),
+        ToolOutputPolicyMiddleware(),
+        AgentMetricsMiddleware(agent_name),
+    ]
+    cassette = get_cassette()
+    if cassette is not None:
+        middleware.append(CassetteMiddleware(agent_name, cassette))
+    return middleware
+
+
+def build_orchestrator_agent(models: ModelRegistry, profile: str = "full", checkpointer=None):
+    """Compile the orchestrator graph for ``profile`` and its sub-agents; called once per profile by the registry.
+
+    Profiles that share ``checkpointer`` share conversations, so a channel can move between them.
+    """
+    if profile not in ORCHESTRATOR_PROFILES:
+        raise ValueError(f"Unknown orchestrator profile '{profile}', expected one of {ORCHESTRATOR_PROFILES}")
+    # The orchestrator keeps the strong tier it has always run on; a cheaper tier is an explicit
+    # opt-in (AVA_ORCHESTRATOR_MODEL=fast, or AVA_VOICE_ORCHESTRATOR_MODEL for the voice profile
+    # alone). Sub-agents without a model of their own inherit this one.
+    tier = os.getenv("AVA_ORCHESTRATOR_MODEL", "strong")
+    if profile == "voice":
+        tier = os.getenv("AVA_VOICE_ORCHESTRATOR_MODEL", tier)
+    model = models.get(
+        tier,
+        timeout=float(os.getenv("AVA_ORCHESTRATOR_TIMEOUT_S", "20")),
+        max_tokens=int(os.getenv("AVA_ORCHESTRATOR_MAX_TOKENS", "2048")),
+    )
+    delegation_tools = _create_task_tools(
+        sub_agent_tools, [orchestrator_sub_agent, reminder_sub_agent], model, DeepAgentState, model_for=models.get,
+        middleware_for=agent_middleware,
+    )
+    if profile == "voice":
+        tools = [t for t in sub_agent_tools if t.name in VOICE_TOOLS] + delegation_tools
+        system_prompt = VOICE_ORCHESTRATOR_INSTRUCTIONS.format(date=ORCHESTRATOR_PROMPT_DATE)
+        agent_name = "voice-orchestrator"
+    else:
+        tools = sub_agent_tools + built_in_tools + delegation_tools
+        system_prompt = INSTRUCTIONS
+        agent_name = "orchestrator"
+
+    # Conversation state is checkpointed per Agora channel (thread_id = channel_name)
+    if checkpointer is None:
+        checkpointer = create_checkpointer()
+
+    return create_agent(
+        model=model,
+        tools=tools,
+        system_prompt=system_prompt,
+        state_schema=DeepAgentState,
+        middleware=agent_middleware(agent_name),
+        checkpointer=checkpointer
+    )
+
+
+def __getattr__(name: str):
+    # ``agent`` stays importable for callers that predate the registry; it is built on first access.
+    if name == "agent":
+        from ..registry import get_orchestrator_agent
+
+        return get_orchestrator_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,100 @@
+"""Per-run cap on model round trips.
+
+Without a cap, an agent can keep looping through ``write_todo``, ``think_tool``,
+``task`` and file tools, so a turn's latency has no upper bound.
+``StepBudgetMiddleware`` counts the model calls made since the latest user
+message. The last call within budget is made with tools disabled, so the model
+has to answer in words. If the model still asks for a tool, any call past the
+budget gets a fixed spoken wrap-up instead of a model call.
+
+The budget is ``AVA_MAX_MODEL_CALLS`` (default 8) per agent run. A request can
+lower it for its own run through ``configurable.max_model_calls``, as the webhook
+does. Sub-agents started inside that run inherit the same value.
+"""
+
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage
+
+from ..metrics import counter
+
+logger = logging.getLogger(__name__)
+
+STEP_BUDGET_EVENTS = counter(
+    "ava_step_budget_total", "Model calls constrained by the per-run step budget.", ["agent", "action"]
+)
+
+MAX_MODEL_CALLS = int(os.getenv("AVA_MAX_MODEL_CALLS", "8"))
+FINAL_STEP_NOTE = (
+    "You have reached the step limit for this turn. Do not call any tools. "
+    "Reply to the caller now, in one or two short sentences, with what has been done so far."
+)
+BUDGET_EXHAUSTED_TEXT = "I've done as much as I can on that for now. Is there anything else I can help you with?"
+
+
+def model_calls_this_run(messages: List[AnyMessage]) -> int:
+    """AI messages since the latest user message, i.e. model calls already made in this run."""
+    calls = 0
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage):
+            calls += 1
+    return calls
+
+
+def _configured_budget(default: int) -> int:
+    try:
+        from langgraph.config import get_config
+
+        return int(get_config().get("configurable", {}).get("max_model_calls") or default)
+    except RuntimeError:
+        return default
+
+
+class StepBudgetMiddleware(AgentMiddleware):
+    """Forces a tool-free final answer on the last budgeted model call; install it outermost."""
+
+    def __init__(self, agent: str, max_model_calls: Optional[int] = None):
+        super().__init__()
+        self.agent = agent
+        self.max_model_calls = max_model_calls or MAX_MODEL_CALLS
+
+    def _constrain(self, request: ModelRequest) -> Optional[ModelRequest]:
+        """The request to send (possibly tool-free), or None when the budget is spent."""
+        budget = _configured_budget(self.max_model_calls)
+        made = model_calls_this_run(request.state.get("messages", request.messages))
+        if made >= budget:
+            STEP_BUDGET_EVENTS.inc(agent=self.agent, action="exhausted")
+            logger.debug("%s made %d/%d model calls; ending the run.", self.agent, made, budget)
+            return None
+        if made == budget - 1 and request.tools:
+            STEP_BUDGET_EVENTS.inc(agent=self.agent, action="final_step")
+            system = request.system_message
+            note = f"{system.content}\n\n{FINAL_STEP_NOTE}" if system is not None else FINAL_STEP_NOTE
+            return request.override(tool_choice="none", system_message=SystemMessage(content=note))
+        return request
+
+    def wrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        constrained = self._constrain(request)
+        if constrained is None:
+            return ModelResponse(result=[AIMessage(content=BUDGET_EXHAUSTED_TEXT)])
+        return handler(constrained)
+
+    async def awrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        constrained = self._constrain(request)
+        if constrained is None:
+            return ModelResponse(result=[AIMessage(content=BUDGET_EXHAUSTED_TEXT)])
+        return await handler(constrained)
@@ -0,0 +1,79 @@
+"""Local stand-in for the Agora outbound call API.
+
+Accepts call requests with a configurable latency and failure rate, so the
+dialer's rate limiting, retries and circuit breaker can be exercised without
+touching the real provider.
+"""
+
+import asyncio
+import multiprocessing
+import random
+import socket
+import time
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_app(latency_s: float = 0.05, jitter_s: float = 0.02, failure_rate: float = 0.0,
+                    failure_status: int = 503) -> FastAPI:
+    """Stub API: ``POST /calls`` answers 202 after ``latency_s`` (+ jitter), failing ``failure_rate`` of calls."""
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.failures = 0
+
+    @app.post("/calls")
+    async def create_call(request: Request):
+        payload = await request.json()
+        app.state.calls += 1
+        await asyncio.sleep(max(0.0, latency_s + random.uniform(-jitter_s, jitter_s)))
+        if random.random() < failure_rate:
+            app.state.failures += 1
+            return JSONResponse({"error": "simulated failure"}, status_code=failure_status)
+        return JSONResponse({"call_id": payload.get("schedule_id"), "status": "queued"}, status_code=202)
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": app.state.calls, "failures": app.state.failures}
+
+    return app
+
+
+def _serve(host: str, port: int, stub_options: dict) -> None:
+    uvicorn.run(create_stub_app(**stub_options), host=host, port=port, log_level="warning", lifespan="off")
+
+
+class StubServer:
+    """Runs the stub app with uvicorn in a child process, so it does not compete with the dialer for the GIL."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, **stub_options):
+        self.host = host
+        self.port = port
+        self.stub_options = stub_options
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/calls"
+
+    def __enter__(self) -> "StubServer":
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(self.host, self.port, self.stub_options), name="ava-agora-stub", daemon=True
+        )
+        self._process.start()
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                socket.create_connection((self.host, self.port), timeout=0.5).close()
+                return self
+            except OSError:
+                if time.monotonic() > deadline or not self._process.is_alive():
+                    self._process.terminate()
+                    raise RuntimeError("Agora stub server did not start")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join(5)
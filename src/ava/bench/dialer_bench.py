@@ -0,0 +1,60 @@
+"""Benchmark the outbound dialer against the local Agora stub.
+
+    python -m ava.bench.dialer_bench --calls 2000 --batches 3 --rate 500 --failure-rate 0.05
+
+Prints one JSON report per batch (throughput, p50/p99 call-initiation latency).
+"""
+
+import argparse
+import asyncio
+import json
+
+from .agora_stub import StubServer
+from ..runtime.dialer import AgoraDialer, CircuitBreaker
+
+
+def _calls(batch: int, size: int):
+    return [
+        (f"SCH-BENCH-{batch}-{i}", {"schedule_id": f"SCH-BENCH-{batch}-{i}", "to": "+1-555-000-0000", "script": "bench"})
+        for i in range(size)
+    ]
+
+
+async def run(args) -> list:
+    reports = []
+    with StubServer(port=args.port, latency_s=args.latency, failure_rate=args.failure_rate) as server:
+        dialer = AgoraDialer(
+            server.url,
+            rate=args.rate,
+            burst=args.burst,
+            max_concurrency=args.concurrency,
+            max_retries=args.retries,
+            backoff_base=0.05,
+            breaker=CircuitBreaker(failure_threshold=args.breaker_threshold),
+        )
+        async with dialer:
+            for batch in range(args.batches):
+                _, report = await dialer.dial_batch(_calls(batch, args.calls))
+                reports.append({"batch": batch, **report.as_dict()})
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000, help="calls per batch")
+    parser.add_argument("--batches", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=500.0, help="provider quota, calls per second")
+    parser.add_argument("--burst", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub response latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--breaker-threshold", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    for report in asyncio.run(run(args)):
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Scripted stand-in for ChatGoogleGenerativeAI, for offline benchmarks and load tests.
+
+``ScriptedChatModel`` never touches the network. It decides its next message
+from the conversation it is shown, so concurrent turns, threads and sub-agents
+all get a plausible, deterministic script:
+
+- orchestrator: ``write_todo`` -> ``task(medication-agent)`` -> spoken summary
+- voice orchestrator: ``parse_and_validate_schedule`` -> ``persist_in_db`` -> spoken summary
+- medication-agent: ``parse_and_validate_schedule`` -> ``persist_in_db`` -> result
+- reminder-agent: ``process_reminder_call`` -> result
+
+Latency is drawn from a configurable distribution (see ``latency_sampler``), and
+token usage is estimated from the prompt, so token metrics have realistic data.
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, Field, PrivateAttr
+
+from ..prompts import AMBIENT_SUBAGENT_USAGE_INSTRUCTIONS, ORCHESTRATOR_INSTRUCTIONS, VOICE_ORCHESTRATOR_INSTRUCTIONS
+
+# Formulaic intake utterances the local rules parser handles, so no structured-output call is needed.
+INTAKE_UTTERANCES = (
+    "Take 500 mg metformin twice a day at 8am and 8pm for 10 days",
+    "10 mg atorvastatin once daily at night for 30 days",
+    "Remind me to take 20mg omeprazole every morning",
+    "75 mg clopidogrel daily at 9am",
+    "1000 mg paracetamol three times a day at 8am, 2pm and 8pm for 5 days",
+    "5 mg amlodipine once a day in the evening",
+)
+
+_FIELD = re.compile(r"(\w+)=('(?:[^'\\]|\\.)*'|\"[^\"]*\"|\S+)")
+_SCHEDULE_ID = re.compile(r"\b(SCH-[\w-]+)")
+_PATIENT_ID = re.compile(r"\b((?:USER|PAT|P)-[\w-]+)")
+
+
+def latency_sampler(distribution: str = "fixed", mean_s: float = 0.0, p99_s: Optional[float] = None,
+                    seed: Optional[int] = None) -> Callable[[], float]:
+    """Per-call latency in seconds.
+
+    ``fixed`` always returns ``mean_s``; ``uniform`` spreads 0..2*mean; ``lognormal``
+    has the given mean and (approximately) the given p99, a good fit for LLM latency.
+    """
+    rng = random.Random(seed)
+    if mean_s <= 0:
+        return lambda: 0.0
+    if distribution == "fixed":
+        return lambda: mean_s
+    if distribution == "uniform":
+        return lambda: rng.uniform(0.0, 2 * mean_s)
+    if distribution == "lognormal":
+        p99_s = p99_s or 3 * mean_s
+        # Solve mean = exp(mu + s^2/2) and p99 = exp(mu + 2.326 s) for mu and s
+        ratio = math.log(p99_s / mean_s)
+        sigma = max(0.01, 2.326 - math.sqrt(max(0.0, 2.326 ** 2 - 2 * ratio)))
+        mu = math.log(mean_s) - sigma ** 2 / 2
+        return lambda: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown latency distribution '{distribution}'")
+
+
+def _parsed_fields(text: str) -> Dict[str, Any]:
+    fields = {}
+    for key, raw in _FIELD.findall(text.split(":", 1)[-1]):
+        value: Any = raw.strip("'\"")
+        if raw.isdigit():
+            value = int(raw)
+        elif raw == "None":
+            value = None
+        fields[key] = value
+    return fields
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic, offline chat model that plays the ava agents' tool-call scripts."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: str = "scripted"
+    latency: Callable[[], float] = Field(default=lambda: 0.0, exclude=True)
+    patient_id: str = "USER-123"
+    _ids: Iterator[int] = PrivateAttr(default_factory=itertools.count)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    # --- script ---
+
+    def _call_id(self) -> str:
+        with self._lock:
+            return f"call_{next(self._ids)}"
+
+    def _tool_call(self, name: str, args: Dict[str, Any], text: str = "") -> AIMessage:
+        return AIMessage(content=text, tool_calls=[{"name": name, "args": args, "id": self._call_id()}])
+
+    @staticmethod
+    def _role(messages: List[BaseMessage]) -> str:
+        system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+        if isinstance(system, str):
+            if system.startswith(ORCHESTRATOR_INSTRUCTIONS[:200]):
+                return "medication-agent"
+            if system.startswith(AMBIENT_SUBAGENT_USAGE_INSTRUCTIONS[:200]):
+                return "reminder-agent"
+            if system.startswith(VOICE_ORCHESTRATOR_INSTRUCTIONS[:60]):
+                return "voice-orchestrator"
+        return "orchestrator"
+
+    @staticmethod
+    def _turn(messages: List[BaseMessage]):
+        """(latest user text, name of the tool whose result is last, that result)."""
+        last = messages[-1]
+        user = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        if not isinstance(last, ToolMessage):
+            return user, None, None
+        names = {c["id"]: c["name"] for m in messages if isinstance(m, AIMessage) for c in m.tool_calls}
+        return user, names.get(last.tool_call_id, last.name), str(last.content)
+
+    def next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        role = self._role(messages)
+        user, tool, result = self._turn(messages)
+
+        if role in ("medication-agent", "voice-orchestrator"):
+            if tool is None:
+                return self._tool_call("parse_and_validate_schedule", {"user_query": user})
+            if tool == "parse_and_validate_schedule" and result.startswith("SUCCESS_PARSED_DATA"):
+                data = {**_parsed_fields(result), "patient_id": self.patient_id}
+                return self._tool_call("persist_in_db", {"data": json.dumps(data)})
+            if role == "voice-orchestrator":
+                return self._spoken_summary(result)
+            return AIMessage(content=result)
+
+        if role == "reminder-agent":
+            if tool is None:
+                schedule_id = _SCHEDULE_ID.search(user)
+                patient_id = _PATIENT_ID.search(user)
+                return self._tool_call("process_reminder_call", {
+                    "schedule_id": schedule_id.group(1) if schedule_id else "SCH-001",
+                    "patient_id": patient_id.group(1) if patient_id else self.patient_id,
+                })
+            return AIMessage(content=result)
+
+        if tool is None:
+            return self._tool_call("write_todo", {"todos": [
+                {"content": "Parse the medication instruction.", "status": "in_progress"},
+                {"content": "Persist and schedule the reminder.", "status": "pending"},
+                {"content": "Confirm the schedule to the user.", "status": "pending"},
+            ]})
+        if tool == "write_todo":
+            return self._tool_call("task", {"description": user, "subagent_type": "medication-agent"})
+        return self._spoken_summary(result)
+
+    @staticmethod
+    def _spoken_summary(result: Optional[str]) -> AIMessage:
+        summary = result.splitlines()[0][:200] if result else "done"
+        return AIMessage(content=f"All set. {summary}. Is there anything else I can help you with?")
+
+    def _with_usage(self, messages: List[BaseMessage], message: AIMessage) -> AIMessage:
+        prompt = sum(len(str(m.content)) for m in messages) // 4
+        completion = (len(str(message.content)) + len(json.dumps([c["args"] for c in message.tool_calls]))) // 4
+        message.usage_metadata = {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+        return message
+
+    # --- BaseChatModel ---
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self.latency()
+        if delay:
+            time.sleep(delay)
+        message = self._with_usage(messages, self.next_message(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self.latency()
+        if delay:
+            await asyncio.sleep(delay)
+        message = self._with_usage(messages, self.next_message(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> List[ChatGenerationChunk]:
+        chunks = [
+            ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            for word in (str(message.content).split(" ") if message.content else ())
+        ]
+        chunks.append(ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ],
+            usage_metadata=message.usage_metadata,
+        )))
+        return chunks
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message = self._generate(messages, stop=stop, **kwargs).generations[0].message
+        for chunk in self._chunks(message):
+            if run_manager and chunk.message.content:
+                run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        message = (await self._agenerate(messages, stop=stop, **kwargs)).generations[0].message
+        for chunk in self._chunks(message):
+            if run_manager and chunk.message.content:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
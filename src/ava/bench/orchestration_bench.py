@@ -0,0 +1,270 @@
+"""Offline benchmark of the orchestration overhead (no network, no LLM).
+
+    python -m ava.bench.orchestration_bench --turns 200 --output bench.json
+    python -m ava.bench.orchestration_bench --turns 200 --compare bench.json
+
+Every model is replaced by ``ScriptedChatModel``, which plays a realistic
+intake script (write_todo -> task -> parse_and_validate_schedule ->
+persist_in_db) with zero latency. Everything measured is therefore ava's own
+cost: graph compilation, state reducers, middleware, tool dispatch, prompt
+assembly and persistence. ``--model-latency-ms`` adds a fixed latency per model
+call, to see what the number of round trips costs a caller.
+
+Benchmarks:
+  compile        building the orchestrator graph and its sub-agents
+  agent.invoke   one full intake turn through the compiled orchestrator
+  webhook        the same turn through POST /agora/webhook/convo-ai (ASGI, in process)
+  task_tool      one delegation through the ``task`` tool, without the orchestrator
+
+agent.invoke and webhook run once per orchestrator profile (``--profiles``,
+"full" and "voice" by default) and are reported as ``agent.invoke:<profile>``.
+Each reports wall and CPU time per turn (mean, p50, p99), throughput, model
+calls per turn (all agents), and, from a separate pass under tracemalloc, the
+bytes allocated at peak and the bytes retained per turn. ``--compare`` prints the relative change of every
+metric against an earlier JSON report.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List
+
+from ..registry import ORCHESTRATOR_COMPONENTS
+from .fake_model import INTAKE_UTTERANCES, ScriptedChatModel, latency_sampler
+
+
+def _configure_environment(workdir: str) -> None:
+    """Point every store at a scratch directory before any ava component is built."""
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    os.environ["AVA_MEDICATION_DB"] = os.path.join(workdir, "medications.sqlite3")
+    os.environ.setdefault("AVA_CHECKPOINTER", "memory")
+
+
+def _install_scripted_models(latency_s: float = 0.0) -> None:
+    from ..models import ModelRegistry
+    from ..registry import REGISTRY
+
+    latency = latency_sampler("fixed", latency_s)
+    REGISTRY.discard("models")
+    REGISTRY.register("models", lambda: ModelRegistry(
+        factory=lambda model_id: ScriptedChatModel(model=model_id, latency=latency)
+    ))
+
+
+def _model_calls() -> float:
+    from ..runtime.instrumentation import MODEL_CALLS
+
+    return sum(value for _, _, value in MODEL_CALLS.samples())
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summarize(wall: List[float], cpu: List[float]) -> Dict[str, Any]:
+    return {
+        "turns": len(wall),
+        "wall_ms_mean": round(statistics.fmean(wall) * 1000, 3),
+        "wall_ms_p50": round(_percentile(wall, 0.50) * 1000, 3),
+        "wall_ms_p99": round(_percentile(wall, 0.99) * 1000, 3),
+        "cpu_ms_mean": round(statistics.fmean(cpu) * 1000, 3),
+        "turns_per_s": round(len(wall) / sum(wall), 2) if sum(wall) else None,
+    }
+
+
+def _measure(turn: Callable[[int], Any], turns: int, warmup: int, alloc_turns: int) -> Dict[str, Any]:
+    for i in range(warmup):
+        turn(i)
+    wall, cpu = [], []
+    calls_before = _model_calls()
+    for i in range(turns):
+        started_wall, started_cpu = time.perf_counter(), time.process_time()
+        turn(warmup + i)
+        wall.append(time.perf_counter() - started_wall)
+        cpu.append(time.process_time() - started_cpu)
+    report = _summarize(wall, cpu)
+    report["model_calls_per_turn"] = round((_model_calls() - calls_before) / turns, 2)
+
+    # Allocation pass: tracemalloc slows everything down, so it is kept out of the timings
+    if alloc_turns:
+        peaks, retained = [], []
+        tracemalloc.start()
+        try:
+            for i in range(alloc_turns):
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                turn(warmup + turns + i)
+                after, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - before)
+                retained.append(after - before)
+        finally:
+            tracemalloc.stop()
+        report["alloc_peak_kb_mean"] = round(statistics.fmean(peaks) / 1024, 1)
+        report["alloc_retained_kb_mean"] = round(statistics.fmean(retained) / 1024, 1)
+    return report
+
+
+def _turn_input(i: int) -> Dict[str, Any]:
+    return {"messages": [{"role": "user", "content": INTAKE_UTTERANCES[i % len(INTAKE_UTTERANCES)]}]}
+
+
+def bench_compile() -> Dict[str, Any]:
+    from ..agents.orchestrator_agent import build_orchestrator_agent
+    from ..registry import get_model_registry
+
+    models = get_model_registry()
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+    build_orchestrator_agent(models)
+    return {"wall_ms": round((time.perf_counter() - started_wall) * 1000, 3),
+            "cpu_ms": round((time.process_time() - started_cpu) * 1000, 3)}
+
+
+def bench_agent_invoke(args, profile: str) -> Dict[str, Any]:
+    from ..registry import get_orchestrator_agent
+
+    agent = get_orchestrator_agent(profile)
+    run_id = uuid.uuid4().hex[:8]
+
+    def turn(i: int):
+        # A fresh channel per turn, as for new callers; --turns-per-thread > 1 grows the history
+        thread = f"bench-{run_id}-{i // args.turns_per_thread}"
+        result = agent.invoke(_turn_input(i), config={"configurable": {"thread_id": thread}})
+        assert result["messages"][-1].content.startswith("All set"), result["messages"][-1].content
+
+    return _measure(turn, args.turns, args.warmup, args.alloc_turns)
+
+
+def bench_webhook(args, profile: str) -> Dict[str, Any]:
+    import httpx
+
+    from ..main import app
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://ava.local")
+    run_id = uuid.uuid4().hex[:8]
+
+    def turn(i: int):
+        payload = {"text": INTAKE_UTTERANCES[i % len(INTAKE_UTTERANCES)], "user_id": "1001",
+                   "channel_name": f"bench-{run_id}-{i // args.turns_per_thread}"}
+        response = loop.run_until_complete(
+            client.post("/agora/webhook/convo-ai", params={"profile": profile}, json=payload)
+        )
+        assert response.status_code == 200, response.text
+
+    try:
+        return _measure(turn, args.turns, args.warmup, args.alloc_turns)
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+
+
+def bench_task_tool(args) -> Dict[str, Any]:
+    from ..agents.orchestrator_agent import agent_middleware, orchestrator_sub_agent, reminder_sub_agent, sub_agent_tools
+    from ..registry import get_model_registry
+    from ..states.state import DeepAgentState
+    from ..tools.task_tool import _create_task_tools
+
+    models = get_model_registry()
+    task = _create_task_tools(
+        sub_agent_tools, [orchestrator_sub_agent, reminder_sub_agent], models.get("fast"), DeepAgentState,
+        model_for=models.get, middleware_for=agent_middleware,
+    )[0]
+    state = {"messages": [], "files": {"/notes.txt": "intake notes"}, "todos": []}
+
+    def turn(i: int):
+        description = INTAKE_UTTERANCES[i % len(INTAKE_UTTERANCES)]
+        command = task.func(description, "medication-agent", state, f"call-{i}")
+        assert "SUCCESS_PERSISTED" in command.update["messages"][0].content, command.update["messages"][0].content
+
+    return _measure(turn, args.turns, args.warmup, args.alloc_turns)
+
+
+BENCHMARKS = ("compile", "agent.invoke", "webhook", "task_tool")
+
+
+def run(args) -> Dict[str, Any]:
+    _install_scripted_models(args.model_latency_ms / 1000)
+    results = {}
+    for name in args.only or BENCHMARKS:
+        if name == "compile":
+            results[name] = bench_compile()
+        elif name == "agent.invoke":
+            for profile in args.profiles:
+                results[f"{name}:{profile}"] = bench_agent_invoke(args, profile)
+        elif name == "webhook":
+            for profile in args.profiles:
+                results[f"{name}:{profile}"] = bench_webhook(args, profile)
+        elif name == "task_tool":
+            results[name] = bench_task_tool(args)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "turns": args.turns,
+            "turns_per_thread": args.turns_per_thread,
+            "model_latency_ms": args.model_latency_ms,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """Relative change per numeric metric; negative is better for times and allocations."""
+    delta = {}
+    for name, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(name, {})
+        delta[name] = {
+            key: f"{(value - base[key]) / base[key] * 100:+.1f}%"
+            for key, value in metrics.items()
+            if key != "turns" and isinstance(value, (int, float)) and isinstance(base.get(key), (int, float)) and base[key]
+        }
+    return delta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100, help="timed turns per benchmark")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--alloc-turns", type=int, default=20, help="turns traced for allocations (0 disables)")
+    parser.add_argument("--turns-per-thread", type=int, default=1, help="turns sharing one conversation thread")
+    parser.add_argument("--only", nargs="*", choices=BENCHMARKS)
+    parser.add_argument("--profiles", nargs="+", choices=tuple(ORCHESTRATOR_COMPONENTS),
+                        default=list(ORCHESTRATOR_COMPONENTS))
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="fixed latency added to every model call")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ava-bench-") as workdir:
+        _configure_environment(workdir)
+        # Tool and agent logging would dominate the timings
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        try:
+            report = run(args)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    if args.compare:
+        with open(args.compare) as f:
+            report["compare"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
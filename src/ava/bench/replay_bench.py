@@ -0,0 +1,140 @@
+"""Re-run a recorded cassette offline and time every turn.
+
+    AVA_CASSETTE_MODE=record AVA_CASSETTE_PATH=calls.jsonl.gz ava   # capture real traffic
+    python -m ava.bench.replay_bench calls.jsonl.gz --output replay.json
+    python -m ava.bench.replay_bench calls.jsonl.gz --compare replay.json
+
+The user turns found in the cassette are replayed in recorded order, on their
+recorded threads, through a freshly built orchestrator. Every model call is
+served from the cassette (``--latency zero`` by default, so only ava's own cost
+is measured), and tools run for real unless ``--replay-tools`` is given. The
+report lists wall and CPU time per turn next to the recorded model latency.
+``--compare`` matches turns by index against an earlier report.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from ..runtime.cassette import Cassette
+
+
+def recorded_turns(path: str) -> List[Dict[str, Any]]:
+    """User turns of the orchestrator, in recorded order, with the model latency each one spent."""
+    turns: List[Dict[str, Any]] = []
+    for entry in Cassette.entries(path):
+        if entry["kind"] != "model":
+            continue
+        last = (entry.get("request") or {}).get("last") or {}
+        if entry["agent"] == "orchestrator" and last.get("type") == "human":
+            turns.append({"thread_id": entry.get("thread_id") or f"replay-{len(turns)}",
+                          "text": last["data"]["content"], "recorded_model_s": 0.0})
+        if turns:
+            turns[-1]["recorded_model_s"] += entry["latency_s"]
+    return turns
+
+
+def _configure_environment(args, workdir: str) -> None:
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-replay")
+    os.environ["AVA_CASSETTE_MODE"] = "replay"
+    os.environ["AVA_CASSETTE_PATH"] = args.cassette
+    os.environ["AVA_CASSETTE_LATENCY"] = args.latency
+    os.environ["AVA_CASSETTE_REPLAY_TOOLS"] = "true" if args.replay_tools else "false"
+    os.environ["AVA_MEDICATION_DB"] = os.path.join(workdir, "medications.sqlite3")
+    os.environ.setdefault("AVA_CHECKPOINTER", "memory")
+
+
+def replay(args) -> Dict[str, Any]:
+    from .fake_model import ScriptedChatModel
+    from ..models import ModelRegistry
+    from ..registry import REGISTRY, get_orchestrator_agent
+
+    # Models are never called in replay; placeholders avoid building real clients
+    REGISTRY.discard("models")
+    REGISTRY.register("models", lambda: ModelRegistry(factory=lambda model_id: ScriptedChatModel(model=model_id)))
+    agent = get_orchestrator_agent()
+
+    results = []
+    for index, turn in enumerate(recorded_turns(args.cassette)):
+        started_wall, started_cpu = time.perf_counter(), time.process_time()
+        error = None
+        try:
+            agent.invoke({"messages": [{"role": "user", "content": turn["text"]}]},
+                         config={"configurable": {"thread_id": turn["thread_id"]}})
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results.append({
+            "turn": index,
+            "thread_id": turn["thread_id"],
+            "text": turn["text"][:80],
+            "wall_ms": round((time.perf_counter() - started_wall) * 1000, 3),
+            "cpu_ms": round((time.process_time() - started_cpu) * 1000, 3),
+            "recorded_model_ms": round(turn["recorded_model_s"] * 1000, 1),
+            "error": error,
+        })
+    cpu = [r["cpu_ms"] for r in results if not r["error"]]
+    return {
+        "cassette": args.cassette,
+        "latency": args.latency,
+        "replay_tools": args.replay_tools,
+        "turns": results,
+        "summary": {
+            "turns": len(results),
+            "errors": sum(1 for r in results if r["error"]),
+            "cpu_ms_mean": round(statistics.fmean(cpu), 3) if cpu else None,
+            "cpu_ms_total": round(sum(cpu), 3),
+        },
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn-for-turn change of wall and CPU time against an earlier report."""
+    rows = []
+    for now, before in zip(current["turns"], baseline.get("turns", [])):
+        rows.append({
+            "turn": now["turn"],
+            **{f"{key}_change": f"{(now[key] - before[key]) / before[key] * 100:+.1f}%"
+               for key in ("wall_ms", "cpu_ms") if before.get(key)},
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette", help="cassette recorded with AVA_CASSETTE_MODE=record")
+    parser.add_argument("--latency", choices=("zero", "recorded"), default="zero")
+    parser.add_argument("--replay-tools", action="store_true", help="serve tool results from the cassette too")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    parser.add_argument("--verbose", action="store_true", help="keep agent and tool logging")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ava-replay-") as workdir:
+        _configure_environment(args, workdir)
+        stdout = sys.stdout
+        if not args.verbose:
+            sys.stdout = open(os.devnull, "w")
+        try:
+            report = replay(args)
+        finally:
+            if not args.verbose:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+    if args.compare:
+        with open(args.compare) as f:
+            report["compare"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
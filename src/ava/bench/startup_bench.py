@@ -0,0 +1,50 @@
+"""Measure import-to-ready time of the web application.
+
+    python -m ava.bench.startup_bench --runs 5
+
+Each run is a fresh interpreter that imports ``ava.main`` and runs the
+registry startup, so module caches from earlier runs do not hide cost.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import ava.main
+imported = time.perf_counter() - started
+from ava.registry import REGISTRY
+
+async def probe():
+    await REGISTRY.startup()
+    await REGISTRY.shutdown()
+
+asyncio.run(probe())
+print(json.dumps({"import_s": imported, "import_to_ready_s": REGISTRY.ready_s, "build_s": REGISTRY.build_s}))
+"""
+
+
+def measure_once() -> dict:
+    out = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    runs = [measure_once() for _ in range(args.runs)]
+    print(json.dumps({
+        "runs": args.runs,
+        "import_s_median": statistics.median(r["import_s"] for r in runs),
+        "import_to_ready_s_median": statistics.median(r["import_to_ready_s"] for r in runs),
+        "build_s_last": runs[-1]["build_s"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark paging through a large virtual file with the read_file tool.
+
+    python -m ava.bench.vfs_read_bench --lines 100000 --limit 2000
+
+Pages through the whole file with the indexed ``read_file`` and with the
+previous split-per-read implementation, and prints one JSON report.
+"""
+
+import argparse
+import json
+import time
+
+from ..states.vfs import encode_content, decode_content
+from ..tools.file_tools import read_file
+
+
+def _split_per_read(content: str, offset: int, limit: int) -> str:
+    # The previous read_file body: split the whole file on every call
+    lines = content.splitlines()
+    end_idx = min(offset + limit, len(lines))
+    return "\n".join(f"{i + 1:6d}\t{lines[i][:2000]}" for i in range(offset, end_idx))
+
+
+def run(args) -> dict:
+    content = "\n".join(
+        f"{i:06d} turn={i % 7} role={'user' if i % 2 else 'assistant'} text={'lorem ipsum ' * (i % 5)}"
+        for i in range(args.lines)
+    )
+    state = {"files": {"transcript.txt": encode_content(content)}}
+    offsets = range(0, args.lines, args.limit)
+
+    started = time.perf_counter()
+    indexed = [read_file.func("transcript.txt", state, offset, args.limit) for offset in offsets]
+    indexed_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    baseline = [
+        _split_per_read(decode_content(state["files"]["transcript.txt"]), offset, args.limit) for offset in offsets
+    ]
+    baseline_s = time.perf_counter() - started
+
+    assert indexed == baseline, "indexed reads differ from splitlines()"
+    return {
+        "lines": args.lines,
+        "limit": args.limit,
+        "pages": len(offsets),
+        "stored_bytes": len(state["files"]["transcript.txt"]),
+        "indexed_s": round(indexed_s, 4),
+        "split_per_read_s": round(baseline_s, 4),
+        "speedup": round(baseline_s / indexed_s, 1) if indexed_s else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=2000, help="lines per read")
+    print(json.dumps(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""HTTP load test of the Agora webhook against a local ava process.
+
+    # closed loop: N callers, each speaking turn after turn on its own channel
+    python -m ava.bench.webhook_load --mode closed --levels 1 4 16 64 --duration 20
+
+    # open loop: Poisson arrivals at a fixed rate, whether or not earlier turns finished
+    python -m ava.bench.webhook_load --mode open --levels 2 5 10 20 --duration 20
+
+Unless ``--url`` points at a running server, the harness starts ava in a child
+process with every model replaced by ``ScriptedChatModel``. Each model call
+then takes a latency drawn from ``--latency-dist`` (fixed, uniform or
+lognormal, set by mean and p99). Every level reports throughput,
+p50/p95/p99/max latency of answered turns, the error rate and the shed rate
+(the "please hold" replies from admission control). The report also gives
+the highest level whose p99 stays within ``--p99-budget-ms``.
+
+Open-loop latency is measured from each turn's scheduled arrival, so a
+server that falls behind cannot hide it (no coordinated omission).
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .fake_model import INTAKE_UTTERANCES
+
+WEBHOOK_PATH = "/agora/webhook/convo-ai"
+
+
+# --- server under test ---
+
+def _serve(host: str, port: int, latency: Dict[str, Any], quiet: bool) -> None:
+    """Child process: ava with scripted models, started through the normal FastAPI lifespan."""
+    workdir = tempfile.mkdtemp(prefix="ava-load-")
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-load-test")
+    os.environ["AVA_MEDICATION_DB"] = os.path.join(workdir, "medications.sqlite3")
+    os.environ.setdefault("AVA_CHECKPOINTER", "memory")
+    if quiet:
+        # Per-turn logging would make the server, not the agent, the bottleneck
+        sys.stdout = open(os.devnull, "w")
+
+    import uvicorn
+
+    from .fake_model import ScriptedChatModel, latency_sampler
+    from ..main import app
+    from ..models import ModelRegistry
+    from ..registry import REGISTRY
+
+    REGISTRY.register("models", lambda: ModelRegistry(
+        factory=lambda model_id: ScriptedChatModel(model=model_id, latency=latency_sampler(**latency))
+    ))
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+class AvaServer:
+    """Runs ava under uvicorn in a child process for the duration of a load test."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8010, latency: Optional[Dict[str, Any]] = None,
+                 quiet: bool = True):
+        self.host = host
+        self.port = port
+        self.latency = latency or {}
+        self.quiet = quiet
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "AvaServer":
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(self.host, self.port, self.latency, self.quiet), name="ava-load-server", daemon=True
+        )
+        self._process.start()
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{self.url}/ready", timeout=1.0).json().get("ready"):
+                    return self
+            except (httpx.HTTPError, ValueError):
+                pass
+            if time.monotonic() > deadline or not self._process.is_alive():
+                self._process.terminate()
+                raise RuntimeError("ava server did not become ready")
+            time.sleep(0.1)
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join(10)
+
+
+# --- load generation ---
+
+class _Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.outcomes: Dict[str, int] = {"ok": 0, "shed": 0, "error": 0}
+
+    def record(self, latency_s: float, outcome: str) -> None:
+        self.outcomes[outcome] += 1
+        if outcome == "ok":
+            self.latencies.append(latency_s)
+
+
+async def _turn(client: httpx.AsyncClient, channel: str, text: str, hold_text: str) -> str:
+    try:
+        response = await client.post(WEBHOOK_PATH, json={"text": text, "user_id": "load", "channel_name": channel})
+        if response.status_code != 200:
+            return "error"
+        actions = response.json().get("actions") or [{}]
+        return "shed" if actions[0].get("text") == hold_text else "ok"
+    except (httpx.HTTPError, ValueError):
+        return "error"
+
+
+async def closed_loop(client: httpx.AsyncClient, callers: int, duration_s: float, think_s: float,
+                      hold_text: str) -> Tuple[_Recorder, float]:
+    """``callers`` concurrent channels, each sending its next turn as soon as the previous one is answered."""
+    recorder = _Recorder()
+    run = uuid.uuid4().hex[:6]
+    started = time.perf_counter()
+    stop_at = started + duration_s
+
+    async def caller(index: int):
+        channel = f"load-{run}-c{index}"
+        for text in itertools.cycle(INTAKE_UTTERANCES):
+            if time.perf_counter() >= stop_at:
+                return
+            sent = time.perf_counter()
+            outcome = await _turn(client, channel, text, hold_text)
+            recorder.record(time.perf_counter() - sent, outcome)
+            if think_s:
+                await asyncio.sleep(random.expovariate(1 / think_s))
+
+    await asyncio.gather(*(caller(i) for i in range(callers)))
+    return recorder, time.perf_counter() - started
+
+
+async def open_loop(client: httpx.AsyncClient, rate: float, duration_s: float, channels: int,
+                    hold_text: str) -> Tuple[_Recorder, float]:
+    """Poisson arrivals at ``rate`` turns/s spread over ``channels`` channels."""
+    recorder = _Recorder()
+    run = uuid.uuid4().hex[:6]
+    started = time.perf_counter()
+    pending = set()
+
+    async def one(scheduled: float, index: int):
+        channel = f"load-{run}-o{index % channels}"
+        outcome = await _turn(client, channel, INTAKE_UTTERANCES[index % len(INTAKE_UTTERANCES)], hold_text)
+        recorder.record(time.perf_counter() - scheduled, outcome)
+
+    next_arrival = started
+    for index in itertools.count():
+        next_arrival += random.expovariate(rate)
+        if next_arrival - started >= duration_s:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        task = asyncio.create_task(one(next_arrival, index))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+    return recorder, time.perf_counter() - started
+
+
+def _percentile_ms(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+
+def summarize(mode: str, level: float, recorder: _Recorder, elapsed_s: float) -> Dict[str, Any]:
+    total = sum(recorder.outcomes.values())
+    return {
+        "mode": mode,
+        "level": level,
+        "elapsed_s": round(elapsed_s, 2),
+        "requests": total,
+        **recorder.outcomes,
+        "error_rate": round(recorder.outcomes["error"] / total, 4) if total else None,
+        "shed_rate": round(recorder.outcomes["shed"] / total, 4) if total else None,
+        "throughput_rps": round(recorder.outcomes["ok"] / elapsed_s, 2) if elapsed_s else None,
+        "p50_ms": _percentile_ms(recorder.latencies, 0.50),
+        "p95_ms": _percentile_ms(recorder.latencies, 0.95),
+        "p99_ms": _percentile_ms(recorder.latencies, 0.99),
+        "max_ms": round(max(recorder.latencies) * 1000, 1) if recorder.latencies else None,
+        "mean_ms": round(statistics.fmean(recorder.latencies) * 1000, 1) if recorder.latencies else None,
+    }
+
+
+async def run_levels(url: str, args) -> List[Dict[str, Any]]:
+    from ..main import HOLD_TEXT
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=1000)
+    results = []
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        for level in args.levels:
+            if args.mode == "closed":
+                recorder, elapsed = await closed_loop(client, int(level), args.duration, args.think, HOLD_TEXT)
+            else:
+                recorder, elapsed = await open_loop(client, level, args.duration, args.channels, HOLD_TEXT)
+            summary = summarize(args.mode, level, recorder, elapsed)
+            print(json.dumps(summary), file=sys.stderr)
+            results.append(summary)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--levels", type=float, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="concurrent callers (closed) or arrival rates in turns/s (open)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between a caller's turns (closed)")
+    parser.add_argument("--channels", type=int, default=1000, help="distinct channels turns are spread over (open)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--p99-budget-ms", type=float, default=1500.0, help="voice latency budget for answered turns")
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency-dist", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--latency-mean-ms", type=float, default=150.0, help="mean latency of one model call")
+    parser.add_argument("--latency-p99-ms", type=float, default=600.0, help="p99 latency of one model call (lognormal)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--server-logs", action="store_true", help="keep the server's per-turn logging")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    latency = {"distribution": args.latency_dist, "mean_s": args.latency_mean_ms / 1000,
+               "p99_s": args.latency_p99_ms / 1000, "seed": args.seed}
+    if args.url:
+        results = asyncio.run(run_levels(args.url, args))
+    else:
+        with AvaServer(port=args.port, latency=latency, quiet=not args.server_logs) as server:
+            results = asyncio.run(run_levels(server.url, args))
+
+    within = [r["level"] for r in results if r["p99_ms"] is not None and r["p99_ms"] <= args.p99_budget_ms
+              and not r["error"]]
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "server_logs")},
+        "model_latency": latency if not args.url else None,
+        "levels": results,
+        "max_level_within_budget": max(within) if within else None,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
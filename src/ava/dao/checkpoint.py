@@ -0,0 +1,843 @@
+"""Conversation checkpointers keyed by Agora channel.
+
+Each call's ``channel_name`` is used as the LangGraph ``thread_id`` so that
+``messages``, ``todos`` and ``files`` survive between webhook turns.
+
+Two backends share the same delta encoding:
+- ``BoundedMemorySaver``: in-process, LRU-evicted and expired after an idle TTL
+- ``SQLiteCheckpointSaver``: a local SQLite file that survives restarts
+
+Only channels whose version changed are written on each checkpoint, and
+append-only list channels (``messages``) are stored as the suffix added since
+the previous version instead of a full copy. Dict channels (the ``files``
+VFS) are stored as the changed and removed keys. A full snapshot is written every
+``max_delta_chain`` versions so reads never replay an unbounded chain.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+Typed = Tuple[str, bytes]
+
+
+class _Blob(NamedTuple):
+    """One stored channel version: a full value, a list suffix delta, a dict delta, or empty."""
+    kind: str  # "full" | "delta" | "dict_delta" | "empty"
+    type: str
+    data: bytes
+    base_version: Optional[str] = None
+    offset: int = 0
+
+
+class _StoredCheckpoint(NamedTuple):
+    checkpoint_id: str
+    parent_id: Optional[str]
+    checkpoint: Typed
+    metadata: Typed
+    versions: Dict[str, str]
+
+
+class _LastValue(NamedTuple):
+    version: str
+    value: Any  # list or dict
+    depth: int
+
+
+_EMPTY = _Blob("empty", "empty", b"")
+_MISSING = object()
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Identity first (the common case: the graph carries unchanged items over), then equality."""
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _snapshot(value: Any) -> Any:
+    """Shallow copy of a list or dict channel value, so later in-place edits cannot leak into deltas."""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _dict_delta(previous: dict, value: dict) -> Optional[Tuple[dict, list]]:
+    """(changed, removed) keys turning ``previous`` into ``value``, or None if not worth a delta.
+
+    Unchanged values are usually the very same objects, so the identity check short-circuits
+    and their contents are rarely compared and never serialized.
+    Keys are listed in ``value`` order; replaying them re-inserts each at the end, preserving order.
+    """
+    changed = {}
+    keys = list(value)
+    # Unchanged keys keep their relative order; rewritten ones must all come after them.
+    first_changed = None
+    for index, key in enumerate(keys):
+        if key not in previous or not _same(previous[key], value[key]):
+            changed[key] = value[key]
+            if first_changed is None:
+                first_changed = index
+        elif first_changed is not None:
+            return None  # a rewritten key sits before an untouched one; order cannot be replayed
+    removed = [key for key in previous if key not in value]
+    if len(changed) + len(removed) > len(value) // 2 + 1:
+        return None
+    return changed, removed
+
+
+def _extends(previous: list, value: list) -> bool:
+    """True if ``value`` is ``previous`` with zero or more items appended."""
+    if len(value) < len(previous):
+        return False
+    return all(_same(a, b) for a, b in zip(previous, value))
+
+
+class _DeltaCheckpointSaver(BaseCheckpointSaver, ABC):
+    """Shared checkpoint logic; subclasses provide the storage primitives.
+
+    Deltas are encoded against ``_last_values``, the last value this process wrote or
+    loaded for each channel. The cache is per process, so a store must have a single
+    writer: another process writing or pruning the same threads would leave it stale.
+    """
+
+    def __init__(
+            self,
+            *,
+            serde: Optional[SerializerProtocol] = None,
+            max_delta_chain: int = 32,
+            keep_checkpoints: int = 2,
+            max_threads: int = 10_000,
+    ):
+        super().__init__(serde=serde)
+        self.max_delta_chain = max_delta_chain
+        self.keep_checkpoints = max(1, keep_checkpoints)
+        self.max_threads = max_threads
+        # (thread_id, checkpoint_ns, channel) -> copy of the last list or dict value written, used to emit deltas.
+        # In-process only: it is rebuilt from storage by get_tuple, never shared with other processes.
+        self._last_values: "OrderedDict[Tuple[str, str, str], _LastValue]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    # --- storage primitives -------------------------------------------------
+
+    @abstractmethod
+    def _read_checkpoint(self, thread_id: str, ns: str, checkpoint_id: Optional[str]) -> Optional[_StoredCheckpoint]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _iter_checkpoints(self, thread_id: Optional[str], ns: Optional[str]) -> Iterator[Tuple[str, str, _StoredCheckpoint]]:
+        """Yield (thread_id, ns, checkpoint), newest checkpoint first within each namespace."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _read_blob(self, thread_id: str, ns: str, channel: str, version: str) -> Optional[_Blob]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _read_writes(self, thread_id: str, ns: str, checkpoint_id: str) -> List[Tuple[str, str, Typed]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _write_checkpoint(self, thread_id: str, ns: str, stored: _StoredCheckpoint, blobs: Dict[Tuple[str, str], _Blob]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _write_writes(self, thread_id: str, ns: str, checkpoint_id: str, rows: List[Tuple[str, int, str, Typed, str]]) -> None:
+        raise NotImplementedError
+
+    # --- delta encoding -----------------------------------------------------
+
+    def _remember(self, key: Tuple[str, str, str], last: Optional[_LastValue]) -> None:
+        if last is None:
+            self._last_values.pop(key, None)
+            return
+        self._last_values[key] = last
+        self._last_values.move_to_end(key)
+        # Roughly a handful of list channels per thread
+        while len(self._last_values) > self.max_threads * 4:
+            self._last_values.popitem(last=False)
+
+    def _encode(self, thread_id: str, ns: str, channel: str, version: str, values: Dict[str, Any]) -> _Blob:
+        key = (thread_id, ns, channel)
+        if channel not in values:
+            self._remember(key, None)
+            return _EMPTY
+
+        value = values[channel]
+        last = self._last_values.get(key)
+        chainable = last is not None and last.depth < self.max_delta_chain
+        delta = (
+            _dict_delta(last.value, value)
+            if chainable and isinstance(value, dict) and isinstance(last.value, dict) else None
+        )
+        if chainable and isinstance(value, list) and isinstance(last.value, list) and _extends(last.value, value):
+            type_, data = self.serde.dumps_typed(value[len(last.value):])
+            blob = _Blob("delta", type_, data, last.version, len(last.value))
+            depth = last.depth + 1
+        elif delta is not None:
+            type_, data = self.serde.dumps_typed({"changed": delta[0], "removed": delta[1]})
+            blob = _Blob("dict_delta", type_, data, last.version)
+            depth = last.depth + 1
+        else:
+            type_, data = self.serde.dumps_typed(value)
+            blob = _Blob("full", type_, data)
+            depth = 0
+        self._remember(key, _LastValue(version, _snapshot(value), depth) if isinstance(value, (list, dict)) else None)
+        return blob
+
+    def _decode(self, thread_id: str, ns: str, channel: str, version: str) -> Tuple[Any, int]:
+        """Rebuild a channel value, replaying deltas back to the nearest full snapshot."""
+        chain: List[_Blob] = []
+        current: Optional[str] = version
+        while current is not None:
+            blob = self._read_blob(thread_id, ns, channel, current)
+            if blob is None or blob.kind == "empty":
+                if chain:
+                    raise ValueError(f"Broken delta chain for {thread_id}/{channel}@{version}")
+                return _MISSING, 0
+            chain.append(blob)
+            current = blob.base_version if blob.kind in ("delta", "dict_delta") else None
+
+        base = chain[-1]
+        value = self.serde.loads_typed((base.type, base.data))
+        for blob in reversed(chain[:-1]):
+            if blob.kind == "dict_delta":
+                delta = self.serde.loads_typed((blob.type, blob.data))
+                value = dict(value)
+                for k in delta["removed"]:
+                    value.pop(k, None)
+                for k, v in delta["changed"].items():
+                    value.pop(k, None)
+                    value[k] = v
+            else:
+                value = value[:blob.offset] + self.serde.loads_typed((blob.type, blob.data))
+        return value, len(chain) - 1
+
+    def _needed_blobs(self, thread_id: str, ns: str, checkpoints: Sequence[_StoredCheckpoint]) -> set:
+        """Blob keys (channel, version) reachable from the retained checkpoints."""
+        needed = set()
+        for stored in checkpoints:
+            for channel, version in stored.versions.items():
+                current: Optional[str] = version
+                while current is not None and (channel, current) not in needed:
+                    needed.add((channel, current))
+                    blob = self._read_blob(thread_id, ns, channel, current)
+                    current = blob.base_version if blob is not None and blob.kind in ("delta", "dict_delta") else None
+        return needed
+
+    # --- BaseCheckpointSaver ------------------------------------------------
+
+    def _to_tuple(self, thread_id: str, ns: str, stored: _StoredCheckpoint, remember: bool) -> CheckpointTuple:
+        checkpoint: Checkpoint = self.serde.loads_typed(stored.checkpoint)
+        channel_values = {}
+        for channel, version in stored.versions.items():
+            value, depth = self._decode(thread_id, ns, channel, version)
+            if value is _MISSING:
+                continue
+            channel_values[channel] = value
+            if remember and isinstance(value, (list, dict)):
+                # The graph resumes from this value, so the next put can be a delta
+                self._remember((thread_id, ns, channel), _LastValue(version, _snapshot(value), depth))
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": ns,
+                    "checkpoint_id": stored.checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed(stored.metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": ns,
+                        "checkpoint_id": stored.parent_id,
+                    }
+                }
+                if stored.parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(value))
+                for task_id, channel, value in self._read_writes(thread_id, ns, stored.checkpoint_id)
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            stored = self._read_checkpoint(thread_id, ns, checkpoint_id)
+            if stored is None:
+                return None
+            return self._to_tuple(thread_id, ns, stored, remember=checkpoint_id is None)
+
+    def list(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"] if config else None
+        ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+
+        with self._lock:
+            results = []
+            for thread_id_, ns_, stored in self._iter_checkpoints(thread_id, ns):
+                if config_checkpoint_id and stored.checkpoint_id != config_checkpoint_id:
+                    continue
+                if before_checkpoint_id and stored.checkpoint_id >= before_checkpoint_id:
+                    continue
+                if filter:
+                    metadata = self.serde.loads_typed(stored.metadata)
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                if limit is not None and len(results) >= limit:
+                    break
+                results.append(self._to_tuple(thread_id_, ns_, stored, remember=False))
+        yield from results
+
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+
+        with self._lock:
+            blobs = {
+                (channel, str(version)): self._encode(thread_id, ns, channel, str(version), values)
+                for channel, version in new_versions.items()
+            }
+            stored = _StoredCheckpoint(
+                checkpoint_id=checkpoint["id"],
+                parent_id=config["configurable"].get("checkpoint_id"),
+                checkpoint=self.serde.dumps_typed(c),
+                metadata=self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+                versions={channel: str(version) for channel, version in checkpoint["channel_versions"].items()},
+            )
+            self._write_checkpoint(thread_id, ns, stored, blobs)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (task_id, WRITES_IDX_MAP.get(channel, idx), channel, self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._lock:
+            self._write_writes(thread_id, ns, checkpoint_id, rows)
+
+    def _forget_thread(self, thread_id: str) -> None:
+        for key in [k for k in self._last_values if k[0] == thread_id]:
+            del self._last_values[key]
+
+    # --- async API ----------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+
+class _ThreadStore:
+    """All checkpoints, blobs and pending writes of one conversation thread."""
+    __slots__ = ("checkpoints", "blobs", "writes", "last_access")
+
+    def __init__(self):
+        self.checkpoints: Dict[str, Dict[str, _StoredCheckpoint]] = {}
+        self.blobs: Dict[Tuple[str, str, str], _Blob] = {}
+        self.writes: Dict[Tuple[str, str], Dict[Tuple[str, int], Tuple[str, str, Typed]]] = {}
+        self.last_access = time.monotonic()
+
+
+class BoundedMemorySaver(_DeltaCheckpointSaver):
+    """In-memory checkpointer with LRU eviction and an idle TTL per thread.
+
+    Args:
+        max_threads: Maximum number of live threads kept; least recently used are evicted
+        ttl_seconds: Threads idle for longer than this are dropped (None disables)
+        keep_checkpoints: Number of most recent checkpoints retained per namespace
+        max_delta_chain: Number of list or dict deltas written before a new full snapshot
+    """
+
+    def __init__(
+            self,
+            *,
+            max_threads: int = 10_000,
+            ttl_seconds: Optional[float] = 3600.0,
+            keep_checkpoints: int = 2,
+            max_delta_chain: int = 32,
+            serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(
+            serde=serde, max_delta_chain=max_delta_chain, keep_checkpoints=keep_checkpoints, max_threads=max_threads
+        )
+        self.ttl_seconds = ttl_seconds
+        self._threads: "OrderedDict[str, _ThreadStore]" = OrderedDict()
+
+    def _thread(self, thread_id: str, create: bool = False) -> Optional[_ThreadStore]:
+        self._evict_expired()
+        store = self._threads.get(thread_id)
+        if store is None:
+            if not create:
+                return None
+            store = self._threads[thread_id] = _ThreadStore()
+            while len(self._threads) > self.max_threads:
+                evicted, _ = self._threads.popitem(last=False)
+                self._forget_thread(evicted)
+        store.last_access = time.monotonic()
+        self._threads.move_to_end(thread_id)
+        return store
+
+    def _evict_expired(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Threads are kept in access order, so expired ones are at the front
+        while self._threads:
+            thread_id, store = next(iter(self._threads.items()))
+            if store.last_access >= cutoff:
+                break
+            del self._threads[thread_id]
+            self._forget_thread(thread_id)
+
+    def _read_checkpoint(self, thread_id, ns, checkpoint_id):
+        store = self._thread(thread_id)
+        if store is None or not store.checkpoints.get(ns):
+            return None
+        checkpoints = store.checkpoints[ns]
+        if checkpoint_id is None:
+            checkpoint_id = max(checkpoints)
+        return checkpoints.get(checkpoint_id)
+
+    def _iter_checkpoints(self, thread_id, ns):
+        self._evict_expired()
+        thread_ids = [thread_id] if thread_id is not None else list(self._threads)
+        for thread_id_ in thread_ids:
+            store = self._threads.get(thread_id_)
+            if store is None:
+                continue
+            for ns_, checkpoints in list(store.checkpoints.items()):
+                if ns is not None and ns_ != ns:
+                    continue
+                for checkpoint_id in sorted(checkpoints, reverse=True):
+                    yield thread_id_, ns_, checkpoints[checkpoint_id]
+
+    def _read_blob(self, thread_id, ns, channel, version):
+        store = self._threads.get(thread_id)
+        return store.blobs.get((ns, channel, version)) if store is not None else None
+
+    def _read_writes(self, thread_id, ns, checkpoint_id):
+        store = self._threads.get(thread_id)
+        if store is None:
+            return []
+        return list(store.writes.get((ns, checkpoint_id), {}).values())
+
+    def _write_checkpoint(self, thread_id, ns, stored, blobs):
+        store = self._thread(thread_id, create=True)
+        for (channel, version), blob in blobs.items():
+            store.blobs[(ns, channel, version)] = blob
+        checkpoints = store.checkpoints.setdefault(ns, {})
+        checkpoints[stored.checkpoint_id] = stored
+
+        if len(checkpoints) > self.keep_checkpoints:
+            for checkpoint_id in sorted(checkpoints)[:-self.keep_checkpoints]:
+                del checkpoints[checkpoint_id]
+                store.writes.pop((ns, checkpoint_id), None)
+            needed = self._needed_blobs(thread_id, ns, list(checkpoints.values()))
+            for key in [k for k in store.blobs if k[0] == ns and (k[1], k[2]) not in needed]:
+                del store.blobs[key]
+
+    def _write_writes(self, thread_id, ns, checkpoint_id, rows):
+        store = self._thread(thread_id, create=True)
+        existing = store.writes.setdefault((ns, checkpoint_id), {})
+        for task_id, idx, channel, value, _task_path in rows:
+            if idx >= 0 and (task_id, idx) in existing:
+                continue
+            existing[(task_id, idx)] = (task_id, channel, value)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._threads.pop(thread_id, None)
+            self._forget_thread(thread_id)
+
+
+class SQLiteCheckpointSaver(_DeltaCheckpointSaver):
+    """SQLite-backed checkpointer so conversations survive a process restart.
+
+    Only one process may write a given database file: deltas are encoded against the
+    values this process last saw, and pruning assumes no other writer still needs a blob.
+
+    Args:
+        path: Database file path
+        ttl_seconds: Threads idle for longer than this are purged (None disables)
+        keep_checkpoints: Number of most recent checkpoints retained per namespace
+        max_delta_chain: Number of list or dict deltas written before a new full snapshot
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        checkpoint_type TEXT NOT NULL,
+        checkpoint BLOB NOT NULL,
+        metadata_type TEXT NOT NULL,
+        metadata BLOB NOT NULL,
+        channel_versions TEXT NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    );
+    CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        channel TEXT NOT NULL,
+        version TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        type TEXT NOT NULL,
+        blob BLOB,
+        base_version TEXT,
+        base_offset INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+    );
+    CREATE TABLE IF NOT EXISTS checkpoint_writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT NOT NULL,
+        value BLOB,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    );
+    CREATE TABLE IF NOT EXISTS checkpoint_threads (
+        thread_id TEXT PRIMARY KEY,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_checkpoint_threads_last_access ON checkpoint_threads (last_access);
+    """
+
+    def __init__(
+            self,
+            path: str,
+            *,
+            ttl_seconds: Optional[float] = 24 * 3600.0,
+            keep_checkpoints: int = 2,
+            max_delta_chain: int = 32,
+            serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde, max_delta_chain=max_delta_chain, keep_checkpoints=keep_checkpoints)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._puts_since_purge = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _row_to_stored(self, row) -> _StoredCheckpoint:
+        checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata, versions = row
+        return _StoredCheckpoint(
+            checkpoint_id, parent_id, (checkpoint_type, checkpoint), (metadata_type, metadata), json.loads(versions)
+        )
+
+    def _read_checkpoint(self, thread_id, ns, checkpoint_id):
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata, "
+            "channel_versions FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        if checkpoint_id is None:
+            row = self._conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, ns)).fetchone()
+        else:
+            row = self._conn.execute(query + " AND checkpoint_id = ?", (thread_id, ns, checkpoint_id)).fetchone()
+        if row is None:
+            return None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO checkpoint_threads (thread_id, last_access) VALUES (?, ?)", (thread_id, time.time())
+        )
+        return self._row_to_stored(row)
+
+    def _iter_checkpoints(self, thread_id, ns):
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, "
+            "metadata_type, metadata, channel_versions FROM checkpoints"
+        )
+        clauses, params = [], []
+        if thread_id is not None:
+            clauses.append("thread_id = ?")
+            params.append(thread_id)
+        if ns is not None:
+            clauses.append("checkpoint_ns = ?")
+            params.append(ns)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        for row in self._conn.execute(query, params).fetchall():
+            yield row[0], row[1], self._row_to_stored(row[2:])
+
+    def _read_blob(self, thread_id, ns, channel, version):
+        row = self._conn.execute(
+            "SELECT kind, type, blob, base_version, base_offset FROM checkpoint_blobs "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            (thread_id, ns, channel, version),
+        ).fetchone()
+        return _Blob(*row) if row is not None else None
+
+    def _read_writes(self, thread_id, ns, checkpoint_id):
+        rows = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        return [(task_id, channel, (type_, value)) for task_id, channel, type_, value in rows]
+
+    def _write_checkpoint(self, thread_id, ns, stored, blobs):
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint_blobs "
+                "(thread_id, checkpoint_ns, channel, version, kind, type, blob, base_version, base_offset) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (thread_id, ns, channel, version, b.kind, b.type, b.data, b.base_version, b.offset)
+                    for (channel, version), b in blobs.items()
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "checkpoint_type, checkpoint, metadata_type, metadata, channel_versions) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, ns, stored.checkpoint_id, stored.parent_id,
+                    stored.checkpoint[0], stored.checkpoint[1], stored.metadata[0], stored.metadata[1],
+                    json.dumps(stored.versions),
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_threads (thread_id, last_access) VALUES (?, ?)",
+                (thread_id, time.time()),
+            )
+            self._prune(thread_id, ns)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._puts_since_purge += 1
+        if self._puts_since_purge >= 500:
+            self._puts_since_purge = 0
+            self.purge_expired()
+
+    def _prune(self, thread_id: str, ns: str) -> None:
+        conn = self._conn
+        stale = conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, ns, self.keep_checkpoints),
+        ).fetchall()
+        if not stale:
+            return
+        stale_ids = [(thread_id, ns, checkpoint_id) for (checkpoint_id,) in stale]
+        conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", stale_ids
+        )
+        conn.executemany(
+            "DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", stale_ids
+        )
+        retained = [stored for _, _, stored in self._iter_checkpoints(thread_id, ns)]
+        needed = self._needed_blobs(thread_id, ns, retained)
+        existing = conn.execute(
+            "SELECT channel, version FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, ns)
+        ).fetchall()
+        conn.executemany(
+            "DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            [(thread_id, ns, channel, version) for channel, version in existing if (channel, version) not in needed],
+        )
+
+    def _write_writes(self, thread_id, ns, checkpoint_id, rows):
+        # Special channels (negative idx) overwrite; regular writes keep the first value
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO checkpoint_writes "
+            "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (thread_id, ns, checkpoint_id, task_id, idx, channel, value[0], value[1], task_path)
+                for task_id, idx, channel, value, task_path in rows if idx < 0
+            ],
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO checkpoint_writes "
+            "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (thread_id, ns, checkpoint_id, task_id, idx, channel, value[0], value[1], task_path)
+                for task_id, idx, channel, value, task_path in rows if idx >= 0
+            ],
+        )
+
+    def purge_expired(self) -> int:
+        """Delete threads idle for longer than ``ttl_seconds``. Returns the number purged."""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cutoff = time.time() - self.ttl_seconds
+            expired = [
+                thread_id for (thread_id,) in self._conn.execute(
+                    "SELECT thread_id FROM checkpoint_threads WHERE last_access < ?", (cutoff,)
+                ).fetchall()
+            ]
+            for thread_id in expired:
+                self.delete_thread(thread_id)
+            return len(expired)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes", "checkpoint_threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._forget_thread(thread_id)
+
+    # SQLite calls block, so the async API runs them off the event loop.
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def create_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Build the conversation checkpointer selected by ``AVA_CHECKPOINTER`` (memory, sqlite or none)."""
+    backend = os.getenv("AVA_CHECKPOINTER", "memory").lower()
+    ttl = float(os.getenv("AVA_CHECKPOINT_TTL_S", "3600")) or None
+    keep = int(os.getenv("AVA_CHECKPOINT_KEEP", "2"))
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return SQLiteCheckpointSaver(
+            os.getenv("AVA_CHECKPOINT_DB", "ava_checkpoints.sqlite3"), ttl_seconds=ttl, keep_checkpoints=keep
+        )
+    if backend == "memory":
+        return BoundedMemorySaver(
+            max_threads=int(os.getenv("AVA_CHECKPOINT_MAX_THREADS", "10000")), ttl_seconds=ttl, keep_checkpoints=keep
+        )
+    raise ValueError(f"Unknown AVA_CHECKPOINTER backend '{backend}'")
@@ -1,18 +1,304 @@
-from typing import Dict, Any, Optional
+"""Medication schedule storage.
 
-MEDICATION_DB: Dict[str, Dict[str, Any]] = {
-    "SCH-001": {
+Schedules live behind the ``MedicationRepository`` interface. The default
+implementation is SQLite with indexes on ``patient_id``, ``time_of_day`` and
+``next_due_at``, and a small connection pool shared by the scheduler thread,
+the queue workers and the async web workers.
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Iterable, Iterator
+
+# Demo schedules seeded into an empty database.
+SEED_SCHEDULES: List[Dict[str, Any]] = [
+    {
         "schedule_id": "SCH-001",
         "patient_id": "USER-456",
         "medication": "Amlodipine 10mg",
         "time_of_day": "09:00",
         "phone_number": "+1-555-123-4567"
     },
-    "SCH-002": {
+    {
         "schedule_id": "SCH-002",
         "patient_id": "USER-456",
         "medication": "Simvastatin 40mg",
         "time_of_day": "18:00",
         "phone_number": "+1-555-123-4567"
     }
-}
\ No newline at end of file
+]
+
+# Named slots the parser may produce instead of a clock time.
+TIME_SLOTS = {
+    "morning": "08:00",
+    "noon": "12:00",
+    "afternoon": "14:00",
+    "evening": "18:00",
+    "night": "21:00",
+    "bedtime": "22:00",
+}
+
+SCHEDULE_COLUMNS = (
+    "schedule_id", "patient_id", "medication", "time_of_day", "phone_number",
+    "dosage_mg", "frequency_count", "frequency_unit", "duration_days", "next_due_at", "created_at",
+)
+
+_CLOCK = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?\s*$", re.IGNORECASE)
+
+
+def parse_clock_time(value: str) -> Optional[tuple]:
+    """Parse '08:00', '8:30 pm', '8 AM' or a named slot into an (hour, minute) tuple."""
+    value = TIME_SLOTS.get(value.strip().lower(), value)
+    match = _CLOCK.match(value)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower().replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+
+def compute_next_due(time_of_day: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Epoch seconds of the next occurrence of ``time_of_day`` (comma-separated times allowed)."""
+    if not time_of_day:
+        return None
+    now = now or datetime.now()
+    candidates = []
+    for part in str(time_of_day).split(","):
+        parsed = parse_clock_time(part)
+        if parsed is None:
+            continue
+        due = now.replace(hour=parsed[0], minute=parsed[1], second=0, microsecond=0)
+        if due <= now:
+            due += timedelta(days=1)
+        candidates.append(due.timestamp())
+    return min(candidates) if candidates else None
+
+
+def generate_schedule_id() -> str:
+    """Unique, human-readable schedule id."""
+    return f"SCH-{uuid.uuid4().hex[:12].upper()}"
+
+
+class SQLiteConnectionPool:
+    """Fixed-size pool of SQLite connections usable from any thread.
+
+    Each connection is used by one thread at a time; WAL mode lets readers
+    proceed while a writer commits.
+    """
+
+    def __init__(self, path: str, size: int = 8):
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; the block runs in a transaction committed on success."""
+        conn = self._pool.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class MedicationRepository(ABC):
+    """Storage interface for medication schedules."""
+
+    @abstractmethod
+    def get(self, schedule_id: str) -> Optional[Dict[str, Any]]:
+        """Return one schedule, or None if it does not exist."""
+
+    @abstractmethod
+    def get_many(self, schedule_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the existing schedules among ``schedule_ids``, keyed by schedule id."""
+
+    @abstractmethod
+    def add(self, record: Dict[str, Any]) -> str:
+        """Insert a new schedule and return its generated schedule id.
+
+        Any ``schedule_id`` in ``record`` is ignored, so a caller can never overwrite an existing schedule.
+        """
+
+    @abstractmethod
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """Insert many new schedules in a single transaction and return their generated ids."""
+
+    @abstractmethod
+    def list_by_patient(self, patient_id: str) -> List[Dict[str, Any]]:
+        """All schedules of one patient."""
+
+    @abstractmethod
+    def list_by_time_of_day(self, time_of_day: str) -> List[Dict[str, Any]]:
+        """All schedules firing at the given time of day."""
+
+    @abstractmethod
+    def list_due(self, until: float, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Schedules whose next due time is at or before ``until`` (epoch seconds)."""
+
+    @abstractmethod
+    def delete(self, schedule_id: str) -> bool:
+        """Remove a schedule. Returns True if it existed."""
+
+
+class SQLiteMedicationRepository(MedicationRepository):
+    """SQLite implementation of ``MedicationRepository``."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS medication_schedules (
+        schedule_id TEXT PRIMARY KEY,
+        patient_id TEXT NOT NULL,
+        medication TEXT NOT NULL,
+        time_of_day TEXT,
+        phone_number TEXT,
+        dosage_mg INTEGER,
+        frequency_count INTEGER,
+        frequency_unit TEXT,
+        duration_days INTEGER,
+        next_due_at REAL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_schedules_patient_id ON medication_schedules (patient_id);
+    CREATE INDEX IF NOT EXISTS idx_schedules_time_of_day ON medication_schedules (time_of_day);
+    CREATE INDEX IF NOT EXISTS idx_schedules_next_due_at ON medication_schedules (next_due_at);
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool):
+        self.pool = pool
+        with self.pool.connection() as conn:
+            conn.executescript(self._SCHEMA)
+
+    @staticmethod
+    def _to_row(record: Dict[str, Any], keep_id: bool = False) -> tuple:
+        record = dict(record)
+        # Ids come from here, never from parsed data; only seeding keeps its fixed ids
+        if not (keep_id and record.get("schedule_id")):
+            record["schedule_id"] = generate_schedule_id()
+        if record.get("next_due_at") is None:
+            record["next_due_at"] = compute_next_due(record.get("time_of_day"))
+        record.setdefault("created_at", time.time())
+        return tuple(record.get(column) for column in SCHEDULE_COLUMNS)
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {key: row[key] for key in row.keys() if row[key] is not None}
+
+    def _select(self, where: str, params: tuple) -> List[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"SELECT * FROM medication_schedules WHERE {where}", params).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def get(self, schedule_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._select("schedule_id = ?", (schedule_id,))
+        return rows[0] if rows else None
+
+    def get_many(self, schedule_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        ids = list(dict.fromkeys(schedule_ids))
+        found: Dict[str, Dict[str, Any]] = {}
+        with self.pool.connection() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT * FROM medication_schedules WHERE schedule_id IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                ).fetchall()
+                for row in rows:
+                    found[row["schedule_id"]] = self._to_record(row)
+        return found
+
+    def add(self, record: Dict[str, Any]) -> str:
+        return self.add_many([record])[0]
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        rows = [self._to_row(record) for record in records]
+        placeholders = ", ".join("?" for _ in SCHEDULE_COLUMNS)
+        with self.pool.connection() as conn:
+            # A plain INSERT: a colliding id raises instead of replacing another patient's schedule
+            conn.executemany(
+                f"INSERT INTO medication_schedules ({', '.join(SCHEDULE_COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+        return [row[0] for row in rows]
+
+    def seed(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Insert records that do not exist yet, leaving existing ones untouched."""
+        rows = [self._to_row(record, keep_id=True) for record in records]
+        placeholders = ", ".join("?" for _ in SCHEDULE_COLUMNS)
+        with self.pool.connection() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO medication_schedules ({', '.join(SCHEDULE_COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+
+    def list_by_patient(self, patient_id: str) -> List[Dict[str, Any]]:
+        return self._select("patient_id = ?", (patient_id,))
+
+    def list_by_time_of_day(self, time_of_day: str) -> List[Dict[str, Any]]:
+        return self._select("time_of_day = ?", (time_of_day,))
+
+    def list_due(self, until: float, limit: int = 1000) -> List[Dict[str, Any]]:
+        return self._select("next_due_at <= ? ORDER BY next_due_at LIMIT ?", (until, limit))
+
+    def delete(self, schedule_id: str) -> bool:
+        with self.pool.connection() as conn:
+            cursor = conn.execute("DELETE FROM medication_schedules WHERE schedule_id = ?", (schedule_id,))
+        return cursor.rowcount > 0
+
+
+_POOL: Optional[SQLiteConnectionPool] = None
+_REPOSITORY: Optional[MedicationRepository] = None
+_REPOSITORY_LOCK = threading.RLock()
+
+
+def get_connection_pool() -> SQLiteConnectionPool:
+    """Process-wide pool for the medication database (``AVA_MEDICATION_DB``, ``AVA_DB_POOL_SIZE``)."""
+    global _POOL
+    if _POOL is None:
+        with _REPOSITORY_LOCK:
+            if _POOL is None:
+                _POOL = SQLiteConnectionPool(
+                    os.getenv("AVA_MEDICATION_DB", "ava_medications.sqlite3"),
+                    size=int(os.getenv("AVA_DB_POOL_SIZE", "8")),
+                )
+    return _POOL
+
+
+def get_medication_repository() -> MedicationRepository:
+    """Process-wide medication repository, created on first use.
+
+    Backed by ``get_connection_pool()``; ``AVA_SEED_DEMO_DATA`` seeds the demo
+    schedules into an empty database.
+    """
+    global _REPOSITORY
+    if _REPOSITORY is None:
+        with _REPOSITORY_LOCK:
+            if _REPOSITORY is None:
+                repository = SQLiteMedicationRepository(get_connection_pool())
+                if os.getenv("AVA_SEED_DEMO_DATA", "true").lower() in ("1", "true", "yes"):
+                    repository.seed(SEED_SCHEDULES)
+                _REPOSITORY = repository
+    return _REPOSITORY
@@ -0,0 +1,100 @@
+"""Persistent job store for the reminder dispatcher."""
+
+from dataclasses import dataclass, astuple, fields
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .db import SQLiteConnectionPool
+
+DAY_SECONDS = 24 * 3600.0
+
+
+@dataclass
+class ReminderJob:
+    """A recurring reminder, identified by its medication schedule id.
+
+    Attributes:
+        schedule_id: Medication schedule this reminder belongs to
+        patient_id: Patient to remind
+        time_of_day: Time(s) the schedule was created with (e.g. '08:00' or '08:00,20:00');
+            a recurring job fires at each of them every day
+        next_fire_at: Epoch seconds of the next planned firing
+        interval_s: 0 for a one-off reminder; otherwise the fallback period for times that do not parse
+        end_at: Epoch seconds after which the reminder is not re-armed (None = forever)
+        priority: 'critical' or 'routine', used to order dispatch of a due batch
+    """
+    schedule_id: str
+    patient_id: str
+    time_of_day: str
+    next_fire_at: float
+    interval_s: float = DAY_SECONDS
+    end_at: Optional[float] = None
+    priority: str = "routine"
+
+
+_COLUMNS = tuple(f.name for f in fields(ReminderJob))
+
+
+class SQLiteReminderJobStore:
+    """Reminder jobs kept in the medication database, indexed by next fire time."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS reminder_jobs (
+        schedule_id TEXT PRIMARY KEY,
+        patient_id TEXT NOT NULL,
+        time_of_day TEXT NOT NULL,
+        next_fire_at REAL NOT NULL,
+        interval_s REAL NOT NULL,
+        end_at REAL,
+        priority TEXT NOT NULL DEFAULT 'routine'
+    );
+    CREATE INDEX IF NOT EXISTS idx_reminder_jobs_next_fire_at ON reminder_jobs (next_fire_at);
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool):
+        self.pool = pool
+        with self.pool.connection() as conn:
+            conn.executescript(self._SCHEMA)
+
+    def upsert_many(self, jobs: Iterable[ReminderJob]) -> None:
+        rows = [astuple(job) for job in jobs]
+        if not rows:
+            return
+        with self.pool.connection() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO reminder_jobs ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                rows,
+            )
+
+    def reschedule_many(self, updates: List[Tuple[str, float]]) -> None:
+        """Persist new ``next_fire_at`` values for (schedule_id, next_fire_at) pairs."""
+        if not updates:
+            return
+        with self.pool.connection() as conn:
+            conn.executemany(
+                "UPDATE reminder_jobs SET next_fire_at = ? WHERE schedule_id = ?",
+                [(next_fire_at, schedule_id) for schedule_id, next_fire_at in updates],
+            )
+
+    def delete_many(self, schedule_ids: Iterable[str]) -> None:
+        ids = [(schedule_id,) for schedule_id in schedule_ids]
+        if not ids:
+            return
+        with self.pool.connection() as conn:
+            conn.executemany("DELETE FROM reminder_jobs WHERE schedule_id = ?", ids)
+
+    def iter_all(self, chunk_size: int = 10_000) -> Iterator[ReminderJob]:
+        """Stream every job ordered by next fire time, without loading the table at once."""
+        last_fire_at, last_id = float("-inf"), ""
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM reminder_jobs "
+                    "WHERE (next_fire_at, schedule_id) > (?, ?) ORDER BY next_fire_at, schedule_id LIMIT ?",
+                    (last_fire_at, last_id, chunk_size),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield ReminderJob(*tuple(row))
+            last_fire_at, last_id = rows[-1]["next_fire_at"], rows[-1]["schedule_id"]
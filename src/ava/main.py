@@ -1,32 +1,204 @@
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import Literal, Optional, Tuple
+
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Header, Request, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 import json
 import time
-from .agents.orchestrator_agent import agent
 import dotenv
 
+# Load .env before any ava module reads its configuration.
+dotenv.load_dotenv()
+
+from .metrics import CONTENT_TYPE, render_prometheus
+from .registry import REGISTRY, get_orchestrator_agent
+from .runtime.concurrency import TurnLimiter, TurnRejected
+from .runtime.deadline import TurnDeadline
+from .runtime.idempotency import IdempotentTurns, delivery_key
+from .runtime.streaming import TURN_TIMINGS, TurnTimings, final_message_text, stream_reply_sentences
 from .states.agora_states import AgoraTTSResponse, AgoraAction, AgoraWebhookPayload
 
-dotenv.load_dotenv()
+logger = logging.getLogger(__name__)
+
+# --- Turn admission control ---
+# Turns run on the event loop via ainvoke; the limiter bounds how many run at once
+# and how many may queue behind them before callers get an immediate "please hold".
+MAX_INFLIGHT_TURNS = int(os.getenv("AVA_MAX_INFLIGHT_TURNS", "32"))
+MAX_QUEUED_TURNS = int(os.getenv("AVA_MAX_QUEUED_TURNS", "64"))
+QUEUE_WAIT_TIMEOUT_S = float(os.getenv("AVA_QUEUE_WAIT_TIMEOUT_S", "2.0"))
+HOLD_TEXT = "I'm helping a few other people right now. Please hold on for a moment and say that again."
+
+TURN_LIMITER = TurnLimiter(MAX_INFLIGHT_TURNS, MAX_QUEUED_TURNS, QUEUE_WAIT_TIMEOUT_S)
+
+# --- Voice latency budget ---
+# A blocking turn still running at the deadline continues in the background; the caller hears
+# INTERIM_TEXT now and the finished reply on their next turn, blocking or streamed. Only one turn
+# runs per channel at a time. Each turn is also capped in model calls.
+TURN_DEADLINE = TurnDeadline()
+TURN_MAX_MODEL_CALLS = int(os.getenv("AVA_TURN_MAX_MODEL_CALLS", "6"))
+INTERIM_TEXT = "I'm working on that now and will have it for you in just a moment."
+BUSY_TEXT = "I'm still finishing your last request. Please give me a moment and say that again."
+
+# Webhook retries of a slow turn share its run (single-flight); retries carrying the same
+# delivery id also get its reply for a short TTL after it finished.
+IDEMPOTENT_TURNS = IdempotentTurns()
+
+# Orchestrator profile for webhook turns: "voice" (lean, few model calls) or "full" (deep agent).
+WEBHOOK_PROFILE = os.getenv("AVA_WEBHOOK_PROFILE", "full")
+
+# When enabled, webhook replies are streamed as NDJSON, one speak action per sentence.
+STREAM_RESPONSES = os.getenv("AVA_STREAM_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models, graphs, the reminder dispatcher and the queue workers are built once, here
+    await REGISTRY.startup()
+    yield
+    if not await TURN_DEADLINE.drain(timeout=QUEUE_WAIT_TIMEOUT_S + TURN_DEADLINE.deadline_s):
+        logger.warning("Shutting down with background turns still running.")
+    await REGISTRY.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _thread_config(
+        channel: str, max_model_calls: Optional[int] = None, payload: Optional[AgoraWebhookPayload] = None
+) -> dict:
+    """LangGraph config that checkpoints the conversation under the Agora channel.
+
+    The caller's identity from ``payload`` travels with the run, so persisted schedules
+    belong to the caller rather than to whatever patient id the model writes.
+    """
+    configurable = {"thread_id": channel}
+    if max_model_calls:
+        configurable["max_model_calls"] = max_model_calls
+    if payload is not None:
+        configurable.update(patient_id=payload.user_id, phone_number=payload.phone_number)
+    return {"configurable": configurable}
+
+
+def _hold_response() -> AgoraTTSResponse:
+    """Fast response used when no execution slot is available."""
+    return AgoraTTSResponse(
+        actions=[
+            AgoraAction(action="speak", text=HOLD_TEXT),
+            AgoraAction(action="listen")
+        ],
+        control="continue"
+    )
 
-app = FastAPI()
 
 @app.get("/call")
 async def root(message: str) -> str:
-    result = agent.invoke({
-        "messages": [
-            {"role": "user",
-             "content": "Doctor gave me 500 mg metformin only for tomorrow morning 8 AM for diabetes Create a schedule for that"
-             }]
-    })
+    try:
+        async with TURN_LIMITER.slot():
+            result = await get_orchestrator_agent().ainvoke({
+                "messages": [
+                    {"role": "user",
+                     "content": "Doctor gave me 500 mg metformin only for tomorrow morning 8 AM for diabetes Create a schedule for that"
+                     }]
+            }, config=_thread_config(f"call-{uuid.uuid4()}"))
+    except TurnRejected as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}")
     return result
 
 
+def _speak(text: str) -> str:
+    """One NDJSON chunk speaking ``text``."""
+    return AgoraTTSResponse(actions=[AgoraAction(action="speak", text=text)], control="continue").model_dump_json() + "\n"
+
+
+async def _stream_turn(transcribed_text: str, channel: str, profile: str, config: dict):
+    """Yield NDJSON-encoded AgoraTTSResponse chunks, one spoken sentence per chunk.
+
+    The turn holds its channel like a blocking turn does: it waits for a background turn
+    still running on the thread, and speaks that turn's reply first.
+    """
+    async with TURN_DEADLINE.foreground(channel) as outcome:
+        if outcome.status == "busy":
+            print(f"LangGraph Agent final response (busy): '{BUSY_TEXT}'")
+            yield _speak(BUSY_TEXT)
+        else:
+            if outcome.carried:
+                yield _speak(outcome.carried)
+            try:
+                async with TURN_LIMITER.slot():
+                    timings = TurnTimings(channel=channel, mode="stream")
+                    async for sentence in stream_reply_sentences(
+                            get_orchestrator_agent(profile), {"messages": [{"role": "user", "content": transcribed_text}]},
+                            timings, config=config
+                    ):
+                        yield _speak(sentence)
+                    timings.finish()
+                    print(f"Streamed turn timings for Channel {channel}: {timings.as_dict()}")
+            except TurnRejected as e:
+                print(f"Turn rejected for Channel {channel}: {e}. Sending 'please hold'.")
+                yield _hold_response().model_dump_json() + "\n"
+                return
+
+    yield AgoraTTSResponse(actions=[AgoraAction(action="listen")], control="continue").model_dump_json() + "\n"
+
+
+async def _blocking_turn(transcribed_text: str, channel: str, profile: str, config: dict) -> Tuple[AgoraTTSResponse, bool]:
+    """Run one turn within the voice deadline; returns the response and whether retries may replay it."""
+    async def turn() -> str:
+        async with TURN_LIMITER.slot():
+            timings = TurnTimings(channel=channel, mode="blocking")
+            result = await get_orchestrator_agent(profile).ainvoke(
+                {"messages": [{"role": "user", "content": transcribed_text}]}, config=config
+            )
+            timings.finish()
+            return final_message_text(result)
+
+    try:
+        outcome = await TURN_DEADLINE.run(channel, turn)
+    except TurnRejected as e:
+        print(f"Turn rejected for Channel {channel}: {e}. Sending 'please hold'.")
+        return _hold_response(), False
+
+    if outcome.status == "busy":
+        agent_response_text = BUSY_TEXT
+    else:
+        # A reply finished in the background since the caller's last turn is spoken first
+        spoken = outcome.reply if outcome.status == "done" else INTERIM_TEXT
+        agent_response_text = " ".join(text for text in (outcome.carried, spoken) if text)
+    print(f"LangGraph Agent final response ({outcome.status}): '{agent_response_text}'")
+
+    # 5. Format the structured response for Agora's TTS service
+    return AgoraTTSResponse(
+        actions=[
+            # First action: Speak the agent's response
+            AgoraAction(action="speak", text=agent_response_text),
+            # Second action: Tell Agora to listen for the user's next input
+            AgoraAction(action="listen")
+        ],
+        control="continue"
+    ), outcome.status != "busy"
+
+
 @app.post("/agora/webhook/convo-ai", response_model=AgoraTTSResponse, status_code=200)
-async def agora_webhook_handler(payload: AgoraWebhookPayload):
+async def agora_webhook_handler(
+        payload: AgoraWebhookPayload,
+        stream: bool = Query(STREAM_RESPONSES),
+        profile: Literal["full", "voice"] = Query(WEBHOOK_PROFILE),
+        idempotency_key: Optional[str] = Header(None),
+):
     """
     Receives transcribed user input from Agora, runs the LangGraph agent,
     and sends the synthetic voice response back to Agora for playback.
+
+    With ``stream=true`` the reply is sent as newline-delimited AgoraTTSResponse
+    chunks so TTS can start on the first sentence before the turn completes.
+    ``profile`` selects the orchestrator: "voice" for quick interactive turns, "full" for complex intake.
+    Blocking turns are idempotent per delivery (``Idempotency-Key`` header or ``delivery_id``,
+    else channel and utterance while the turn runs), so platform retries never run the agent
+    twice. Streaming turns are not deduplicated; see ``runtime.idempotency``.
     """
     transcribed_text = payload.text.strip()
     channel = payload.channel_name
@@ -41,20 +213,31 @@ async def agora_webhook_handler(payload: AgoraWebhookPayload):
             control="continue"
         )
 
-    agent_response_text = agent.invoke({"messages": [{"role": "user", "content": transcribed_text}]})
+    config = _thread_config(channel, TURN_MAX_MODEL_CALLS, payload)
+    if stream:
+        return StreamingResponse(_stream_turn(transcribed_text, channel, profile, config), media_type="application/x-ndjson")
 
-    print(f"LangGraph Agent final response: '{agent_response_text}'")
+    # Retries of a slow turn join it, or get its reply by delivery id, instead of running the agent again
+    key = delivery_key(channel, transcribed_text, idempotency_key or payload.delivery_id)
+    return await IDEMPOTENT_TURNS.run(channel, key, lambda: _blocking_turn(transcribed_text, channel, profile, config))
 
-    # 5. Format the structured response for Agora's TTS service
-    return AgoraTTSResponse(
-        actions=[
-            # First action: Speak the agent's response
-            AgoraAction(action="speak", text=agent_response_text),
-            # Second action: Tell Agora to listen for the user's next input
-            AgoraAction(action="listen")
-        ],
-        control="continue"
-    )
+
+@app.get("/ready")
+async def ready():
+    """Startup status: import-to-ready time and the build time of each component."""
+    return {"ready": REGISTRY.ready_s is not None, "import_to_ready_s": REGISTRY.ready_s, "build_s": REGISTRY.build_s}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: node, tool and sub-agent latency, token usage, scheduler lag and queue depth."""
+    return PlainTextResponse(render_prometheus(), media_type=CONTENT_TYPE)
+
+
+@app.get("/agora/turn-timings")
+async def turn_timings(limit: int = 100):
+    """Recent per-turn timings, for comparing the streaming and blocking paths."""
+    return [t.as_dict() for t in list(TURN_TIMINGS)[-limit:]]
 
 
 # --- SECURITY NOTE ---
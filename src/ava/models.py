@@ -0,0 +1,79 @@
+"""Shared chat model clients with per-agent tiers.
+
+Agents ask for a model by tier ("fast", "strong") or by model id, optionally with
+their own timeout and output-token budget. One client is built per model id;
+variants with a different timeout or budget are shallow copies that reuse the
+client's connections.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+
+DEFAULT_TIER = "strong"
+
+
+def default_tiers() -> Dict[str, str]:
+    """Tier name -> model id, overridable with ``AVA_MODEL_<TIER>``."""
+    return {
+        # Intake parsing and anything that needs careful extraction
+        "strong": os.getenv("AVA_MODEL_STRONG", "gemini-2.5-flash-preview-09-2025"),
+        # Single-tool agents such as the reminder-agent, and opt-in downgrades
+        "fast": os.getenv("AVA_MODEL_FAST", "gemini-2.5-flash-lite"),
+    }
+
+
+def _google_chat_model(model_id: str) -> BaseChatModel:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=model_id, temperature=0.0, google_api_key=os.getenv("GOOGLE_API_KEY"))
+
+
+class ModelRegistry:
+    """Hands out chat models by tier or id; each model id gets exactly one client.
+
+    Args:
+        tiers: Tier name -> model id
+        factory: Builds the client for a model id
+    """
+
+    def __init__(self, tiers: Optional[Dict[str, str]] = None,
+                 factory: Callable[[str], BaseChatModel] = _google_chat_model):
+        self.tiers = tiers if tiers is not None else default_tiers()
+        self.factory = factory
+        self._clients: Dict[str, BaseChatModel] = {}
+        self._variants: Dict[Tuple[str, Optional[float], Optional[int]], BaseChatModel] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, model: Optional[str]) -> str:
+        """Model id for a tier name or id (None means the default tier)."""
+        model = model or DEFAULT_TIER
+        return self.tiers.get(model, model)
+
+    def client(self, model: Optional[str] = None) -> BaseChatModel:
+        model_id = self.resolve(model)
+        with self._lock:
+            if model_id not in self._clients:
+                self._clients[model_id] = self.factory(model_id)
+            return self._clients[model_id]
+
+    def get(self, model: Optional[str] = None, timeout: Optional[float] = None,
+            max_tokens: Optional[int] = None) -> BaseChatModel:
+        """Chat model for ``model`` with its own request timeout and output-token budget."""
+        base = self.client(model)
+        if timeout is None and max_tokens is None:
+            return base
+        key = (self.resolve(model), timeout, max_tokens)
+        with self._lock:
+            variant = self._variants.get(key)
+            if variant is None:
+                update = {}
+                if timeout is not None:
+                    update["timeout"] = timeout
+                if max_tokens is not None:
+                    update["max_output_tokens" if "max_output_tokens" in type(base).model_fields else "max_tokens"] = max_tokens
+                # model_copy skips validation, so the copy keeps the base client and its connections
+                variant = self._variants[key] = base.model_copy(update=update)
+            return variant
@@ -0,0 +1,173 @@
+"""Process-wide registry of the expensive singletons.
+
+Model clients (one per model id, shared by every agent), the compiled
+orchestrator graph, the reminder dispatcher and the queue consumers are built
+lazily, exactly once per process, on first use (or eagerly by ``startup``). Importing a module never opens a connection,
+compiles a graph or starts a thread; the FastAPI lifespan calls ``startup``
+and ``shutdown`` instead.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import gauge
+
+COMPONENT_BUILD = gauge("ava_component_build_seconds", "Time taken to build each registry component.", ["component"])
+IMPORT_TO_READY = gauge("ava_import_to_ready_seconds", "Time from importing the registry to the end of startup.")
+
+# Components warmed by startup, in dependency order.
+STARTUP_COMPONENTS = (
+    "models", "checkpointer", "orchestrator_agent", "voice_orchestrator_agent", "scheduler", "orchestrator_consumer",
+)
+# Registry component of each orchestrator profile; all of them share the checkpointer.
+ORCHESTRATOR_COMPONENTS = {"full": "orchestrator_agent", "voice": "voice_orchestrator_agent"}
+
+
+class Registry:
+    """Builds each named component once, on first ``get``, and remembers how long it took."""
+
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.ready_s: Optional[float] = None
+        self.build_s: Dict[str, float] = {}
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        self._factories[name] = factory
+
+    def built(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    started = time.perf_counter()
+                    instance = self._factories[name]()
+                    self.build_s[name] = time.perf_counter() - started
+                    COMPONENT_BUILD.set(self.build_s[name], component=name)
+                    self._instances[name] = instance
+        return instance
+
+    def discard(self, name: str) -> None:
+        with self._lock:
+            self._instances.pop(name, None)
+
+    async def startup(self) -> None:
+        """Build every startup component and start the background workers."""
+        for name in STARTUP_COMPONENTS:
+            # Graph compilation is CPU-bound; keep the loop responsive while it runs
+            await asyncio.to_thread(self.get, name)
+        scheduler = self.get("scheduler")
+        if not scheduler.running:
+            await asyncio.to_thread(scheduler.start)
+            print(f"[Ambient:Scheduler] Reminder dispatcher started with {len(scheduler)} jobs.")
+        self.get("orchestrator_consumer").start(asyncio.get_running_loop())
+        self.ready_s = time.perf_counter() - self.created_at
+        IMPORT_TO_READY.set(self.ready_s)
+        print(f"[Registry] Ready {self.ready_s:.2f}s after import; build times: "
+              + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.build_s.items()))
+
+    async def shutdown(self, drain_timeout: Optional[float] = None) -> None:
+        """Stop producing first, then let the workers finish what is already queued."""
+        from .runtime.cassette import close_cassette
+        from .tools.reminder_tools import close_agora_dialer
+
+        if self.built("scheduler"):
+            await asyncio.to_thread(self.get("scheduler").stop)
+        if self.built("orchestrator_consumer"):
+            timeout = drain_timeout if drain_timeout is not None else float(os.getenv("AVA_QUEUE_DRAIN_TIMEOUT_S", "30"))
+            drained = await self.get("orchestrator_consumer").astop(drain=True, timeout=timeout)
+            print(f"[Orchestrator:Worker] Shutdown complete, queue {'drained' if drained else 'NOT drained'}.")
+        close_agora_dialer()
+        close_cassette()
+
+
+REGISTRY = Registry()
+
+
+# --- Component factories (imports are deferred so importing the registry stays cheap) ---
+
+def _build_models():
+    from .models import ModelRegistry
+
+    registry = ModelRegistry()
+    # Connect the tiers the agents use by default before the first turn
+    for tier in registry.tiers:
+        registry.client(tier)
+    return registry
+
+
+def _build_checkpointer():
+    from .dao.checkpoint import create_checkpointer
+
+    return create_checkpointer()
+
+
+def _build_orchestrator_agent(profile: str = "full"):
+    from .agents.orchestrator_agent import build_orchestrator_agent
+
+    return build_orchestrator_agent(get_model_registry(), profile=profile, checkpointer=REGISTRY.get("checkpointer"))
+
+
+def _build_scheduler():
+    from .dao.db import get_connection_pool
+    from .dao.reminder_jobs import SQLiteReminderJobStore
+    from .runtime.dispatcher import ReminderDispatcher
+    from .tools.ambient_tools import ambient_agent_trigger_batch
+
+    return ReminderDispatcher(SQLiteReminderJobStore(get_connection_pool()), ambient_agent_trigger_batch)
+
+
+def _build_orchestrator_consumer():
+    from .agents.event_handlers import ahandle_orchestrator_events, handle_orchestrator_events
+    from .runtime.consumer import OrchestratorConsumer
+    from .tools.ambient_tools import ORCHESTRATOR_QUEUE
+
+    mode = os.getenv("AVA_QUEUE_WORKER_MODE", "thread")
+    return OrchestratorConsumer(
+        ORCHESTRATOR_QUEUE,
+        ahandle_orchestrator_events if mode == "async" else handle_orchestrator_events,
+        workers=int(os.getenv("AVA_QUEUE_WORKERS", "4")),
+        batch_size=int(os.getenv("AVA_QUEUE_BATCH_SIZE", "500")),
+        mode=mode,
+    )
+
+
+REGISTRY.register("models", _build_models)
+REGISTRY.register("checkpointer", _build_checkpointer)
+REGISTRY.register("orchestrator_agent", _build_orchestrator_agent)
+REGISTRY.register("voice_orchestrator_agent", lambda: _build_orchestrator_agent("voice"))
+REGISTRY.register("scheduler", _build_scheduler)
+REGISTRY.register("orchestrator_consumer", _build_orchestrator_consumer)
+
+
+def get_model_registry():
+    return REGISTRY.get("models")
+
+
+def get_chat_model(model: Optional[str] = None, timeout: Optional[float] = None, max_tokens: Optional[int] = None):
+    """Shared chat model by tier ("fast", "strong") or model id; see ``ava.models``."""
+    return get_model_registry().get(model, timeout=timeout, max_tokens=max_tokens)
+
+
+def get_orchestrator_agent(profile: str = "full"):
+    """Compiled orchestrator for an execution profile ("full" or "voice"); see ``ORCHESTRATOR_PROFILES``."""
+    if profile not in ORCHESTRATOR_COMPONENTS:
+        raise ValueError(f"Unknown orchestrator profile '{profile}', expected one of {tuple(ORCHESTRATOR_COMPONENTS)}")
+    return REGISTRY.get(ORCHESTRATOR_COMPONENTS[profile])
+
+
+def get_scheduler():
+    return REGISTRY.get("scheduler")
+
+
+def get_orchestrator_consumer():
+    return REGISTRY.get("orchestrator_consumer")
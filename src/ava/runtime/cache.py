@@ -0,0 +1,140 @@
+"""Size-bounded LRU cache with a TTL and an optional SQLite tier.
+
+The memory tier is an OrderedDict evicted least-recently-used first. When a
+disk path is given, every write also goes to SQLite and memory misses are
+looked up there, so warm entries survive restarts and are shared between
+worker processes on the same host. Values must be JSON-serializable.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from ..metrics import counter
+
+CACHE_LOOKUPS = counter("ava_cache_lookups_total", "Cache lookups by cache, tier and result.", ["cache", "tier", "result"])
+
+_MISSING = object()
+
+
+class LRUTTLCache:
+    """Thread-safe LRU cache whose entries expire ``ttl_seconds`` after being written.
+
+    Args:
+        name: Label used in metrics and as the namespace of the disk tier
+        max_entries: Entries kept in memory before the least recently used is evicted
+        ttl_seconds: Lifetime of an entry; None keeps entries until evicted
+        disk_path: SQLite file for the optional second tier
+        clock: Source of epoch seconds (overridable for tests)
+    """
+
+    def __init__(
+            self,
+            name: str,
+            max_entries: int = 4096,
+            ttl_seconds: Optional[float] = 86400.0,
+            disk_path: Optional[str] = None,
+            clock: Callable[[], float] = time.time,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, timeout=30)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            with self._disk:
+                self._disk.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                    "PRIMARY KEY (namespace, key))"
+                )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _expires_at(self) -> Optional[float]:
+        return self.clock() + self.ttl_seconds if self.ttl_seconds else None
+
+    def _remember(self, key: str, expires_at: Optional[float], value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                if entry[0] is None or entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_LOOKUPS.inc(cache=self.name, tier="memory", result="hit")
+                    return entry[1]
+                del self._entries[key]
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key)
+                ).fetchone()
+                if row is not None and (row[1] is None or row[1] > now):
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    CACHE_LOOKUPS.inc(cache=self.name, tier="disk", result="hit")
+                    return value
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache=self.name, tier="memory" if self._disk is None else "disk", result="miss")
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = self._expires_at()
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (self.name, key, json.dumps(value), expires_at),
+                    )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key))
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers. Returns the number removed from memory."""
+        now = self.clock()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.name, now)
+                    )
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
@@ -0,0 +1,282 @@
+"""Record/replay cassettes for model and tool calls.
+
+In ``record`` mode, ``CassetteMiddleware`` appends every model response (with
+its tool calls, token usage and latency), and every tool result, from the
+orchestrator and each sub-agent to a gzipped JSON-lines cassette. In
+``replay`` mode the model is never called. Responses are served back from
+the cassette, either at their recorded latency or at once. Tool results can
+be replayed too, so side-effecting tools are not executed.
+
+Entries are matched by agent, by the user messages of the conversation (the
+input, which replays identically) and by the step within the run. Tool
+output that differs between runs (generated ids, timestamps) therefore
+does not break the match. Identical keys are served in recorded order.
+
+Configuration: ``AVA_CASSETTE_MODE`` (off|record|replay), ``AVA_CASSETTE_PATH``,
+``AVA_CASSETTE_LATENCY`` (recorded|zero) and ``AVA_CASSETTE_REPLAY_TOOLS``.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ModelRequest, ModelResponse, ToolCallRequest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, message_to_dict, messages_from_dict
+
+from ..metrics import counter
+
+CASSETTE_EVENTS = counter("ava_cassette_events_total", "Cassette records, replays and misses.", ["kind", "action"])
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(KeyError):
+    """Replay was asked for a call the cassette does not contain."""
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _thread_id() -> Optional[str]:
+    try:
+        from langgraph.config import get_config
+
+        return get_config().get("configurable", {}).get("thread_id")
+    except RuntimeError:
+        return None
+
+
+def model_key(agent: str, messages: List[Any]) -> str:
+    """Agent + user inputs of the conversation + how many model steps it has taken."""
+    inputs = [m.content for m in messages if isinstance(m, HumanMessage)]
+    steps = sum(isinstance(m, AIMessage) for m in messages)
+    return _digest("model", agent, inputs, steps)
+
+
+def tool_key(agent: str, tool_call: Dict[str, Any]) -> str:
+    return _digest("tool", agent, tool_call["name"], tool_call.get("args", {}))
+
+
+class Cassette:
+    """Append-only store of recorded calls; loads into per-key FIFO queues for replay."""
+
+    def __init__(self, path: str, mode: str = "record"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', got '{mode}'")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._file = None
+        if mode == "replay":
+            for entry in self.entries(path):
+                self._entries[entry["key"]].append(entry)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = gzip.open(path, "at", encoding="utf-8")
+
+    @staticmethod
+    def entries(path: str) -> List[Dict[str, Any]]:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()  # a crashed or killed process keeps what it recorded
+        CASSETTE_EVENTS.inc(kind=entry["kind"], action="record")
+
+    def take(self, key: str, kind: str) -> Dict[str, Any]:
+        """Next recorded entry for ``key``; once exhausted, the last one is served again."""
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                self._last[key] = entry = queue.popleft()
+            else:
+                entry = self._last.get(key)
+        if entry is None:
+            CASSETTE_EVENTS.inc(kind=kind, action="miss")
+            raise CassetteMiss(f"No recorded {kind} call for key {key} in {self.path}")
+        CASSETTE_EVENTS.inc(kind=kind, action="replay")
+        return entry
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_CASSETTE: Optional[Cassette] = None
+_CASSETTE_LOCK = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Process-wide cassette from ``AVA_CASSETTE_MODE`` / ``AVA_CASSETTE_PATH``; None when off."""
+    global _CASSETTE
+    mode = os.getenv("AVA_CASSETTE_MODE", "off").lower()
+    if mode == "off":
+        return None
+    if mode not in CASSETTE_MODES:
+        raise ValueError(f"AVA_CASSETTE_MODE must be one of {CASSETTE_MODES}, got '{mode}'")
+    if _CASSETTE is None:
+        with _CASSETTE_LOCK:
+            if _CASSETTE is None:
+                _CASSETTE = Cassette(os.getenv("AVA_CASSETTE_PATH", "ava_cassette.jsonl.gz"), mode)
+                print(f"[Cassette] {mode.capitalize()}ing {_CASSETTE.path}")
+    return _CASSETTE
+
+
+def close_cassette() -> None:
+    global _CASSETTE
+    with _CASSETTE_LOCK:
+        if _CASSETTE is not None:
+            _CASSETTE.close()
+            _CASSETTE = None
+
+
+class CassetteMiddleware(AgentMiddleware):
+    """Records or replays one agent's model (and optionally tool) calls; install it innermost."""
+
+    def __init__(self, agent: str, cassette: Cassette, latency: Optional[str] = None,
+                 replay_tools: Optional[bool] = None):
+        super().__init__()
+        self.agent = agent
+        self.cassette = cassette
+        self.latency = latency or os.getenv("AVA_CASSETTE_LATENCY", "recorded")
+        if replay_tools is None:
+            replay_tools = os.getenv("AVA_CASSETTE_REPLAY_TOOLS", "false").lower() in ("1", "true", "yes")
+        self.replay_tools = replay_tools
+
+    @property
+    def replaying(self) -> bool:
+        return self.cassette.mode == "replay"
+
+    # --- model calls ---
+
+    def _model_entry(self, request: ModelRequest, response: Any, latency_s: float) -> Dict[str, Any]:
+        messages = response.result if isinstance(response, ModelResponse) else [response]
+        last = request.messages[-1] if request.messages else None
+        return {
+            "kind": "model",
+            "agent": self.agent,
+            "key": model_key(self.agent, request.state.get("messages", request.messages)),
+            "thread_id": _thread_id(),
+            "latency_s": round(latency_s, 4),
+            # Compact request: its shape and the message that triggered it, not the whole history
+            "request": {
+                "messages": len(request.messages),
+                "chars": sum(len(str(m.content)) for m in request.messages),
+                "last": message_to_dict(last) if last is not None else None,
+            },
+            "response": [message_to_dict(m) for m in messages],
+        }
+
+    def _replayed_model(self, request: ModelRequest):
+        entry = self.cassette.take(model_key(self.agent, request.state.get("messages", request.messages)), "model")
+        return ModelResponse(result=messages_from_dict(entry["response"])), entry["latency_s"]
+
+    def wrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        if self.replaying:
+            response, latency_s = self._replayed_model(request)
+            if self.latency == "recorded":
+                time.sleep(latency_s)
+            return response
+        started = time.perf_counter()
+        response = handler(request)
+        self.cassette.record(self._model_entry(request, response, time.perf_counter() - started))
+        return response
+
+    async def awrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        if self.replaying:
+            response, latency_s = self._replayed_model(request)
+            if self.latency == "recorded":
+                await asyncio.sleep(latency_s)
+            return response
+        started = time.perf_counter()
+        response = await handler(request)
+        self.cassette.record(self._model_entry(request, response, time.perf_counter() - started))
+        return response
+
+    # --- tool calls ---
+
+    def _tool_entry(self, request: ToolCallRequest, result: Any, latency_s: float) -> Optional[Dict[str, Any]]:
+        if not isinstance(result, ToolMessage):
+            # Commands (task, write_file, ...) update state; only their text is worth keeping
+            messages = getattr(result, "update", None) or {}
+            result = next((m for m in messages.get("messages", []) if isinstance(m, ToolMessage)), None)
+            if result is None:
+                return None
+        return {
+            "kind": "tool",
+            "agent": self.agent,
+            "key": tool_key(self.agent, request.tool_call),
+            "tool": request.tool_call["name"],
+            "latency_s": round(latency_s, 4),
+            "content": result.content,
+            "status": result.status,
+        }
+
+    def _replayed_tool(self, request: ToolCallRequest):
+        entry = self.cassette.take(tool_key(self.agent, request.tool_call), "tool")
+        message = ToolMessage(entry["content"], tool_call_id=request.tool_call["id"], name=entry["tool"],
+                              status=entry.get("status", "success"))
+        return message, entry["latency_s"]
+
+    def _replays_tool(self, request: ToolCallRequest) -> bool:
+        # Delegation tools run sub-agents, which replay their own calls
+        return self.replaying and self.replay_tools and request.tool_call["name"] not in ("task", "task_batch")
+
+    def wrap_tool_call(
+            self,
+            request: ToolCallRequest,
+            handler: Callable[[ToolCallRequest], Any],
+    ) -> Any:
+        if self._replays_tool(request):
+            message, latency_s = self._replayed_tool(request)
+            if self.latency == "recorded":
+                time.sleep(latency_s)
+            return message
+        started = time.perf_counter()
+        result = handler(request)
+        if not self.replaying:
+            entry = self._tool_entry(request, result, time.perf_counter() - started)
+            if entry is not None:
+                self.cassette.record(entry)
+        return result
+
+    async def awrap_tool_call(
+            self,
+            request: ToolCallRequest,
+            handler: Callable[[ToolCallRequest], Awaitable[Any]],
+    ) -> Any:
+        if self._replays_tool(request):
+            message, latency_s = self._replayed_tool(request)
+            if self.latency == "recorded":
+                await asyncio.sleep(latency_s)
+            return message
+        started = time.perf_counter()
+        result = await handler(request)
+        if not self.replaying:
+            entry = self._tool_entry(request, result, time.perf_counter() - started)
+            if entry is not None:
+                self.cassette.record(entry)
+        return result
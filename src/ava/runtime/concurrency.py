@@ -0,0 +1,70 @@
+"""Admission control for agent turns served by the web app.
+
+Each webhook turn is a chain of LLM round trips. Running them through a
+bounded number of slots keeps the event loop responsive and lets the
+server shed load early instead of queueing callers indefinitely.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+
+class TurnRejected(Exception):
+    """Raised when a turn cannot be admitted because the server is saturated."""
+
+
+class TurnLimiter:
+    """Caps in-flight agent turns and the number of turns waiting for a slot.
+
+    Args:
+        max_inflight: Maximum number of turns executing at the same time
+        max_waiting: Maximum number of turns allowed to wait for a free slot
+        wait_timeout: Seconds a waiting turn may wait before being rejected
+    """
+
+    def __init__(self, max_inflight: int, max_waiting: int, wait_timeout: Optional[float] = None):
+        if max_inflight < 1:
+            raise ValueError("max_inflight must be at least 1")
+        self.max_inflight = max_inflight
+        self.max_waiting = max(0, max_waiting)
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self._inflight = 0
+        self._waiting = 0
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one execution slot for the duration of the block.
+
+        Raises:
+            TurnRejected: If the wait queue is full or the wait timed out
+        """
+        if not self._semaphore.locked():
+            # A free slot is taken synchronously, so concurrent arrivals see it immediately
+            await self._semaphore.acquire()
+        elif self._waiting >= self.max_waiting:
+            raise TurnRejected(f"{self._inflight} turns in flight and {self._waiting} waiting")
+        else:
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise TurnRejected(f"no free slot within {self.wait_timeout}s") from None
+            finally:
+                self._waiting -= 1
+
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            self._semaphore.release()
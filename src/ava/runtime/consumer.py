@@ -0,0 +1,153 @@
+"""Worker pool draining ORCHESTRATOR_QUEUE."""
+
+import asyncio
+import inspect
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from ..metrics import histogram, counter
+from .event_queue import PriorityEventQueue
+
+EventHandler = Callable[[List[Dict[str, Any]]], Union[None, Awaitable[None]]]
+
+EVENT_LATENCY = histogram(
+    "ava_orchestrator_event_seconds", "Time spent handling one orchestrator event.", ["event_type", "outcome"]
+)
+EVENTS_HANDLED = counter("ava_orchestrator_events_total", "Orchestrator events handled.", ["event_type", "outcome"])
+
+
+class OrchestratorConsumer:
+    """Pool of workers that take events off the queue and run the handler on them.
+
+    Args:
+        event_queue: Queue produced into by the ambient agent
+        handler: Callable invoked with a batch of events; may be a coroutine function.
+            In ``async`` mode a plain function runs in a worker thread so it cannot
+            block the event loop
+        workers: Number of concurrent workers
+        batch_size: Maximum events a worker takes per handler call, so a firing
+            window can be resolved in a few round trips
+        mode: ``thread`` runs one OS thread per worker; ``async`` runs workers as tasks
+            on the event loop passed to ``start`` (suited to ``ainvoke``-based handlers)
+        poll_interval: Seconds a worker waits for an event before re-checking for shutdown
+    """
+
+    def __init__(
+            self,
+            event_queue: PriorityEventQueue,
+            handler: EventHandler,
+            workers: int = 4,
+            batch_size: int = 1,
+            mode: str = "thread",
+            poll_interval: float = 0.5,
+    ):
+        if mode not in ("thread", "async"):
+            raise ValueError(f"mode must be 'thread' or 'async', got '{mode}'")
+        self.queue = event_queue
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._tasks: List[asyncio.Task] = []
+        self._handler_is_async = inspect.iscoroutinefunction(handler) or inspect.iscoroutinefunction(
+            getattr(handler, "__call__", None)
+        )
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads or self._tasks) and not self._stopping.is_set()
+
+    def _record(self, batch: List[Dict[str, Any]], started: float, outcome: str) -> None:
+        elapsed = time.perf_counter() - started
+        for event in batch:
+            event_type = event.get("event_type", "unknown")
+            EVENT_LATENCY.observe(elapsed, event_type=event_type, outcome=outcome)
+            EVENTS_HANDLED.inc(event_type=event_type, outcome=outcome)
+
+    # --- thread workers -----------------------------------------------------
+
+    def _thread_worker(self) -> None:
+        while True:
+            batch = self.queue.get_batch(self.batch_size, timeout=self.poll_interval)
+            if not batch:
+                if self._stopping.is_set() or self.queue.closed:
+                    return
+                continue
+            started = time.perf_counter()
+            try:
+                result = self.handler(batch)
+                if inspect.isawaitable(result):
+                    asyncio.run(result)
+                self._record(batch, started, "ok")
+            except Exception as e:
+                self._record(batch, started, "error")
+                print(f"[Orchestrator:Worker] Failed to handle a batch of {len(batch)} events: {e}")
+            finally:
+                self.queue.task_done(len(batch))
+
+    # --- async workers ------------------------------------------------------
+
+    async def _async_worker(self) -> None:
+        while True:
+            batch = await self.queue.aget_batch(self.batch_size, self.poll_interval)
+            if not batch:
+                if self._stopping.is_set() or self.queue.closed:
+                    return
+                continue
+            started = time.perf_counter()
+            try:
+                if self._handler_is_async:
+                    result = self.handler(batch)
+                else:
+                    result = await asyncio.to_thread(self.handler, batch)
+                if inspect.isawaitable(result):
+                    await result
+                self._record(batch, started, "ok")
+            except Exception as e:
+                self._record(batch, started, "error")
+                print(f"[Orchestrator:Worker] Failed to handle a batch of {len(batch)} events: {e}")
+            finally:
+                self.queue.task_done(len(batch))
+
+    # --- lifecycle ----------------------------------------------------------
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        if self.mode == "thread":
+            self._threads = [
+                threading.Thread(target=self._thread_worker, name=f"ava-orchestrator-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+        else:
+            loop = loop or asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._async_worker()) for _ in range(self.workers)]
+        print(f"[Orchestrator:Worker] Started {self.workers} {self.mode} workers.")
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 30.0) -> bool:
+        """Stop the workers, by default after the queued events have been handled.
+
+        Returns True if the queue was fully drained within ``timeout``.
+        """
+        self.queue.close()
+        drained = self.queue.join(timeout) if drain else self.queue.empty()
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(self.poll_interval * 2)
+        self._threads = []
+        return drained
+
+    async def astop(self, drain: bool = True, timeout: Optional[float] = 30.0) -> bool:
+        """Async counterpart of ``stop`` for workers started in async mode."""
+        drained = await asyncio.to_thread(self.stop, drain, timeout)
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=self.poll_interval * 2)
+            self._tasks = []
+        return drained
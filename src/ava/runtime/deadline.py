@@ -0,0 +1,184 @@
+"""Deadline-bounded turns with background continuation.
+
+A voice turn that takes 8 seconds is a failed turn. ``TurnDeadline`` runs each
+turn as a task and waits only until the deadline. A turn still running at that
+point keeps going in the background, holding its execution slot, and the
+caller gets an interim acknowledgement at once. On the caller's next turn on
+the same channel the background reply is collected and spoken first. While a
+channel's turn is still running, in the foreground or in the background, it is
+the only work done on that channel, because its checkpointed thread cannot take
+a second concurrent run. Streamed turns, which run outside ``run``, take part
+through ``foreground``.
+
+Configuration: ``AVA_TURN_DEADLINE_S`` (0 disables it) and
+``AVA_BACKGROUND_REPLY_TTL_S``, how long after deferral a finished background
+reply is kept for its caller to come back.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+TURN_DEADLINE_EVENTS = counter(
+    "ava_turn_deadline_total", "Turns by how they related to the voice deadline.", ["outcome"]
+)
+BACKGROUND_TURNS = gauge("ava_background_turns", "Turns that outlived their deadline and are still held.")
+
+TURN_DEADLINE_S = float(os.getenv("AVA_TURN_DEADLINE_S", "4.0"))
+BACKGROUND_REPLY_TTL_S = float(os.getenv("AVA_BACKGROUND_REPLY_TTL_S", "300"))
+
+
+@dataclass
+class TurnOutcome:
+    """What to say for one turn.
+
+    ``status`` is ``done`` (``reply`` holds the answer), ``deferred`` (the turn
+    went to the background) or ``busy`` (the channel's earlier background turn
+    is still running, so this utterance was not processed). ``carried`` is a
+    background reply from an earlier turn, to be spoken before ``reply``.
+    """
+    status: str
+    reply: Optional[str] = None
+    carried: Optional[str] = None
+
+
+class TurnDeadline:
+    """Runs turns against a deadline and keeps per-channel background continuations.
+
+    Args:
+        deadline_s: Seconds a caller waits for a turn before getting an interim reply
+        reply_ttl_s: Seconds after deferral a finished background reply is kept for its caller
+    """
+
+    def __init__(self, deadline_s: float = TURN_DEADLINE_S, reply_ttl_s: float = BACKGROUND_REPLY_TTL_S):
+        self.deadline_s = deadline_s
+        self.reply_ttl_s = reply_ttl_s
+        self._background: Dict[str, Tuple[asyncio.Task, float]] = {}
+        # Channels with a turn running in the foreground; the future resolves when it ends
+        self._held: Dict[str, asyncio.Future] = {}
+
+    @property
+    def background(self) -> int:
+        return len(self._background)
+
+    def _prune(self) -> None:
+        """Drop finished background replies nobody came back for."""
+        now = time.monotonic()
+        for channel, (task, started) in list(self._background.items()):
+            if task.done() and now - started > self.reply_ttl_s:
+                del self._background[channel]
+                self._reply(task, channel)
+                TURN_DEADLINE_EVENTS.inc(outcome="expired")
+        BACKGROUND_TURNS.set(len(self._background))
+
+    @staticmethod
+    def _reply(task: asyncio.Task, channel: str) -> Optional[str]:
+        if task.cancelled():
+            return None
+        error = task.exception()
+        if error is not None:
+            logger.warning("Background turn for channel %s failed: %s", channel, error)
+            return None
+        return task.result()
+
+    async def _collect(self, channel: str, deadline: float) -> Tuple[bool, Optional[str]]:
+        """Wait, until ``deadline``, for the channel's earlier turn.
+
+        Returns ``(busy, carried)``: busy when that turn is still running, otherwise
+        the background reply it left for this caller, if any.
+        """
+        held = self._held.get(channel)
+        if held is not None:
+            await asyncio.wait({held}, timeout=max(0.0, deadline - time.monotonic()))
+            if not held.done():
+                TURN_DEADLINE_EVENTS.inc(outcome="busy")
+                return True, None
+        if channel not in self._background:
+            return False, None
+        task, _ = self._background[channel]
+        await asyncio.wait({task}, timeout=max(0.0, deadline - time.monotonic()))
+        if not task.done():
+            TURN_DEADLINE_EVENTS.inc(outcome="busy")
+            return True, None
+        del self._background[channel]
+        BACKGROUND_TURNS.set(len(self._background))
+        TURN_DEADLINE_EVENTS.inc(outcome="delivered")
+        return False, self._reply(task, channel)
+
+    def _hold(self, channel: str) -> asyncio.Future:
+        held = asyncio.get_running_loop().create_future()
+        self._held[channel] = held
+        return held
+
+    def _release(self, channel: str, held: asyncio.Future) -> None:
+        if self._held.get(channel) is held:
+            del self._held[channel]
+        if not held.done():
+            held.set_result(None)
+
+    async def run(self, channel: str, turn: Callable[[], Awaitable[str]]) -> TurnOutcome:
+        """Run ``turn`` for ``channel``, returning within the deadline whatever happens."""
+        self._prune()
+        if self.deadline_s <= 0:
+            return TurnOutcome("done", reply=await turn())
+
+        deadline = time.monotonic() + self.deadline_s
+        busy, carried = await self._collect(channel, deadline)
+        if busy:
+            return TurnOutcome("busy")
+
+        held = self._hold(channel)
+        try:
+            task = asyncio.create_task(turn())
+            await asyncio.wait({task}, timeout=max(0.0, deadline - time.monotonic()))
+        finally:
+            self._release(channel, held)
+        if task.done():
+            TURN_DEADLINE_EVENTS.inc(outcome="in_time")
+            # Errors (including admission rejections) surface to the caller as usual
+            return TurnOutcome("done", reply=task.result(), carried=carried)
+
+        self._background[channel] = (task, time.monotonic())
+        BACKGROUND_TURNS.set(len(self._background))
+        TURN_DEADLINE_EVENTS.inc(outcome="deferred")
+        logger.debug("Turn for channel %s passed %ss; continuing in the background.", channel, self.deadline_s)
+        return TurnOutcome("deferred", carried=carried)
+
+    @asynccontextmanager
+    async def foreground(self, channel: str) -> AsyncIterator[TurnOutcome]:
+        """Hold ``channel`` for a turn the caller runs itself, such as a streamed reply.
+
+        Yields ``busy`` when the channel's earlier turn is still running at the deadline
+        (the caller must not start its turn), otherwise ``done`` with any ``carried``
+        background reply. Until the block exits, other turns on the channel wait for it.
+        """
+        self._prune()
+        if self.deadline_s <= 0:
+            yield TurnOutcome("done")
+            return
+
+        busy, carried = await self._collect(channel, time.monotonic() + self.deadline_s)
+        if busy:
+            yield TurnOutcome("busy")
+            return
+        held = self._hold(channel)
+        try:
+            yield TurnOutcome("done", carried=carried)
+        finally:
+            self._release(channel, held)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for background turns to finish (on shutdown); True if they all did."""
+        pending = [task for task, _ in self._background.values() if not task.done()]
+        if not pending:
+            return True
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        return not still_running
@@ -0,0 +1,223 @@
+"""Heap-based reminder dispatcher.
+
+A single thread sleeps until the earliest reminder is due, then pops every
+job that is due at that moment and hands them to the callback as one batch.
+Insert and cancel are O(log n); cancelled entries are dropped lazily when
+they reach the top of the heap. Jobs are persisted in a job store so they
+survive restarts, and reminders missed during downtime are caught up once
+on start.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..dao.db import compute_next_due
+from ..dao.reminder_jobs import ReminderJob, SQLiteReminderJobStore
+from ..metrics import gauge, histogram
+
+SCHEDULER_LAG = histogram(
+    "ava_scheduler_lag_seconds", "Actual minus planned fire time of each reminder.", ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 15.0, 60.0, 300.0, 3600.0),
+)
+SCHEDULER_JOBS = gauge("ava_scheduler_jobs", "Reminder jobs currently scheduled.")
+SCHEDULER_BATCH = histogram(
+    "ava_scheduler_batch_size", "Reminders handed over per due-batch.", buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+)
+
+BatchCallback = Callable[[List[ReminderJob]], None]
+
+
+class ReminderDispatcher:
+    """Fires recurring reminders in due-batches.
+
+    Args:
+        store: Persistent job store; None keeps jobs in memory only
+        on_batch: Called from the dispatcher thread with every job due at once
+        misfire_grace_s: Reminders missed by at most this long are fired on start;
+            older ones are skipped to their next occurrence
+        max_batch: Upper bound on the number of jobs handed over per callback
+        clock: Source of epoch seconds (overridable for tests and benchmarks)
+    """
+
+    def __init__(
+            self,
+            store: Optional[SQLiteReminderJobStore],
+            on_batch: BatchCallback,
+            misfire_grace_s: float = 3600.0,
+            max_batch: int = 10_000,
+            clock: Callable[[], float] = time.time,
+    ):
+        self.store = store
+        self.on_batch = on_batch
+        self.misfire_grace_s = misfire_grace_s
+        self.max_batch = max_batch
+        self.clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        self._jobs: Dict[str, Tuple[ReminderJob, int]] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def get(self, schedule_id: str) -> Optional[ReminderJob]:
+        entry = self._jobs.get(schedule_id)
+        return entry[0] if entry else None
+
+    # --- scheduling ---------------------------------------------------------
+
+    def _push(self, job: ReminderJob) -> None:
+        seq = next(self._seq)
+        self._jobs[job.schedule_id] = (job, seq)
+        heapq.heappush(self._heap, (job.next_fire_at, seq, job.schedule_id))
+
+    def add(self, job: ReminderJob) -> None:
+        """Schedule (or reschedule) one reminder."""
+        self.add_many([job])
+
+    def add_many(self, jobs: Iterable[ReminderJob]) -> None:
+        """Schedule many reminders with a single store write."""
+        jobs = list(jobs)
+        if self.store is not None:
+            self.store.upsert_many(jobs)
+        with self._cond:
+            for job in jobs:
+                self._push(job)
+            SCHEDULER_JOBS.set(len(self._jobs))
+            self._cond.notify()
+
+    def cancel(self, schedule_id: str) -> bool:
+        """Cancel a reminder. Returns True if it was scheduled."""
+        with self._cond:
+            removed = self._jobs.pop(schedule_id, None) is not None
+            SCHEDULER_JOBS.set(len(self._jobs))
+            # Stale heap entries are skipped when popped; compact when they dominate.
+            if len(self._heap) > 2 * len(self._jobs) + 1024:
+                self._heap = [entry for entry in self._heap if self._is_live(entry)]
+                heapq.heapify(self._heap)
+        if removed and self.store is not None:
+            self.store.delete_many([schedule_id])
+        return removed
+
+    def _is_live(self, entry: Tuple[float, int, str]) -> bool:
+        current = self._jobs.get(entry[2])
+        return current is not None and current[1] == entry[1]
+
+    # --- lifecycle ----------------------------------------------------------
+
+    def _load(self) -> None:
+        """Load persisted jobs, catching up or skipping reminders missed while down.
+
+        Missed one-off reminders are deleted from the store, like one-offs that fired.
+        """
+        now = self.clock()
+        rolled, expired = [], []
+        with self._cond:
+            for job in self.store.iter_all():
+                if job.next_fire_at < now - self.misfire_grace_s:
+                    if job.interval_s <= 0:
+                        expired.append(job.schedule_id)
+                        continue
+                    job.next_fire_at = self._next_occurrence(job, now)
+                    rolled.append((job.schedule_id, job.next_fire_at))
+                self._push(job)
+            SCHEDULER_JOBS.set(len(self._jobs))
+        self.store.reschedule_many(rolled)
+        self.store.delete_many(expired)
+
+    def start(self) -> None:
+        if self._running:
+            return
+        if self.store is not None:
+            self._load()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ava-reminder-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- dispatch loop ------------------------------------------------------
+
+    @staticmethod
+    def _next_occurrence(job: ReminderJob, now: float) -> float:
+        """First occurrence strictly after ``now``; missed firings are coalesced.
+
+        Recurrence follows the wall clock: the next of the job's times of day (all of
+        them, for schedules such as '08:00,20:00'), so reminders keep their local time
+        across DST changes. ``interval_s`` is only used for times that do not parse.
+        """
+        after = max(now, job.next_fire_at)
+        due = compute_next_due(job.time_of_day, datetime.fromtimestamp(after))
+        if due is not None:
+            return due
+        missed = int((now - job.next_fire_at) // job.interval_s) + 1
+        return job.next_fire_at + missed * job.interval_s
+
+    def _pop_due(self, now: float) -> List[ReminderJob]:
+        batch = []
+        while self._heap and self._heap[0][0] <= now and len(batch) < self.max_batch:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                batch.append(self._jobs[entry[2]][0])
+        return batch
+
+    def _rearm(self, batch: List[ReminderJob], now: float) -> None:
+        rescheduled, finished = [], []
+        with self._cond:
+            for job in batch:
+                if self._jobs.get(job.schedule_id, (None,))[0] is not job:
+                    continue  # cancelled or replaced while the batch was being handled
+                next_fire_at = self._next_occurrence(job, now) if job.interval_s > 0 else None
+                if next_fire_at is None or (job.end_at is not None and next_fire_at > job.end_at):
+                    del self._jobs[job.schedule_id]
+                    finished.append(job.schedule_id)
+                    continue
+                job.next_fire_at = next_fire_at
+                self._push(job)
+                rescheduled.append((job.schedule_id, next_fire_at))
+            SCHEDULER_JOBS.set(len(self._jobs))
+        if self.store is not None:
+            self.store.reschedule_many(rescheduled)
+            self.store.delete_many(finished)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running:
+                    now = self.clock()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+                batch = self._pop_due(now)
+
+            if not batch:
+                continue
+            fired_at = self.clock()
+            for job in batch:
+                SCHEDULER_LAG.observe(max(0.0, fired_at - job.next_fire_at), priority=job.priority)
+            SCHEDULER_BATCH.observe(len(batch))
+            batch.sort(key=lambda job: job.priority != "critical")
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                print(f"[Ambient:Dispatcher] Batch callback failed for {len(batch)} reminders: {e}")
+            self._rearm(batch, now)
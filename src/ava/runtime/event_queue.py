@@ -0,0 +1,202 @@
+"""Bounded, prioritised event queue between the ambient agent and the orchestrator."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from queue import Empty, Full
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..metrics import counter, gauge, histogram
+
+# Lanes are drained in this order: every critical event goes before any routine one.
+LANES = ("critical", "routine")
+OVERFLOW_POLICIES = ("block", "drop_oldest", "reject")
+
+QUEUE_DEPTH = gauge("ava_orchestrator_queue_depth", "Events waiting in ORCHESTRATOR_QUEUE.", ["lane"])
+QUEUE_WAIT = histogram("ava_orchestrator_queue_wait_seconds", "Time events spent queued before a worker took them.", ["lane"])
+QUEUE_DROPPED = counter("ava_orchestrator_queue_dropped_total", "Events dropped because the queue was full.", ["lane", "reason"])
+
+
+def event_lane(event: Dict[str, Any]) -> str:
+    """Lane of an event; anything not explicitly critical is routine."""
+    return "critical" if event.get("priority") == "critical" else "routine"
+
+
+class PriorityEventQueue:
+    """Thread-safe bounded queue with priority lanes and an explicit overflow policy.
+
+    Mirrors the ``queue.Queue`` put/get API so producers do not change. Event-loop
+    consumers use ``aget_batch``, which waits on a future instead of a thread.
+
+    Args:
+        maxsize: Maximum number of queued events across all lanes
+        overflow: What ``put`` does when full:
+            - ``block``: wait for space (up to ``timeout``), then raise ``queue.Full``
+            - ``drop_oldest``: evict the oldest routine event; with none queued, a critical
+              arrival evicts the oldest critical event and a routine arrival is dropped
+            - ``reject``: raise ``queue.Full`` immediately
+    """
+
+    def __init__(self, maxsize: int = 10_000, overflow: str = "block"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got '{overflow}'")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._lanes: Dict[str, Deque[Tuple[float, Any]]] = {lane: deque() for lane in LANES}
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._unfinished = 0
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def close(self) -> None:
+        """Stop accepting new events; queued events can still be drained."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            while self._async_waiters:
+                self._wake_async()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @staticmethod
+    def _resolve(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def _wake_async(self) -> None:
+        """Wake the longest-waiting ``aget_batch`` caller; call with the lock held."""
+        if self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(self._resolve, waiter)
+
+    def _publish_depth(self) -> None:
+        for lane, items in self._lanes.items():
+            QUEUE_DEPTH.set(len(items), lane=lane)
+
+    def put(self, event: Dict[str, Any], block: bool = True, timeout: Optional[float] = None) -> None:
+        lane = event_lane(event)
+        with self._not_full:
+            if self._closed:
+                raise Full("queue is closed")
+            if self._size >= self.maxsize:
+                if self.overflow == "drop_oldest":
+                    if not self._lanes["routine"] and lane == "routine":
+                        # Only critical events are queued; a routine one never displaces them
+                        QUEUE_DROPPED.inc(lane=lane, reason="drop_incoming")
+                        return
+                    victim_lane = "routine" if self._lanes["routine"] else "critical"
+                    self._lanes[victim_lane].popleft()
+                    self._size -= 1
+                    self._unfinished -= 1
+                    QUEUE_DROPPED.inc(lane=victim_lane, reason="drop_oldest")
+                elif self.overflow == "reject" or not block:
+                    QUEUE_DROPPED.inc(lane=lane, reason="rejected")
+                    raise Full(f"queue full ({self.maxsize} events)")
+                else:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while self._size >= self.maxsize and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            QUEUE_DROPPED.inc(lane=lane, reason="timeout")
+                            raise Full(f"queue full ({self.maxsize} events)")
+                        self._not_full.wait(remaining)
+                    if self._closed:
+                        raise Full("queue is closed")
+            self._lanes[lane].append((time.monotonic(), event))
+            self._size += 1
+            self._unfinished += 1
+            self._publish_depth()
+            self._not_empty.notify()
+            self._wake_async()
+
+    def put_nowait(self, event: Dict[str, Any]) -> None:
+        self.put(event, block=False)
+
+    def _pop(self) -> Dict[str, Any]:
+        for lane in LANES:
+            items = self._lanes[lane]
+            if items:
+                enqueued_at, event = items.popleft()
+                self._size -= 1
+                QUEUE_WAIT.observe(time.monotonic() - enqueued_at, lane=lane)
+                return event
+        raise Empty
+
+    def get_batch(self, max_items: int, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Wait for at least one event, then take up to ``max_items`` in priority order.
+
+        Returns an empty list if nothing arrived within ``timeout`` or the queue is
+        closed and drained.
+        """
+        with self._not_empty:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._size == 0:
+                if self._closed:
+                    return []
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._not_empty.wait(remaining)
+            return self._take(max_items)
+
+    def _take(self, max_items: int) -> List[Dict[str, Any]]:
+        """Pop up to ``max_items`` events; call with the lock held and the queue non-empty."""
+        batch = [self._pop() for _ in range(min(max_items, self._size))]
+        self._publish_depth()
+        self._not_full.notify(len(batch))
+        return batch
+
+    async def aget_batch(self, max_items: int, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """``get_batch`` for event-loop consumers: waits without holding a thread."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._size:
+                    return self._take(max_items)
+                if self._closed:
+                    return []
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait({waiter}, timeout=remaining)
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                waiter.cancel()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        batch = self.get_batch(1, timeout if block else 0)
+        if not batch:
+            raise Empty
+        return batch[0]
+
+    def task_done(self, count: int = 1) -> None:
+        with self._lock:
+            self._unfinished -= count
+            if self._unfinished <= 0:
+                self._unfinished = 0
+                self._all_done.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been processed. Returns False on timeout."""
+        with self._all_done:
+            return self._all_done.wait_for(lambda: self._unfinished == 0, timeout)
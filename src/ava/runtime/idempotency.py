@@ -0,0 +1,106 @@
+"""Duplicate-delivery suppression for webhook turns.
+
+When a turn is slow the webhook platform retries it, and each retry would start
+a new agent run. That doubles LLM spend and can write a schedule twice.
+``IdempotentTurns`` identifies a delivery by its delivery id when the platform
+sends one, otherwise by its channel and normalized utterance:
+
+- a retry that arrives while the original is still running waits for the same
+  run (single-flight), whichever way it was identified. The run is shielded, so
+  it is not cancelled when the original request is dropped;
+- a retry that arrives after the run finished gets the cached reply only when
+  it carries the same explicit delivery id, within the TTL. Only the latest
+  reply of each channel is kept. A caller who says the same thing twice
+  ("yes", "yes") is never mistaken for a retry once the first run is over.
+
+Streaming deliveries are not covered: a stream cannot be shared with, or
+replayed to, a second connection. A retried streaming turn is held off by the
+per-channel busy check of ``TurnDeadline`` instead.
+
+Configuration: ``AVA_IDEMPOTENCY_TTL_S`` (0 disables it) and
+``AVA_IDEMPOTENCY_MAX_CHANNELS``.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..metrics import counter
+from .cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_DELIVERIES = counter(
+    "ava_webhook_deliveries_total", "Webhook deliveries by idempotency outcome.", ["outcome"]
+)
+
+IDEMPOTENCY_TTL_S = float(os.getenv("AVA_IDEMPOTENCY_TTL_S", "30"))
+IDEMPOTENCY_MAX_CHANNELS = int(os.getenv("AVA_IDEMPOTENCY_MAX_CHANNELS", "10000"))
+EXPLICIT_KEY_PREFIX = "id:"
+
+
+def delivery_key(channel: str, text: str, delivery_id: Optional[str] = None) -> str:
+    """Delivery id when given, otherwise a fingerprint of the utterance (case and spacing ignored)."""
+    if delivery_id:
+        return f"{EXPLICIT_KEY_PREFIX}{delivery_id}"
+    normalized = " ".join(text.lower().split())
+    return "text:" + hashlib.sha1(f"{channel}\n{normalized}".encode("utf-8")).hexdigest()[:16]
+
+
+class IdempotentTurns:
+    """Single-flight plus a short-lived per-channel reply cache around turn execution.
+
+    Args:
+        ttl_seconds: How long a finished reply is served to retries with the same delivery id
+        max_channels: Channels whose latest reply is kept
+    """
+
+    def __init__(self, ttl_seconds: float = IDEMPOTENCY_TTL_S, max_channels: int = IDEMPOTENCY_MAX_CHANNELS):
+        self.ttl_seconds = ttl_seconds
+        self._replies = LRUTTLCache("webhook_replies", max_entries=max_channels, ttl_seconds=ttl_seconds or None)
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def run(
+            self,
+            channel: str,
+            key: str,
+            compute: Callable[[], Awaitable[Tuple[Any, bool]]],
+    ) -> Any:
+        """Reply for one delivery. ``compute`` returns ``(reply, cacheable)``; uncacheable
+        replies (such as "please hold") and replies to text-keyed deliveries are shared
+        with concurrent retries but not replayed later."""
+        if self.ttl_seconds <= 0:
+            return (await compute())[0]
+
+        cached = self._replies.get(channel)
+        if cached is not None and cached[0] == key and key.startswith(EXPLICIT_KEY_PREFIX):
+            WEBHOOK_DELIVERIES.inc(outcome="replayed")
+            logger.debug("Duplicate delivery on channel %s; replaying the cached reply.", channel)
+            return cached[1]
+
+        task = self._inflight.get((channel, key))
+        if task is not None:
+            WEBHOOK_DELIVERIES.inc(outcome="joined")
+            logger.debug("Duplicate delivery on channel %s; joining the turn in flight.", channel)
+        else:
+            WEBHOOK_DELIVERIES.inc(outcome="first")
+            task = asyncio.create_task(self._compute(channel, key, compute))
+            self._inflight[(channel, key)] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, channel: str, key: str, compute: Callable[[], Awaitable[Tuple[Any, bool]]]) -> Any:
+        try:
+            reply, cacheable = await compute()
+            if cacheable and key.startswith(EXPLICIT_KEY_PREFIX):
+                self._replies.set(channel, (key, reply))
+            else:
+                self._replies.delete(channel)
+            return reply
+        finally:
+            self._inflight.pop((channel, key), None)
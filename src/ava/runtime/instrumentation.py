@@ -0,0 +1,115 @@
+"""Per-agent latency and token accounting.
+
+``AgentMetricsMiddleware`` times every model call (the graph's ``model``
+node) and every tool call (the ``tools`` node), and counts prompt and
+completion tokens from the model's ``usage_metadata``. One instance is
+installed per agent, so every series carries the agent's name. The cost
+is two ``perf_counter`` calls and a few metric updates per call.
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ModelRequest, ModelResponse, ToolCallRequest
+from langchain_core.messages import AIMessage, ToolMessage
+
+from ..metrics import counter, histogram
+
+NODE_LATENCY = histogram("ava_graph_node_seconds", "Latency of agent graph nodes (model calls).", ["agent", "node"])
+TOOL_LATENCY = histogram("ava_tool_seconds", "Latency of individual tool calls.", ["agent", "tool", "outcome"])
+MODEL_CALLS = counter("ava_model_calls_total", "Model calls by agent, model and outcome.", ["agent", "model", "outcome"])
+MODEL_TOKENS = counter("ava_model_tokens_total", "Tokens reported by the model provider.", ["agent", "model", "kind"])
+
+
+def _model_name(model: Any) -> str:
+    return str(getattr(model, "model", None) or getattr(model, "model_name", None) or type(model).__name__)
+
+
+def _ai_message(response: Any) -> Optional[AIMessage]:
+    if isinstance(response, AIMessage):
+        return response
+    for message in getattr(response, "result", None) or ():
+        if isinstance(message, AIMessage):
+            return message
+    return None
+
+
+def _tool_outcome(result: Any) -> str:
+    return "error" if isinstance(result, ToolMessage) and result.status == "error" else "ok"
+
+
+class AgentMetricsMiddleware(AgentMiddleware):
+    """Records model and tool latency and token usage under the ``agent`` label."""
+
+    def __init__(self, agent: str):
+        super().__init__()
+        self.agent = agent
+
+    def _record_model(self, request: ModelRequest, response: Any, elapsed: float, outcome: str) -> None:
+        model = _model_name(request.model)
+        NODE_LATENCY.observe(elapsed, agent=self.agent, node="model")
+        MODEL_CALLS.inc(agent=self.agent, model=model, outcome=outcome)
+        message = _ai_message(response)
+        usage = getattr(message, "usage_metadata", None) if message is not None else None
+        if usage:
+            MODEL_TOKENS.inc(usage.get("input_tokens", 0), agent=self.agent, model=model, kind="prompt")
+            MODEL_TOKENS.inc(usage.get("output_tokens", 0), agent=self.agent, model=model, kind="completion")
+
+    def wrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        started = time.perf_counter()
+        try:
+            response = handler(request)
+        except Exception:
+            self._record_model(request, None, time.perf_counter() - started, "error")
+            raise
+        self._record_model(request, response, time.perf_counter() - started, "ok")
+        return response
+
+    async def awrap_model_call(
+            self,
+            request: ModelRequest,
+            handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        started = time.perf_counter()
+        try:
+            response = await handler(request)
+        except Exception:
+            self._record_model(request, None, time.perf_counter() - started, "error")
+            raise
+        self._record_model(request, response, time.perf_counter() - started, "ok")
+        return response
+
+    def wrap_tool_call(
+            self,
+            request: ToolCallRequest,
+            handler: Callable[[ToolCallRequest], Any],
+    ) -> Any:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = handler(request)
+            outcome = _tool_outcome(result)
+            return result
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - started,
+                                 agent=self.agent, tool=request.tool_call["name"], outcome=outcome)
+
+    async def awrap_tool_call(
+            self,
+            request: ToolCallRequest,
+            handler: Callable[[ToolCallRequest], Awaitable[Any]],
+    ) -> Any:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await handler(request)
+            outcome = _tool_outcome(result)
+            return result
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - started,
+                                 agent=self.agent, tool=request.tool_call["name"], outcome=outcome)
@@ -0,0 +1,150 @@
+"""Sentence-level streaming of agent replies for low time-to-first-audio.
+
+The orchestrator's final assistant message is streamed token by token and cut
+into sentences as soon as each one is complete, so TTS can start speaking the
+first sentence while the model is still generating the rest.
+"""
+
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+# A sentence ends at ., ! or ? (optionally followed by closing quotes/brackets) and whitespace.
+_SENTENCE_END = re.compile(r"""[.!?]+["')\]]*\s+""")
+
+
+def message_text(message: Any) -> str:
+    """Return the plain text of a message whose content may be a list of parts."""
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for part in content:
+            if isinstance(part, str):
+                parts.append(part)
+            elif isinstance(part, dict) and part.get("type") == "text":
+                parts.append(part.get("text", ""))
+        return "".join(parts)
+    return "" if content is None else str(content)
+
+
+def final_message_text(result: Dict[str, Any]) -> str:
+    """Extract the text of the last assistant message from an agent result."""
+    messages = result.get("messages") or []
+    if not messages:
+        return ""
+    return message_text(messages[-1]).strip()
+
+
+class SentenceSplitter:
+    """Incrementally splits streamed text into complete sentences."""
+
+    def __init__(self, min_chars: int = 12):
+        # Very short fragments ("Dr.", "1.") are merged into the next sentence.
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add a chunk of text and return any sentences completed by it."""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+
+@dataclass
+class TurnTimings:
+    """Per-turn latency breakdown, in seconds from the start of the turn."""
+    channel: str
+    mode: str
+    first_token_s: Optional[float] = None
+    first_sentence_s: Optional[float] = None
+    total_s: Optional[float] = None
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def mark_first_token(self) -> None:
+        if self.first_token_s is None:
+            self.first_token_s = time.perf_counter() - self.started_at
+
+    def mark_first_sentence(self) -> None:
+        if self.first_sentence_s is None:
+            self.first_sentence_s = time.perf_counter() - self.started_at
+
+    def finish(self) -> "TurnTimings":
+        self.total_s = time.perf_counter() - self.started_at
+        TURN_TIMINGS.append(self)
+        return self
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("started_at")
+        return data
+
+
+# Most recent turns, kept for comparing the streaming and blocking paths.
+TURN_TIMINGS: Deque[TurnTimings] = deque(maxlen=1000)
+
+
+def _is_top_level(metadata: Dict[str, Any]) -> bool:
+    """True for tokens produced by the orchestrator itself rather than a nested sub-agent."""
+    namespace = metadata.get("langgraph_checkpoint_ns") or metadata.get("checkpoint_ns") or ""
+    return "|" not in namespace
+
+
+async def stream_reply_sentences(
+        agent,
+        agent_input: Dict[str, Any],
+        timings: TurnTimings,
+        config: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """Run the agent and yield the final assistant message sentence by sentence.
+
+    Once a message is seen to carry tool calls, the rest of its text is discarded,
+    since it is an intermediate orchestration step rather than the spoken reply.
+    Sentences completed before the first tool-call chunk are spoken as filler.
+    """
+    splitter = SentenceSplitter()
+    tool_call_messages = set()
+    current_id = None
+
+    async for chunk, metadata in agent.astream(agent_input, config=config, stream_mode="messages"):
+        if getattr(chunk, "type", None) not in ("AIMessageChunk", "ai") or not _is_top_level(metadata):
+            continue
+        if chunk.id != current_id:
+            # A new assistant message started; anything buffered belonged to a previous step.
+            current_id = chunk.id
+            splitter = SentenceSplitter()
+        if getattr(chunk, "tool_call_chunks", None) or getattr(chunk, "tool_calls", None):
+            tool_call_messages.add(chunk.id)
+        if chunk.id in tool_call_messages:
+            continue
+
+        text = message_text(chunk)
+        if not text:
+            continue
+        timings.mark_first_token()
+        for sentence in splitter.feed(text):
+            timings.mark_first_sentence()
+            yield sentence
+
+    if current_id not in tool_call_messages:
+        rest = splitter.flush()
+        if rest:
+            timings.mark_first_sentence()
+            yield rest
@@ -1,5 +1,5 @@
 # Pydantic model for the expected response structure (what we send back to Agora)
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -16,4 +16,6 @@ class AgoraWebhookPayload(BaseModel):
     text: str = Field(..., description="The transcribed text from the user's speech.")
     user_id: str = Field(None, description="The Agora User ID of the speaker.")
     channel_name: str = Field(..., description="The name of the Agora channel.")
+    phone_number: Optional[str] = Field(None, description="The caller's phone number, used to place reminder calls.")
+    delivery_id: Optional[str] = Field(None, description="Id shared by retries of the same delivery, if the platform sends one.")
     # Include other fields like 'timestamp', 'event_type', etc., as needed
\ No newline at end of file
@@ -4,6 +4,9 @@ from langchain.agents import AgentState
 from pydantic import BaseModel, Field, PositiveInt
 from typing import Optional
 
+from .vfs import FileContent, apply_delta
+
+
 class Todo(TypedDict):
     """A structured task item for tracking progress through complex workflows.
 
@@ -17,24 +20,25 @@ class Todo(TypedDict):
 
 
 def file_reducer(left, right):
-    """Merge two file dictionaries, with right side taking precedence.
+    """Apply a files delta to the virtual file system.
 
-    Used as a reducer function for the files field in agent state,
-    allowing incremental updates to the virtual file system.
+    Used as a reducer function for the files field in agent state. Updates only
+    carry the changed paths; a ``None`` value deletes the path. Written paths
+    move to the end so the dict stays in write order, and the oldest scratch files
+    are evicted once the session quota is exceeded. File contents are shared, never
+    copied, neither input is modified, and only the changed paths are measured
+    (see ``ava.states.vfs.apply_delta``).
 
     Args:
         left: Left side dictionary (existing files)
-        right: Right side dictionary (new/updated files)
+        right: Right side dictionary (changed paths)
 
     Returns:
         Merged dictionary with right values overriding left values
     """
-    if left is None:
-        return right
-    elif right is None:
+    if right is None:
         return left
-    else:
-        return {**left, **right}
+    return apply_delta(left, right)
 
 
 class DeepAgentState(AgentState):
@@ -43,10 +47,11 @@ class DeepAgentState(AgentState):
     Inherits from LangGraph's AgentState and adds:
     - todos: List of Todo items for task planning and progress tracking
     - files: Virtual file system stored as dict mapping filenames to content
+      (large files as zlib bytes, see ``ava.states.vfs``)
     """
 
     todos: NotRequired[list[Todo]]
-    files: Annotated[NotRequired[dict[str, str]], file_reducer]
+    files: Annotated[NotRequired[dict[str, FileContent]], file_reducer]
 
 
 # --- Pydantic Schema Definition (Not a Tool, but essential for Tool 1) ---
@@ -0,0 +1,228 @@
+"""Storage helpers for the virtual filesystem kept in agent state.
+
+Files are stored as ``str``. Large ones are stored as zlib-compressed ``bytes``
+when that saves space. Updates carry only the changed paths, with ``None``
+meaning "delete". Merged filesystems are kept under a per-session quota of
+UTF-8 bytes. A ``FileSystem`` carries its running size, so a merge only measures
+the paths in its delta and scans nothing while under the quota. Only scratch files
+(offloaded tool outputs, which the agent can regenerate) are evicted for it,
+oldest-written first. A ``write_file`` that would not fit is
+refused with an error the model sees (``quota_error``), so the agent's own
+notes are never dropped behind its back.
+
+Paginated reads go through a per-version line index (``line_index``), so a
+read at any offset only touches the requested lines.
+"""
+
+import os
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Dict, Iterable, Optional, Union
+
+from ..metrics import counter
+
+FileContent = Union[str, bytes]
+
+# Per-session budget for all files together, in stored bytes (UTF-8 text or compressed bytes).
+VFS_QUOTA_BYTES = int(os.getenv("AVA_VFS_QUOTA_BYTES", str(1024 * 1024)))
+# Path prefixes of scratch files that may be evicted to stay within the quota.
+VFS_SCRATCH_PREFIXES = tuple(
+    prefix for prefix in os.getenv("AVA_VFS_SCRATCH_PREFIXES", "/tool_outputs/").split(",") if prefix
+)
+# Files at least this large are compressed when it saves at least 10%.
+VFS_COMPRESS_MIN_BYTES = int(os.getenv("AVA_VFS_COMPRESS_MIN_BYTES", str(64 * 1024)))
+# Number of file versions whose line index (and decoded text) is kept in memory.
+LINE_INDEX_CACHE_SIZE = int(os.getenv("AVA_VFS_LINE_INDEX_CACHE_SIZE", "64"))
+
+VFS_QUOTA_EVENTS = counter(
+    "ava_vfs_quota_total", "Session file quota actions: evicted scratch files, rejected writes, merges over quota.",
+    ["action"],
+)
+
+# The characters str.splitlines() splits on ("\r\n" counts as one break).
+_LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def encode_content(content: str) -> FileContent:
+    """Stored form of a file: the text itself, or zlib bytes for large compressible text."""
+    if len(content) < VFS_COMPRESS_MIN_BYTES:
+        return content
+    compressed = zlib.compress(content.encode("utf-8"), 6)
+    return compressed if len(compressed) < 0.9 * len(content) else content
+
+
+def decode_content(stored: Optional[FileContent]) -> Optional[str]:
+    if isinstance(stored, bytes):
+        return zlib.decompress(stored).decode("utf-8")
+    return stored
+
+
+def content_size(stored: FileContent) -> int:
+    """Stored size in bytes: UTF-8 length of text, or the length of compressed bytes."""
+    if isinstance(stored, bytes) or stored.isascii():
+        return len(stored)
+    return len(stored.encode("utf-8"))
+
+
+def is_scratch(path: str) -> bool:
+    return path.startswith(VFS_SCRATCH_PREFIXES)
+
+
+class FileSystem(dict):
+    """Session files in write order, with their total and scratch sizes kept up to date.
+
+    Values are shared between versions, never copied. Checkpoints decode to a plain dict,
+    which ``as_filesystem`` measures once.
+    """
+    __slots__ = ("size", "scratch_size")
+
+    def _account(self, path: str, content: FileContent, sign: int) -> None:
+        size = sign * content_size(content)
+        self.size += size
+        if is_scratch(path):
+            self.scratch_size += size
+
+    def put(self, path: str, content: Optional[FileContent]) -> None:
+        """Write ``content`` to ``path`` as the newest file, or delete ``path`` for None."""
+        old = self.pop(path, None)
+        if old is not None:
+            self._account(path, old, -1)
+        if content is not None:
+            self[path] = content
+            self._account(path, content, 1)
+
+
+def as_filesystem(files: Optional[Dict[str, FileContent]]) -> FileSystem:
+    """``files`` itself when it already is a FileSystem, otherwise a measured copy."""
+    if isinstance(files, FileSystem):
+        return files
+    measured = FileSystem(files or {})
+    measured.size = sum(content_size(content) for content in measured.values())
+    measured.scratch_size = sum(content_size(content) for path, content in measured.items() if is_scratch(path))
+    return measured
+
+
+def apply_delta(
+        files: Optional[Dict[str, FileContent]], delta: Dict[str, Optional[FileContent]], quota: Optional[int] = None
+) -> FileSystem:
+    """A new FileSystem with ``delta`` applied and the quota enforced; ``files`` is not modified.
+
+    The copy is a shallow one: LangGraph may still be checkpointing the previous version, so
+    it cannot be changed in place. Sizes are only measured for the paths in ``delta``.
+    """
+    base = as_filesystem(files)
+    merged = FileSystem(base)
+    merged.size, merged.scratch_size = base.size, base.scratch_size
+    for path, content in delta.items():
+        merged.put(path, content)
+    return enforce_quota(merged, protected=delta.keys(), quota=quota)
+
+
+def enforce_quota(
+        files: Dict[str, FileContent], protected: Iterable[str] = (), quota: Optional[int] = None
+) -> FileSystem:
+    """Evict the oldest-written scratch files (dict order) until ``files`` fits the quota.
+
+    Files in ``protected``, i.e. the ones written by the current update, and files outside
+    the scratch prefixes are never evicted; if they alone exceed the quota the merge is kept
+    as is and counted. Modifies and returns ``files`` (a plain dict is measured into a copy first).
+    """
+    quota = VFS_QUOTA_BYTES if quota is None else quota
+    files = as_filesystem(files)
+    if files.size <= quota:
+        return files
+    protected = set(protected)
+    for path in list(files):
+        if files.size <= quota or not files.scratch_size:
+            break
+        if path in protected or not is_scratch(path):
+            continue
+        files.put(path, None)
+        VFS_QUOTA_EVENTS.inc(action="evicted")
+    if files.size > quota:
+        VFS_QUOTA_EVENTS.inc(action="over_quota")
+    return files
+
+
+def quota_error(
+        files: Dict[str, FileContent], path: str, stored: FileContent, quota: Optional[int] = None
+) -> Optional[str]:
+    """Error for the model when writing ``stored`` to ``path`` cannot fit the quota, even after
+    evicting every scratch file; None when the write fits."""
+    quota = VFS_QUOTA_BYTES if quota is None else quota
+    files = as_filesystem(files)
+    kept = files.size - files.scratch_size
+    if path in files and not is_scratch(path):
+        kept -= content_size(files[path])
+    needed = kept + content_size(stored)
+    if needed <= quota:
+        return None
+    VFS_QUOTA_EVENTS.inc(action="rejected")
+    return (
+        f"Error: File '{path}' was not written: it would bring the session's files to {needed} bytes, "
+        f"over the {quota}-byte quota. Write less, or overwrite a file you no longer need with shorter content."
+    )
+
+
+# --- Line index ---
+
+class LineIndex:
+    """Start/end offsets of every line of one stored file version (the lines of ``str.splitlines``)."""
+
+    __slots__ = ("stored", "text", "starts", "ends")
+
+    def __init__(self, stored: FileContent):
+        self.stored = stored  # keeps the version alive, so its id() cannot be reused while cached
+        self.text = text = decode_content(stored)
+        # One splitlines pass; the line list is only used to measure offsets and then dropped
+        lines = text.splitlines(keepends=True)
+        self.starts = array("q", accumulate(map(len, lines), initial=0))
+        self.starts.pop()
+        self.ends = array("q", map(lambda start, line: start + len(line.rstrip(_LINE_BREAKS)), self.starts, lines))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line(self, number: int, max_chars: Optional[int] = None) -> str:
+        """Line ``number`` (0-based), cut to ``max_chars`` without copying the rest of it."""
+        start, end = self.starts[number], self.ends[number]
+        if max_chars is not None:
+            end = min(end, start + max_chars)
+        return self.text[start:end]
+
+
+_line_indexes: "OrderedDict[int, LineIndex]" = OrderedDict()
+_line_indexes_lock = threading.Lock()
+
+
+def line_index(stored: FileContent) -> LineIndex:
+    """Cached line index of a stored file version, built on first read.
+
+    Every write stores a new content object, so the object identity is the version.
+    """
+    key = id(stored)
+    with _line_indexes_lock:
+        index = _line_indexes.get(key)
+        if index is not None and index.stored is stored:
+            _line_indexes.move_to_end(key)
+            return index
+    index = LineIndex(stored)
+    with _line_indexes_lock:
+        _line_indexes[key] = index
+        _line_indexes.move_to_end(key)
+        while len(_line_indexes) > LINE_INDEX_CACHE_SIZE:
+            _line_indexes.popitem(last=False)
+    return index
+
+
+def invalidate_line_index(stored: Optional[FileContent]) -> None:
+    """Drop the index of a version that has just been overwritten."""
+    if stored is None:
+        return
+    with _line_indexes_lock:
+        index = _line_indexes.get(id(stored))
+        if index is not None and index.stored is stored:
+            del _line_indexes[id(stored)]
@@ -1,67 +1,96 @@
-from datetime import datetime, timedelta
-from queue import Queue
-from apscheduler.schedulers.background import BackgroundScheduler
+import os
+from datetime import datetime, time as dt_time, timedelta
+from typing import List
 from langchain_core.tools import tool
 
+from ..dao.db import compute_next_due
+from ..dao.reminder_jobs import ReminderJob
+from ..registry import get_scheduler
+from ..runtime.event_queue import PriorityEventQueue
+
 # --- 1. Communication Queue (The Ambient Agent's output/Orchestrator's input) ---
 # This is the event bus that the Ambient Agent pushes to, and the Orchestrator listens to.
-ORCHESTRATOR_QUEUE = Queue()
+# It is bounded, with critical reminders in their own lane ahead of routine ones.
+ORCHESTRATOR_QUEUE = PriorityEventQueue(
+    maxsize=int(os.getenv("AVA_QUEUE_MAXSIZE", "10000")),
+    overflow=os.getenv("AVA_QUEUE_OVERFLOW", "block"),
+)
 
-# --- 2. APScheduler Setup ---
-# The BackgroundScheduler runs in its own thread, perfect for non-blocking ambient tasks.
-SCHEDULER = BackgroundScheduler()
-# Start the scheduler immediately
-if not SCHEDULER.running:
-    SCHEDULER.start()
-    print("[Ambient:Scheduler] APScheduler started in background.")
 
+def _trigger_payload(schedule_id: str, patient_id: str, timestamp: str, priority: str = "routine") -> dict:
+    return {
+        "event_type": "SCHEDULED_REMINDER_TRIGGER",
+        "timestamp": timestamp,
+        "schedule_id": schedule_id,
+        "patient_id": patient_id,
+        "priority": priority
+    }
 
-# --- 3. Ambient Agent's Core Action (Pushes to Orchestrator) ---
+
+# --- 2. Ambient Agent's Core Action (Pushes to Orchestrator) ---
 @tool
 def ambient_agent_trigger_action(schedule_id: str, patient_id: str) -> None:
     """
-    This function is executed by APScheduler at the scheduled time.
+    This function is executed at the scheduled time.
     It pushes a command/event into the Orchestrator's queue.
     """
     timestamp = datetime.now().strftime("%H:%M:%S")
-    payload = {
-        "event_type": "SCHEDULED_REMINDER_TRIGGER",
-        "timestamp": timestamp,
-        "schedule_id": schedule_id,
-        "patient_id": patient_id
-    }
 
     # PUSH the event/command back to the Orchestrator
-    ORCHESTRATOR_QUEUE.put(payload)
+    ORCHESTRATOR_QUEUE.put(_trigger_payload(schedule_id, patient_id, timestamp))
     print(f"\n[{timestamp}] [Ambient:TRIGGER] Command pushed to Orchestrator for {schedule_id}.")
 
 
+def ambient_agent_trigger_batch(jobs: List[ReminderJob]) -> None:
+    """
+    Called by the dispatcher with every reminder due at the same moment.
+    Pushes one trigger event per reminder into the Orchestrator's queue.
+    """
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    for job in jobs:
+        ORCHESTRATOR_QUEUE.put(_trigger_payload(job.schedule_id, job.patient_id, timestamp, job.priority))
+    print(f"\n[{timestamp}] [Ambient:TRIGGER] {len(jobs)} reminder commands pushed to Orchestrator.")
+
+
+# --- 3. Reminder Dispatcher Setup ---
+# One dispatcher thread serves every reminder: jobs sit in a heap keyed on their next
+# fire time and are persisted in the medication database, so they survive restarts.
+# The dispatcher is built by the registry and started with the application.
+def __getattr__(name: str):
+    if name == "SCHEDULER":
+        return get_scheduler()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # --- 4. Ambient Agent's Tool (Called by Orchestrator/Setup) ---
 # @tool
-def commit_schedule_and_queue_task(schedule_id: str, patient_id: str, time_str: str) -> str:
+def commit_schedule_and_queue_task(schedule_id: str, patient_id: str, time_str: str,
+                                   duration_days: int = None, priority: str = "routine") -> str:
     """
-    Creates a new, scheduled job in the in-memory APScheduler.
-    The job will call 'ambient_agent_trigger_action' at the specified time.
-    Time format must be HH:MM (e.g., '09:00').
+    Registers a daily recurring reminder with the dispatcher.
+    The reminder will call 'ambient_agent_trigger_batch' at each of the specified times.
+    Time format is HH:MM (e.g., '09:00'), '8 AM' or a slot such as 'morning'; several
+    times are comma-separated ('08:00,20:00').
     """
-    try:
-        hour, minute = map(int, time_str.split(':'))
-
-        # Add a test schedule that runs once, 5 seconds from now, for easy demonstration
-        run_date = datetime.now() + timedelta(seconds=5)
+    next_fire_at = compute_next_due(time_str)
+    if next_fire_at is None:
+        return f"COMMIT_FAILURE: Invalid time format '{time_str}'."
 
-        SCHEDULER.add_job(
-            ambient_agent_trigger_action,
-            'date',  # Use 'date' for one-off/immediate testing
-            run_date=run_date,
-            id=schedule_id,
-            name=f"Med Reminder for {patient_id}",
-            args=[schedule_id, patient_id]
-        )
+    end_at = None
+    if duration_days:
+        # Every dose of the last day, not just the one at the first time of day
+        last_day = datetime.fromtimestamp(next_fire_at).date() + timedelta(days=duration_days - 1)
+        end_at = datetime.combine(last_day, dt_time.max).timestamp()
+    get_scheduler().add(ReminderJob(
+        schedule_id=schedule_id,
+        patient_id=patient_id,
+        time_of_day=time_str,
+        next_fire_at=next_fire_at,
+        end_at=end_at,
+        priority=priority,
+    ))
 
-        return (
-            f"COMMIT_SUCCESS: Schedule {schedule_id} saved. "
-            f"Set to trigger at: {run_date.strftime('%H:%M:%S')} (5 seconds from now for demo)."
-        )
-    except ValueError as e:
-        return f"COMMIT_FAILURE: Invalid time format '{time_str}'. Error: {e}"
\ No newline at end of file
+    return (
+        f"COMMIT_SUCCESS: Schedule {schedule_id} saved. "
+        f"Set to trigger at: {datetime.fromtimestamp(next_fire_at).strftime('%Y-%m-%d %H:%M')}."
+    )
\ No newline at end of file
@@ -17,6 +17,7 @@ from ..prompts import (
     WRITE_FILE_DESCRIPTION,
 )
 from ..states.state import DeepAgentState
+from ..states.vfs import encode_content, invalidate_line_index, line_index, quota_error
 
 
 @tool(description=LS_DESCRIPTION)
@@ -37,11 +38,12 @@ def read_file(
     if file_path not in files:
         return f"Error: File '{file_path}' not found"
 
-    content = files[file_path]
-    if not content:
+    stored = files[file_path]
+    if not stored:
         return "System reminder: File exists but has empty contents"
 
-    lines = content.splitlines()
+    # Cached per file version, so paging through a large file never re-splits it
+    lines = line_index(stored)
     start_idx = offset
     end_idx = min(start_idx + limit, len(lines))
 
@@ -50,7 +52,7 @@ def read_file(
 
     result_lines = []
     for i in range(start_idx, end_idx):
-        line_content = lines[i][:2000]  # Truncate long lines
+        line_content = lines.line(i, 2000)  # Truncate long lines
         result_lines.append(f"{i + 1:6d}\t{line_content}")
 
     return "\n".join(result_lines)
@@ -66,10 +68,15 @@ def write_file(
     """Write content to a file in the virtual filesystem.
     """
     files = state.get("files", {})
-    files[file_path] = content
+    stored = encode_content(content)
+    error = quota_error(files, file_path, stored)
+    if error:
+        return Command(update={"messages": [ToolMessage(error, tool_call_id=tool_call_id)]})
+    # Emit only the changed path; file_reducer merges it into the session's files
+    invalidate_line_index(files.get(file_path))
     return Command(
         update={
-            "files": files,
+            "files": {file_path: stored},
             "messages": [
                 ToolMessage(f"Updated file {file_path}", tool_call_id=tool_call_id)
             ],
@@ -0,0 +1,159 @@
+"""Central size policy for tool results.
+
+Every tool result passes through ``ToolOutputPolicyMiddleware`` before it
+reaches the model's context. Results within their tool's limit pass
+through unchanged. Larger ones are written to the virtual filesystem and
+replaced by a short reference the agent can ``read_file`` on demand.
+Tools that page through data themselves, such as ``read_file``, are
+truncated instead, so a read can never produce another file.
+"""
+
+import logging
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ToolCallRequest
+from langchain_core.messages import ToolMessage
+from langgraph.types import Command
+
+from ..metrics import counter
+from ..states.vfs import encode_content
+
+logger = logging.getLogger(__name__)
+
+TOOL_OUTPUTS = counter(
+    "ava_tool_output_policy_total", "Tool results that exceeded their size limit, by tool and action.", ["tool", "action"]
+)
+
+OFFLOAD_DIR = "/tool_outputs"
+PREVIEW_CHARS = 300
+# Rough chars-per-token ratio for budgeting without a tokenizer on the hot path.
+CHARS_PER_TOKEN = 4
+
+
+class ToolOutputLimit(NamedTuple):
+    """Size budget for one tool's result; the stricter of the two limits applies."""
+    max_bytes: int
+    max_tokens: int
+    action: str = "offload"  # "offload" to the VFS or "truncate" in place
+
+    @property
+    def max_chars(self) -> int:
+        return min(self.max_bytes, self.max_tokens * CHARS_PER_TOKEN)
+
+
+DEFAULT_LIMIT = ToolOutputLimit(
+    max_bytes=int(os.getenv("AVA_TOOL_OUTPUT_MAX_BYTES", "8192")),
+    max_tokens=int(os.getenv("AVA_TOOL_OUTPUT_MAX_TOKENS", "2000")),
+)
+
+TOOL_OUTPUT_LIMITS: Dict[str, ToolOutputLimit] = {
+    # Already paginated by offset/limit; offloading a page would only create another file to page through
+    "read_file": ToolOutputLimit(max_bytes=64 * 1024, max_tokens=16000, action="truncate"),
+    # Status strings; anything long here is a bug, keep it out of the context
+    "persist_in_db": ToolOutputLimit(max_bytes=1024, max_tokens=256),
+    "process_reminder_call": ToolOutputLimit(max_bytes=1024, max_tokens=256),
+    # Sub-agent answers may legitimately be longer
+    "task": ToolOutputLimit(max_bytes=16 * 1024, max_tokens=4000),
+    "task_batch": ToolOutputLimit(max_bytes=32 * 1024, max_tokens=8000),
+}
+
+
+def limit_for(tool_name: str, limits: Optional[Dict[str, ToolOutputLimit]] = None) -> ToolOutputLimit:
+    if limits and tool_name in limits:
+        return limits[tool_name]
+    return TOOL_OUTPUT_LIMITS.get(tool_name, DEFAULT_LIMIT)
+
+
+def _oversized(content: Any, limit: ToolOutputLimit) -> bool:
+    # Compare characters first; only encode when the text is near the byte limit
+    if not isinstance(content, str):
+        return False
+    if len(content) > limit.max_chars:
+        return True
+    return len(content) * 4 > limit.max_bytes and len(content.encode("utf-8")) > limit.max_bytes
+
+
+def _offload_path(tool_name: str, tool_call_id: str) -> str:
+    return f"{OFFLOAD_DIR}/{tool_name}-{re.sub(r'[^A-Za-z0-9_-]', '_', tool_call_id or 'call')}.txt"
+
+
+def apply_limit(message: ToolMessage, tool_name: str, limit: ToolOutputLimit) -> Tuple[ToolMessage, Dict[str, Any]]:
+    """The message to show the model, plus any files to write. Oversized results are offloaded or truncated."""
+    content = message.content
+    if not _oversized(content, limit):
+        return message, {}
+
+    tokens = len(content) // CHARS_PER_TOKEN
+    if limit.action == "truncate":
+        TOOL_OUTPUTS.inc(tool=tool_name, action="truncate")
+        kept = content[:limit.max_chars]
+        note = f"\n\n[TRUNCATED: {len(content)} chars (~{tokens} tokens); request a smaller range with offset/limit.]"
+        return message.model_copy(update={"content": kept + note}), {}
+
+    TOOL_OUTPUTS.inc(tool=tool_name, action="offload")
+    path = _offload_path(tool_name, message.tool_call_id)
+    reference = (
+        f"TOOL_OUTPUT_OFFLOADED: {tool_name} returned {len(content)} chars (~{tokens} tokens), saved to {path}. "
+        f"Use read_file('{path}', offset, limit) if you need the details.\n"
+        f"Preview: {content[:PREVIEW_CHARS]}"
+    )
+    logger.debug("Offloaded %s result (%d chars) to %s.", tool_name, len(content), path)
+    return message.model_copy(update={"content": reference}), {path: encode_content(content)}
+
+
+def enforce_tool_output_policy(
+        result: Any, tool_name: str, limits: Optional[Dict[str, ToolOutputLimit]] = None
+) -> Any:
+    """Apply the tool's limit to a ToolMessage result or to the ToolMessages inside a Command update."""
+    limit = limit_for(tool_name, limits)
+    if isinstance(result, ToolMessage):
+        message, files = apply_limit(result, tool_name, limit)
+        if not files:
+            return message
+        return Command(update={"files": files, "messages": [message]})
+
+    if isinstance(result, Command) and isinstance(result.update, dict) and result.update.get("messages"):
+        files: Dict[str, Any] = {}
+        messages: List[Any] = []
+        for message in result.update["messages"]:
+            if isinstance(message, ToolMessage):
+                message, offloaded = apply_limit(message, tool_name, limit)
+                files.update(offloaded)
+            messages.append(message)
+        if not files and all(a is b for a, b in zip(messages, result.update["messages"])):
+            return result
+        update = {**result.update, "messages": messages}
+        if files:
+            update["files"] = {**(result.update.get("files") or {}), **files}
+        return Command(graph=result.graph, update=update, resume=result.resume, goto=result.goto)
+
+    return result
+
+
+class ToolOutputPolicyMiddleware(AgentMiddleware):
+    """Keeps every tool result within its size limit (see ``TOOL_OUTPUT_LIMITS``)."""
+
+    def __init__(self, limits: Optional[Dict[str, ToolOutputLimit]] = None):
+        """``limits`` overrides ``TOOL_OUTPUT_LIMITS`` for the tools it names."""
+        super().__init__()
+        self.limits = limits
+
+    def _enforce(self, result: Any, request: ToolCallRequest) -> Any:
+        return enforce_tool_output_policy(result, request.tool_call["name"], self.limits)
+
+    def wrap_tool_call(
+            self,
+            request: ToolCallRequest,
+            handler: Callable[[ToolCallRequest], Any],
+    ) -> Any:
+        return self._enforce(handler(request), request)
+
+    async def awrap_tool_call(
+            self,
+            request: ToolCallRequest,
+            handler: Callable[[ToolCallRequest], Awaitable[Any]],
+    ) -> Any:
+        return self._enforce(await handler(request), request)
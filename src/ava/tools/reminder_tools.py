@@ -1,7 +1,47 @@
+import asyncio
+import os
+import threading
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable, List, Tuple
 from langchain_core.tools import tool
-from ..dao.db import MEDICATION_DB
+from ..dao.db import get_medication_repository
+from ..metrics import counter, histogram
+from ..runtime.dialer import AgoraDialer
+
+LOOKUP_LATENCY = histogram(
+    "ava_schedule_lookup_seconds", "Latency of one batched medication schedule lookup."
+)
+LOOKUP_BATCH_SIZE = histogram(
+    "ava_schedule_lookup_batch_size", "Number of schedule ids resolved per lookup.",
+    buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+LOOKUP_MISSES = counter("ava_schedule_lookup_misses_total", "Schedule ids not found in the database.")
+REMINDER_DISPATCH = counter(
+    "ava_reminder_dispatch_total", "Scheduled reminders by execution path (fast or llm).", ["path"]
+)
+
+# Fields a schedule needs before a reminder can be placed without the LLM.
+REQUIRED_REMINDER_FIELDS = ("patient_id", "medication", "phone_number")
+
+
+def fetch_medication_data_many(schedule_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetches the medication schedule data for many schedule ids in one round trip.
+    Ids that do not exist are simply absent from the returned mapping.
+    """
+    ids = list(schedule_ids)
+    started = time.perf_counter()
+    found = get_medication_repository().get_many(ids)
+    LOOKUP_LATENCY.observe(time.perf_counter() - started)
+    LOOKUP_BATCH_SIZE.observe(len(ids))
+    if len(found) < len(ids):
+        LOOKUP_MISSES.inc(len(set(ids) - set(found)))
+    return found
+
+
+async def afetch_medication_data_many(schedule_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Async variant of ``fetch_medication_data_many`` that keeps the event loop free."""
+    return await asyncio.to_thread(fetch_medication_data_many, list(schedule_ids))
 
 
 def fetch_medication_data(schedule_id: str) -> Optional[Dict[str, Any]]:
@@ -9,36 +49,67 @@ def fetch_medication_data(schedule_id: str) -> Optional[Dict[str, Any]]:
     Fetches specific medication schedule data from the database.
     This is the first step of the Sub-Agent's task.
     """
-    print(f"[SubAgent:Data] Attempting to fetch data for schedule_id: {schedule_id}")
-    time.sleep(0.1)  # Simulate network delay
+    return fetch_medication_data_many([schedule_id]).get(schedule_id)
 
-    data = MEDICATION_DB.get(schedule_id)
-    if data:
-        print(f"[SubAgent:Data] SUCCESS. Found medication: {data['medication']}")
-    else:
-        print(f"[SubAgent:Data] ERROR. Schedule ID {schedule_id} not found.")
-    return data
 
+_DIALER: Optional[AgoraDialer] = None
+_DIALER_LOCK = threading.Lock()
 
-def publish_reminder_via_agora(medication_data: Dict[str, Any]) -> str:
+
+def get_agora_dialer() -> Optional[AgoraDialer]:
     """
-    Simulates initiating an outbound call/reminder via Agora AI.
-    This is the final action of the Sub-Agent's task.
+    Process-wide outbound dialer, or None while ``AGORA_CALL_URL`` is unset (calls are simulated).
+    Quota and retry behaviour come from ``AGORA_RATE_PER_S``, ``AGORA_BURST``,
+    ``AGORA_MAX_CONCURRENCY`` and ``AGORA_MAX_RETRIES``.
     """
-    if not medication_data:
-        return "AGORA_FAILED: Cannot publish reminder, no medication data provided."
+    global _DIALER
+    if _DIALER is None and os.getenv("AGORA_CALL_URL"):
+        with _DIALER_LOCK:
+            if _DIALER is None:
+                _DIALER = AgoraDialer(
+                    os.environ["AGORA_CALL_URL"],
+                    api_key=os.getenv("AGORA_API_KEY"),
+                    rate=float(os.getenv("AGORA_RATE_PER_S", "50")),
+                    burst=int(os.getenv("AGORA_BURST", "50")),
+                    max_concurrency=int(os.getenv("AGORA_MAX_CONCURRENCY", "64")),
+                    max_retries=int(os.getenv("AGORA_MAX_RETRIES", "3")),
+                )
+    return _DIALER
 
-    patient_id = medication_data['patient_id']
-    med = medication_data['medication']
-    phone = medication_data['phone_number']
 
-    # Construct the personalized AI script/prompt
-    message = (
-        f"Hello {patient_id}. This is your Adherence Voice Agent. "
-        f"It is time for your {med}. Please take it now. "
+def close_agora_dialer() -> None:
+    """Release the dialer's connection pool (called on application shutdown)."""
+    global _DIALER
+    with _DIALER_LOCK:
+        dialer, _DIALER = _DIALER, None
+    if dialer is not None:
+        dialer.close()
+
+
+def _reminder_script(medication_data: Dict[str, Any]) -> str:
+    """Personalized AI script for the reminder call."""
+    return (
+        f"Hello {medication_data['patient_id']}. This is your Adherence Voice Agent. "
+        f"It is time for your {medication_data['medication']}. Please take it now. "
         f"Press 1 to confirm you have taken it."
     )
 
+
+def _agora_call_payload(medication_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "schedule_id": medication_data.get("schedule_id"),
+        "patient_id": medication_data["patient_id"],
+        "to": medication_data["phone_number"],
+        "script": _reminder_script(medication_data),
+    }
+
+
+def _simulate_agora_call(medication_data: Dict[str, Any]) -> str:
+    patient_id = medication_data.get('patient_id')
+    med = medication_data.get('medication')
+    phone = medication_data.get('phone_number')
+    message = _reminder_script(medication_data)
+
     print("=" * 60)
     print(f"[SubAgent:Agora] INITIATING CALL to {phone} for {patient_id}")
     print(f"[SubAgent:Agora] AI Script: {message[:120]}...")
@@ -47,6 +118,38 @@ def publish_reminder_via_agora(medication_data: Dict[str, Any]) -> str:
     return f"AGORA_SUCCESS: Call initiated for {med} to {phone}."
 
 
+def publish_reminders_via_agora(records: List[Dict[str, Any]]) -> List[str]:
+    """
+    Initiates the outbound reminder calls for many schedules at once.
+    With a configured dialer the calls go out concurrently within the provider quota;
+    otherwise each call is simulated. Returns one status string per record, in order.
+    """
+    dialer = get_agora_dialer()
+    if dialer is None:
+        return [_simulate_agora_call(data) for data in records]
+
+    results, _ = dialer.dial_batch_sync(
+        [(data.get("schedule_id") or data["patient_id"], _agora_call_payload(data)) for data in records]
+    )
+    statuses = []
+    for data, result in zip(records, results):
+        if result.ok:
+            statuses.append(f"AGORA_SUCCESS: Call initiated for {data['medication']} to {data['phone_number']}.")
+        else:
+            statuses.append(f"AGORA_FAILED: Call to {data['phone_number']} failed after {result.attempts} attempts ({result.error}).")
+    return statuses
+
+
+def publish_reminder_via_agora(medication_data: Dict[str, Any]) -> str:
+    """
+    Initiates an outbound call/reminder via Agora AI.
+    This is the final action of the Sub-Agent's task.
+    """
+    if not medication_data:
+        return "AGORA_FAILED: Cannot publish reminder, no medication data provided."
+    return publish_reminders_via_agora([medication_data])[0]
+
+
 # --- 3. Sub-Agent Task Group (The single tool the Orchestrator calls) ---
 @tool
 def process_reminder_call(schedule_id: str, patient_id: str) -> str:
@@ -59,10 +162,74 @@ def process_reminder_call(schedule_id: str, patient_id: str) -> str:
     # Step 1: Use internal tool to fetch required data
     data = fetch_medication_data(schedule_id)
 
-    if not data:
-        return f"DELEGATION_FAILURE: Could not process {schedule_id} due to missing data."
+    # The LLM path is taken exactly for incomplete schedules, so check before dialing
+    problem = reminder_data_problem(data, patient_id)
+    if problem:
+        return f"DELEGATION_FAILURE: Could not process {schedule_id}: {problem}."
 
     # Step 2: Use internal tool to publish the reminder
     result = publish_reminder_via_agora(data)
 
-    return f"DELEGATION_COMPLETE: {result}"
\ No newline at end of file
+    return f"DELEGATION_COMPLETE: {result}"
+
+
+def reminder_data_problem(data: Optional[Dict[str, Any]], patient_id: Optional[str]) -> Optional[str]:
+    """
+    Explains why a schedule cannot be reminded deterministically, or returns None if it can.
+    Missing records, missing fields and a patient mismatch all need the LLM's judgement.
+    """
+    if not data:
+        return "schedule not found"
+    missing = [field for field in REQUIRED_REMINDER_FIELDS if not data.get(field)]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    if patient_id and data["patient_id"] != patient_id:
+        return f"patient mismatch ({data['patient_id']} != {patient_id})"
+    return None
+
+
+def _split_dispatchable(
+        events: List[Dict[str, Any]], found: Dict[str, Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+    """Records ready to dial, and the (event, reason) pairs that need the LLM."""
+    ready = []
+    needs_llm: List[Tuple[Dict[str, Any], str]] = []
+    for event in events:
+        data = found.get(event["schedule_id"])
+        problem = reminder_data_problem(data, event.get("patient_id"))
+        if problem:
+            needs_llm.append((event, problem))
+        else:
+            ready.append(data)
+    return ready, needs_llm
+
+
+def _dispatched(ready: List[Dict[str, Any]], statuses: List[str]) -> Dict[str, str]:
+    REMINDER_DISPATCH.inc(len(ready), path="fast")
+    return {data["schedule_id"]: f"DELEGATION_COMPLETE: {status}" for data, status in zip(ready, statuses)}
+
+
+def dispatch_reminder_events(
+        events: List[Dict[str, Any]]
+) -> Tuple[Dict[str, str], List[Tuple[Dict[str, Any], str]]]:
+    """
+    Deterministic fast path for SCHEDULED_REMINDER_TRIGGER events: one batched lookup,
+    then one batched publish_reminders_via_agora, with no model in the loop.
+
+    Returns the outcome per schedule id for dispatched reminders, and the
+    (event, reason) pairs that need the LLM.
+    """
+    found = fetch_medication_data_many(event["schedule_id"] for event in events)
+    ready, needs_llm = _split_dispatchable(events, found)
+    return _dispatched(ready, publish_reminders_via_agora(ready)), needs_llm
+
+
+async def adispatch_reminder_events(
+        events: List[Dict[str, Any]]
+) -> Tuple[Dict[str, str], List[Tuple[Dict[str, Any], str]]]:
+    """Async variant of ``dispatch_reminder_events`` for event-loop workers; the lookup and
+    the dialing run off the loop."""
+    found = await afetch_medication_data_many(event["schedule_id"] for event in events)
+    ready, needs_llm = _split_dispatchable(events, found)
+    statuses = await asyncio.to_thread(publish_reminders_via_agora, ready) if ready else []
+    return _dispatched(ready, statuses), needs_llm
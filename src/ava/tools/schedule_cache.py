@@ -0,0 +1,79 @@
+"""Memoized structured schedule parses.
+
+Callers repeat the same prescription phrasing, so validated MedicationSchedule
+objects are cached under a normalized form of the utterance. The prompt date
+is part of the key because relative phrasing resolves against it.
+"""
+
+import os
+import re
+from typing import Optional
+
+from ..prompts import ORCHESTRATOR_PROMPT_DATE
+from ..runtime.cache import LRUTTLCache
+from ..states.state import MedicationSchedule
+
+_NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "fourteen": "14",
+    "fifteen": "15", "twenty": "20", "thirty": "30",
+}
+_UNIT_ALIASES = {"milligram": "mg", "milligrams": "mg", "microgram": "mcg", "micrograms": "mcg", "gram": "g", "grams": "g"}
+
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_TRAILING_ZEROS = re.compile(r"\b(\d+)\.0+\b")
+_NUMBER_WORD = re.compile(r"\b(" + "|".join(_NUMBER_WORDS) + r")\b")
+_UNIT = re.compile(r"\b(\d+(?:\.\d+)?)\s*(mg|mcg|g|ml|" + "|".join(_UNIT_ALIASES) + r")\b")
+_CLOCK = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?\s*m\b\.?|\b(\d{1,2}):(\d{2})\b")
+_PUNCTUATION = re.compile(r"[^\w\s:,.]|(?<!\d)[.,]|[.,](?!\d)")
+
+
+def _clock(match: re.Match) -> str:
+    if match.group(4) is not None:
+        hour, minute = int(match.group(4)), int(match.group(5))
+    else:
+        hour, minute = int(match.group(1)) % 12, int(match.group(2) or 0)
+        if match.group(3) == "p":
+            hour += 12
+    return f"{hour:02d}:{minute:02d}" if hour < 24 and minute < 60 else match.group(0)
+
+
+def normalize_utterance(text: str) -> str:
+    """Canonical form of a prescription utterance: case, whitespace, number, unit and clock formats."""
+    text = text.lower()
+    text = _THOUSANDS.sub("", text)
+    text = _TRAILING_ZEROS.sub(r"\1", text)
+    text = _NUMBER_WORD.sub(lambda m: _NUMBER_WORDS[m.group(1)], text)
+    text = _UNIT.sub(lambda m: f"{m.group(1)}{_UNIT_ALIASES.get(m.group(2), m.group(2))}", text)
+    text = _CLOCK.sub(_clock, text)
+    text = _PUNCTUATION.sub(" ", text)
+    return " ".join(text.split())
+
+
+_CACHE: Optional[LRUTTLCache] = None
+
+
+def get_schedule_cache() -> LRUTTLCache:
+    """Process-wide parse cache (``AVA_PARSE_CACHE_SIZE``, ``AVA_PARSE_CACHE_TTL_S``, ``AVA_PARSE_CACHE_DB``)."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = LRUTTLCache(
+            "schedule_parse",
+            max_entries=int(os.getenv("AVA_PARSE_CACHE_SIZE", "4096")),
+            ttl_seconds=float(os.getenv("AVA_PARSE_CACHE_TTL_S", "86400")) or None,
+            disk_path=os.getenv("AVA_PARSE_CACHE_DB") or None,
+        )
+    return _CACHE
+
+
+def _key(user_query: str) -> str:
+    return f"{ORCHESTRATOR_PROMPT_DATE}|{normalize_utterance(user_query)}"
+
+
+def get_cached_schedule(user_query: str) -> Optional[MedicationSchedule]:
+    data = get_schedule_cache().get(_key(user_query))
+    return MedicationSchedule.model_validate(data) if data is not None else None
+
+
+def cache_schedule(user_query: str, schedule: MedicationSchedule) -> None:
+    get_schedule_cache().set(_key(user_query), schedule.model_dump())
@@ -0,0 +1,223 @@
+"""Rule-based extractor for formulaic medication instructions.
+
+Handles phrasings such as "500 mg metformin twice a day at 8am and 8pm for 10 days"
+without a model call. The extractor only answers when every required
+MedicationSchedule field is found exactly once and the pieces agree with each
+other, and every word belongs to that grammar. Anything else (several doses,
+conditional intake, start dates, weekdays, unknown words) returns None so the
+caller falls back to the LLM.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..dao.db import TIME_SLOTS, parse_clock_time
+from ..metrics import counter
+from ..states.state import MedicationSchedule
+
+SCHEDULE_PARSES = counter(
+    "ava_schedule_parse_total", "Schedule parses by path (rules, cache or llm fallback).", ["path"]
+)
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twelve": 12, "fourteen": 14, "thirty": 30,
+}
+_NUMBER = r"(\d+|" + "|".join(_NUMBER_WORDS) + r")"
+
+# Milligrams per unit; micrograms must convert to a whole number of milligrams.
+_DOSE_UNITS = {"mg": 1, "milligram": 1, "milligrams": 1, "g": 1000, "gram": 1000, "grams": 1000,
+               "mcg": 0.001, "microgram": 0.001, "micrograms": 0.001}
+_DOSE = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(mg|milligrams?|mcg|micrograms?|g|grams?)\b", re.IGNORECASE
+)
+
+_TIMES_PER = {"once": 1, "twice": 2, "thrice": 3}
+_FREQUENCY = re.compile(
+    r"\b(?:(once|twice|thrice)|" + _NUMBER + r"\s*(?:times|x))\s*"
+    r"(?:(?:a|an|per|every|each)\s+(day|week|month)|(daily|weekly|monthly))\b",
+    re.IGNORECASE,
+)
+_FREQUENCY_WORDS = {
+    "daily": (1, "day"), "every day": (1, "day"), "each day": (1, "day"), "nightly": (1, "day"),
+    "weekly": (1, "week"), "every week": (1, "week"), "monthly": (1, "month"), "every month": (1, "month"),
+    "qd": (1, "day"), "od": (1, "day"), "bid": (2, "day"), "tid": (3, "day"), "qid": (4, "day"),
+}
+_FREQUENCY_WORD = re.compile(r"\b(" + "|".join(sorted(_FREQUENCY_WORDS, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+
+_CLOCK_TIME = re.compile(r"\b(\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?)(?![\d:])", re.IGNORECASE)
+_AT_CLOCK = re.compile(
+    r"\bat\s+(\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?(?:\s*(?:,|and|&)\s*\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?)*)",
+    re.IGNORECASE,
+)
+_SLOT = re.compile(
+    r"\b(?:in the|at|every|each|before|after)?\s*(morning|noon|afternoon|evening|night|bedtime)s?\b", re.IGNORECASE
+)
+
+_DURATION = re.compile(r"\bfor\s+(?:the\s+next\s+)?" + _NUMBER + r"\s*(day|week|month)s?\b", re.IGNORECASE)
+_DURATION_DAYS = {"day": 1, "week": 7, "month": 30}
+# Any "<n> days/weeks/months" span; each must belong to a clean duration phrase
+_SPAN = re.compile(r"\b" + _NUMBER + r"\s*(?:days|weeks|months)\b", re.IGNORECASE)
+
+# Intake that depends on a condition, alternates, or starts, ends or repeats on
+# particular dates needs judgement. Checked with clean durations removed, so
+# "for the next 10 days" stays on the rules path.
+_AMBIGUOUS = re.compile(
+    r"\b(as needed|when needed|if|unless|except|prn|every other|alternate|alternating|or|instead|then|"
+    r"half|quarter|increase|decrease|taper|stop|skip|only|just|today|tonight|tomorrow|yesterday|"
+    r"next|last|starting|start|from|until|till|through|beginning|after|before|"
+    r"(?:mon|tues|wednes|thurs|fri|satur|sun)days?|weekdays?|weekends?)\b|\?",
+    re.IGNORECASE,
+)
+
+# Words that can sit next to the dose without being the medication name.
+_FILLER = {
+    "take", "takes", "taking", "give", "of", "the", "a", "an", "my", "tablet", "tablets", "tab", "tabs",
+    "pill", "pills", "capsule", "capsules", "cap", "caps", "dose", "doses", "oral", "orally", "by", "mouth",
+    "remind", "me", "to", "please", "i", "need", "should", "must", "have", "patient", "needs", "and", "with",
+    "at", "for", "in", "on", "daily", "once", "twice", "thrice", "times", "day", "week", "month", "every",
+    "each", "per", "morning", "evening", "night", "noon", "afternoon", "bedtime", "am", "pm",
+    *_NUMBER_WORDS, *_FREQUENCY_WORDS, "weekly", "monthly",
+}
+# Everything else the grammar reads once the dose, frequency, clock times and durations are
+# removed. Counts are not: a leftover "two" or "2" ("2 tablets", "2 times") changes the
+# schedule in a way the rules cannot read, so it sends the text to the LLM.
+_GRAMMAR = (_FILLER - set(_NUMBER_WORDS)) | {"a", "an"} | {
+    "mornings", "evenings", "nights", "afternoons", "x", "nightly",
+    *(word for phrase in _FREQUENCY_WORDS for word in phrase.split()),
+}
+_WORD = re.compile(r"[A-Za-z][A-Za-z\-]*")
+
+
+def _number(value: str) -> int:
+    return int(value) if value.isdigit() else _NUMBER_WORDS[value.lower()]
+
+
+def _dose_mg(text: str) -> Optional[Tuple[int, re.Match]]:
+    doses = list(_DOSE.finditer(text))
+    if len(doses) != 1:
+        return None
+    amount = float(doses[0].group(1)) * _DOSE_UNITS[doses[0].group(2).lower()]
+    if amount <= 0 or abs(amount - round(amount)) > 1e-9:
+        return None
+    return int(round(amount)), doses[0]
+
+
+def _medication_name(text: str, dose: re.Match) -> Optional[str]:
+    """The word right after the dose ("500mg metformin") or right before it ("metformin 500mg")."""
+    after = _WORD.findall(text[dose.end():])
+    if after and after[0].lower() == "of":
+        after = after[1:]
+    before = _WORD.findall(text[:dose.start()])
+    candidates = {
+        word for word in (after[0] if after else None, before[-1] if before else None)
+        if word and word.lower() not in _FILLER
+    }
+    if len(candidates) != 1:
+        return None
+    name = candidates.pop()
+    # A short neighbour ("vitamin D") means a multi-word name the rules cannot delimit
+    return name.capitalize() if len(name) >= 3 else None
+
+
+def _frequency(text: str) -> Optional[Tuple[int, str]]:
+    """(count, unit) when the text states exactly one frequency, None when it states none or several."""
+    found = set()
+    for m in _FREQUENCY.finditer(text):
+        count = _TIMES_PER[m.group(1).lower()] if m.group(1) else _number(m.group(2))
+        unit = (m.group(3) or _FREQUENCY_WORDS[m.group(4).lower()][1]).lower()
+        found.add((count, unit))
+    for m in _FREQUENCY_WORD.finditer(_FREQUENCY.sub(" ", text)):
+        found.add(_FREQUENCY_WORDS[m.group(1).lower()])
+    return found.pop() if len(found) == 1 else None
+
+
+def _times_of_day(text: str) -> Optional[List[str]]:
+    times: List[str] = []
+    for group in _AT_CLOCK.finditer(text):
+        for raw in _CLOCK_TIME.findall(group.group(1)):
+            parsed = parse_clock_time(raw)
+            if parsed is None:
+                return None
+            times.append(f"{parsed[0]:02d}:{parsed[1]:02d}")
+    for slot in _SLOT.finditer(text):
+        times.append(TIME_SLOTS[slot.group(1).lower()])
+    return sorted(set(times))
+
+
+def _duration_days(text: str) -> Tuple[bool, Optional[int]]:
+    """(ok, days); a 'for ...' phrase that is not a clean duration is not ok."""
+    durations = list(_DURATION.finditer(text))
+    if len(durations) > 1 or len(_SPAN.findall(text)) > len(durations):
+        return False, None
+    if durations:
+        return True, _number(durations[0].group(1)) * _DURATION_DAYS[durations[0].group(2).lower()]
+    # "for" followed by anything but the medication context is a duration we could not read
+    if re.search(r"\bfor\s+(?:\d|the next|a |an |one|two|three|ten)", text, re.IGNORECASE):
+        return False, None
+    return True, None
+
+
+def _outside_grammar(text: str, dose: re.Match, name: str) -> bool:
+    """True when a number or word is not consumed by the dose, frequency, time or duration rules
+    and is neither the medication name nor grammar filler."""
+    rest = text[:dose.start()] + " " + text[dose.end():]
+    for rule in (_DURATION, _FREQUENCY, _AT_CLOCK):
+        rest = rule.sub(" ", rest)
+    if re.search(r"\d", rest):
+        return True
+    return any(word.lower() not in _GRAMMAR and word.lower() != name.lower() for word in _WORD.findall(rest))
+
+
+def parse_schedule_rules(user_query: str) -> Optional[MedicationSchedule]:
+    """Extract a MedicationSchedule from a formulaic instruction, or None when not confident.
+
+    The frequency and the times of day must agree: "twice a day at 8am" names one time for
+    two doses, and picking the second one is a guess, so it is left to the LLM.
+    """
+    text = " ".join(user_query.split())
+    if not text or _AMBIGUOUS.search(_DURATION.sub(" ", text)):
+        return None
+
+    dose = _dose_mg(text)
+    if dose is None:
+        return None
+    dosage_mg, dose_match = dose
+    name = _medication_name(text, dose_match)
+    times = _times_of_day(text)
+    ok, duration_days = _duration_days(text)
+    if not name or not times or not ok or _outside_grammar(text, dose_match, name):
+        return None
+
+    has_frequency = bool(_FREQUENCY.search(text) or _FREQUENCY_WORD.search(text))
+    frequency = _frequency(text)
+    if frequency is None and has_frequency:
+        return None
+    # Times alone imply a daily regimen with one intake per time
+    frequency = frequency or (len(times), "day")
+    count, unit = frequency
+    if unit == "day" and count != len(times):
+        return None
+    if unit != "day" and len(times) != 1:
+        return None
+
+    try:
+        return MedicationSchedule(
+            medication_name=name,
+            dosage_mg=dosage_mg,
+            frequency_count=count,
+            frequency_unit=unit,
+            time_of_day=",".join(times),
+            duration_days=duration_days,
+        )
+    except ValidationError:
+        return None
+
+
+def rule_parser_hit_rate() -> float:
+    """Share of schedule parses answered by the rules without a model call."""
+    hits = SCHEDULE_PARSES.value(path="rules")
+    total = hits + SCHEDULE_PARSES.value(path="cache") + SCHEDULE_PARSES.value(path="llm")
+    return hits / total if total else 0.0
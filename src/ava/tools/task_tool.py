@@ -1,19 +1,34 @@
-"""Task delegation tool"""
+"""Task delegation tools"""
 
-from typing import Annotated, NotRequired
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Annotated, Any, Callable, Dict, NotRequired, Optional, Sequence
 
 from langchain.agents import create_agent
+from langchain.agents.middleware import AgentMiddleware
 from langchain_core.language_models import BaseChatModel
 from typing_extensions import TypedDict
 
 from langchain_core.messages import ToolMessage
-from langchain_core.tools import BaseTool, InjectedToolCallId, tool
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langchain_core.tools import BaseTool, InjectedToolCallId, StructuredTool, tool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 
-from ..prompts import TASK_DESCRIPTION_PREFIX
+from ..metrics import counter, histogram
+from ..prompts import TASK_DESCRIPTION_PREFIX, TASK_BATCH_DESCRIPTION_PREFIX
 from ..states.state import DeepAgentState
 
+SUBAGENT_INVOCATIONS = counter(
+    "ava_subagent_invocations_total", "Sub-agent runs by sub-agent, delegation tool and outcome.", ["subagent", "via", "outcome"]
+)
+SUBAGENT_LATENCY = histogram("ava_subagent_seconds", "Wall time of one sub-agent run.", ["subagent", "via"])
+
+# Upper bound on sub-agents a single task_batch call runs at once.
+TASK_BATCH_MAX_WORKERS = int(os.getenv("AVA_TASK_BATCH_MAX_WORKERS", "8"))
+
 
 class SubAgent(TypedDict):
     """Configuration for a specialized sub-agent."""
@@ -21,13 +36,107 @@ class SubAgent(TypedDict):
     description: str
     prompt: str
     tools: NotRequired[list[str]]
+    model: NotRequired[str]  # tier ("fast", "strong") or model id; defaults to the parent's model
+    timeout: NotRequired[float]  # per-request timeout in seconds
+    max_tokens: NotRequired[int]  # output-token budget per model call
+
+
+class TaskRequest(TypedDict):
+    """One independent delegation inside a task_batch call."""
+    description: str
+    subagent_type: str
+
+
+def _isolated_state(state: Dict[str, Any], description: str) -> Dict[str, Any]:
+    """Fresh sub-agent input: the parent's files and todos, but only the task description as history.
+
+    The parent state is never modified; containers are copied so concurrent
+    sub-agents cannot see each other's changes.
+    """
+    isolated = {key: value for key, value in state.items() if key not in ("messages", "files", "todos")}
+    isolated["messages"] = [{"role": "user", "content": description}]
+    if state.get("files") is not None:
+        isolated["files"] = dict(state["files"])
+    if state.get("todos") is not None:
+        isolated["todos"] = list(state["todos"])
+    return isolated
 
 
-def _create_task_tool(tools, subagents: list[SubAgent], model: BaseChatModel, state_schema):
+def _changed_files(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Paths a sub-agent wrote or removed, so unchanged copies of parent files never overwrite a sibling's writes."""
+    before, after = before or {}, after or {}
+    changed: Dict[str, Any] = {path: content for path, content in after.items() if before.get(path) is not content}
+    changed.update({path: None for path in before if path not in after})
+    return changed
+
+
+def _batch_update(state, tasks: list, outcomes: list, tool_call_id: str) -> Command:
+    """One parent update for a ``task_batch``: every sub-agent's file changes plus one ToolMessage.
+
+    The raw deltas are combined in request order, so the result does not depend on which
+    sub-agent finished first, and a later write of a path wins. Deletions (``None``) are kept,
+    so the graph's ``file_reducer`` applies them exactly as it would for a single ``task``.
     """
-    Create a task delegation tool that enables context isolation through sub-agents.
+    files: Dict[str, Any] = {}
+    sections = []
+    for index, (request, outcome) in enumerate(zip(tasks, outcomes), start=1):
+        if isinstance(outcome, Exception):
+            text = f"Error: {outcome}"
+        else:
+            for path, content in _changed_files(state.get("files"), outcome.get("files")).items():
+                files.pop(path, None)
+                files[path] = content
+            text = outcome["messages"][-1].content
+        sections.append(f"[{index}] {request['subagent_type']}: {request['description']}\n{text}")
+    return Command(
+        update={
+            "files": files,
+            "messages": [ToolMessage("\n\n".join(sections), tool_call_id=tool_call_id)],
+        }
+    )
+
+
+@contextmanager
+def _measured(subagent: str, via: str):
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        SUBAGENT_INVOCATIONS.inc(subagent=subagent, via=via, outcome=outcome)
+        SUBAGENT_LATENCY.observe(time.perf_counter() - started, subagent=subagent, via=via)
+
+
+def _create_task_tool(
+        tools,
+        subagents: list[SubAgent],
+        model: BaseChatModel,
+        state_schema,
+        model_for: Optional[Callable[..., BaseChatModel]] = None,
+        middleware_for: Optional[Callable[[str], Sequence[AgentMiddleware]]] = None,
+):
+    """Create the single-task delegation tool (see ``_create_task_tools``)."""
+    return _create_task_tools(tools, subagents, model, state_schema, model_for=model_for, middleware_for=middleware_for)[0]
+
+
+def _create_task_tools(
+        tools,
+        subagents: list[SubAgent],
+        model: BaseChatModel,
+        state_schema,
+        model_for: Optional[Callable[..., BaseChatModel]] = None,
+        middleware_for: Optional[Callable[[str], Sequence[AgentMiddleware]]] = None,
+):
+    """
+    Create the task delegation tools that enable context isolation through sub-agents:
+    ``task`` runs one sub-agent, ``task_batch`` runs several independent ones concurrently.
     This function implements the core pattern for spawning specialized sub-agents with
     isolated contexts, preventing context clash and confusion in complex multistep tasks.
+
+    ``model_for(model, timeout=..., max_tokens=...)`` resolves a sub-agent's own model
+    settings; sub-agents that declare none use ``model``. ``middleware_for(name)`` returns the
+    middleware installed on each sub-agent (e.g. the tool-output policy and per-agent metrics).
     """
     # Create agent registry
     agents = {}
@@ -47,8 +156,14 @@ def _create_task_tool(tools, subagents: list[SubAgent], model: BaseChatModel, st
         else:
             # Default to all tools
             _tools = tools
+        # Sub-agents run with isolated, throwaway context, so they never inherit the
+        # parent's checkpointer (which would persist one namespace per delegation).
+        _model = model
+        if model_for is not None and any(key in _agent for key in ("model", "timeout", "max_tokens")):
+            _model = model_for(_agent.get("model"), timeout=_agent.get("timeout"), max_tokens=_agent.get("max_tokens"))
         agents[_agent["name"]] = create_agent(
-            model, system_prompt=_agent["prompt"], tools=_tools, state_schema=state_schema
+            _model, system_prompt=_agent["prompt"], tools=_tools, state_schema=state_schema, checkpointer=False,
+            middleware=middleware_for(_agent["name"]) if middleware_for is not None else (),
         )
 
     # Generate description of available sub-agents for the tool description
@@ -77,15 +192,14 @@ def _create_task_tool(tools, subagents: list[SubAgent], model: BaseChatModel, st
 
         # Create isolated context with only the task description
         # This is the key to context isolation - no parent history
-        state["messages"] = [{"role": "user", "content": description}]
-
         # Execute the sub-agent in isolation
-        result = sub_agent.invoke(state)
+        with _measured(subagent_type, "task"):
+            result = sub_agent.invoke(_isolated_state(state, description))
 
         # Return results to parent agent via Command state update
         return Command(
             update={
-                "files": result.get("files", {}),  # Merge any file changes
+                "files": _changed_files(state.get("files"), result.get("files")),  # Merge any file changes
                 "messages": [
                     # Sub-agent result becomes a ToolMessage in parent context
                     ToolMessage(
@@ -95,5 +209,60 @@ def _create_task_tool(tools, subagents: list[SubAgent], model: BaseChatModel, st
             }
         )
 
-    return task
+    def _unknown_agents(tasks: list[TaskRequest]) -> Optional[str]:
+        unknown = sorted({t["subagent_type"] for t in tasks if t["subagent_type"] not in agents})
+        if unknown:
+            return f"Error: invoked agent types {unknown}, the only allowed types are {[f'`{k}`' for k in agents]}"
+        return None
+
+    def _run_one(request: TaskRequest, state):
+        try:
+            with _measured(request["subagent_type"], "task_batch"):
+                return agents[request["subagent_type"]].invoke(_isolated_state(state, request["description"]))
+        except Exception as e:
+            return e
+
+    def task_batch(
+            tasks: list[TaskRequest],
+            state: Annotated[DeepAgentState, InjectedState],
+            tool_call_id: Annotated[str, InjectedToolCallId],
+    ):
+        error = _unknown_agents(tasks)
+        if error:
+            return error
+        with ContextThreadPoolExecutor(max_workers=max(1, min(len(tasks), TASK_BATCH_MAX_WORKERS))) as executor:
+            outcomes = list(executor.map(lambda request: _run_one(request, state), tasks))
+        return _batch_update(state, tasks, outcomes, tool_call_id)
+
+    async def atask_batch(
+            tasks: list[TaskRequest],
+            state: Annotated[DeepAgentState, InjectedState],
+            tool_call_id: Annotated[str, InjectedToolCallId],
+    ):
+        error = _unknown_agents(tasks)
+        if error:
+            return error
+        semaphore = asyncio.Semaphore(TASK_BATCH_MAX_WORKERS)
+
+        async def run(request: TaskRequest):
+            async with semaphore:
+                try:
+                    with _measured(request["subagent_type"], "task_batch"):
+                        return await agents[request["subagent_type"]].ainvoke(
+                            _isolated_state(state, request["description"])
+                        )
+                except Exception as e:
+                    return e
+
+        outcomes = await asyncio.gather(*(run(request) for request in tasks))
+        return _batch_update(state, tasks, outcomes, tool_call_id)
+
+    task_batch_tool = StructuredTool.from_function(
+        func=task_batch,
+        coroutine=atask_batch,
+        name="task_batch",
+        description=TASK_BATCH_DESCRIPTION_PREFIX.format(other_agents=other_agents_string),
+    )
+
+    return [task, task_batch_tool]
 
@@ -5,6 +5,7 @@ that enable agents to plan complex workflows and track progress through
 multi-step operations.
 """
 
+from collections import Counter
 from typing import List, Annotated
 
 from langchain_core.messages import ToolMessage
@@ -15,6 +16,14 @@ from ..prompts import WRITE_TODOS_DESCRIPTION
 from ..states.state import Todo, DeepAgentState
 
 
+def _todo_summary(todos: List[Todo]) -> str:
+    counts = Counter(todo.get("status", "pending") for todo in todos)
+    current = next((todo["content"] for todo in todos if todo.get("status") == "in_progress"), None)
+    summary = (f"Updated todo list: {len(todos)} items ({counts['completed']} completed, "
+               f"{counts['in_progress']} in progress, {counts['pending']} pending).")
+    return f"{summary} Current: {current}" if current else summary
+
+
 @tool(description=WRITE_TODOS_DESCRIPTION)
 def write_todo(
         todos: List[Todo],
@@ -46,7 +55,8 @@ def write_todo(
         update={
             'todos': todos,
             'messages': [
-                ToolMessage(f"Updated todo list to {todos}", tool_call_id=tool_call_id)
+                # The list itself is already in the call args and in state; echo only the counts
+                ToolMessage(_todo_summary(todos), tool_call_id=tool_call_id)
             ]
         }
     )
@@ -1,18 +1,21 @@
-from datetime import datetime
-from typing import Dict
+import json
+import os
+from typing import Any, Dict, Optional
 
-from langchain.chat_models import init_chat_model
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.config import get_config
 from langgraph.types import interrupt
 from langchain_core.tools import tool
 from pydantic import ValidationError
 
-from src.ava.dao.db import MEDICATION_DB
-from src.ava.states.state import MedicationSchedule
-from src.ava.tools.ambient_tools import commit_schedule_and_queue_task
-import os
+from ..dao.db import get_medication_repository
+from ..registry import get_chat_model
+from ..states.state import MedicationSchedule
+from .ambient_tools import commit_schedule_and_queue_task
+from .schedule_cache import cache_schedule, get_cached_schedule
+from .schedule_rules import SCHEDULE_PARSES, parse_schedule_rules
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-flash-preview-09-2025", temperature=0.0, google_api_key=os.getenv("GOOGLE_API_KEY"))
+# Caller fields taken from the run's ``configurable`` (set per webhook turn) rather than from the model.
+CALLER_FIELDS = ("patient_id", "phone_number")
 
 @tool
 def think_tool(reflection: str) -> str:
@@ -42,14 +45,25 @@ def parse_and_validate_schedule(user_query: str) -> str:
     Parses a natural language medication instruction from the user query into a
     structured object and validates it against the MedicationSchedule schema.
     """
+    # Formulaic instructions are extracted locally; only the rest needs the LLM
+    data = parse_schedule_rules(user_query)
+    if data is not None:
+        SCHEDULE_PARSES.inc(path="rules")
+        return f"SUCCESS_PARSED_DATA: {data}"
+    data = get_cached_schedule(user_query)
+    if data is not None:
+        SCHEDULE_PARSES.inc(path="cache")
+        return f"SUCCESS_PARSED_DATA: {data}"
+
     try:
-        print(user_query)
-        # Assume LLM output is a dictionary derived from user_query
-        # The actual tool should contain the logic to call the LLM to get this dict
-        structured_model = model.with_structured_output(MedicationSchedule)
+        SCHEDULE_PARSES.inc(path="llm")
+        structured_model = get_chat_model(
+            os.getenv("AVA_PARSER_MODEL", "strong"), timeout=float(os.getenv("AVA_PARSER_TIMEOUT_S", "30"))
+        ).with_structured_output(MedicationSchedule)
 
         data = structured_model.invoke(user_query)
-        print(data)
+        if isinstance(data, MedicationSchedule):
+            cache_schedule(user_query, data)
         return f"SUCCESS_PARSED_DATA: {data}"
 
     except ValidationError as e:
@@ -76,9 +90,51 @@ def parse_and_validate_schedule(user_query: str) -> str:
 #     # After resume, 'user_decision' will be the user's input (e.g., "CONFIRMED")
 #     return "CONFIRMED"
 
+def _caller_context() -> Dict[str, Any]:
+    """Patient id and phone number the webhook put in the run's config, when there is one."""
+    try:
+        configurable = get_config().get("configurable", {})
+    except RuntimeError:
+        return {}
+    return {key: configurable[key] for key in CALLER_FIELDS if configurable.get(key)}
+
+
+def _to_schedule_record(data: Dict[str, Any], caller: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Map a parsed MedicationSchedule (or an already flat record) onto the DB columns.
+
+    The caller's identity comes from the turn (``caller``) over anything the model wrote; the
+    schedule id is always generated by the repository.
+    """
+    record = dict(data)
+    record.pop("schedule_id", None)
+    if "medication" not in record and "medication_name" in record:
+        dosage = record.get("dosage_mg")
+        record["medication"] = f"{record['medication_name']} {dosage}mg" if dosage else record["medication_name"]
+    record.update(caller or {})
+    # An explicit null from the model must not reach the NOT NULL column
+    record["patient_id"] = record.get("patient_id") or "UNKNOWN"
+    return record
+
+
 @tool
 def persist_in_db(data) -> str:
     """Tool to persist medication data into the database."""
-    MEDICATION_DB["SCH-03"] = data
-    commit_schedule_and_queue_task("SCH-03", "1", "")
-    return f"SUCCESS_PERSISTED: {MEDICATION_DB} & COMMITED TO QUEUE"
\ No newline at end of file
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return "PERSIST_ERROR: data must be a JSON object with the parsed schedule fields."
+    if not isinstance(data, dict) or not (data.get("medication") or data.get("medication_name")):
+        return "PERSIST_ERROR: data must include the medication name."
+
+    record = _to_schedule_record(data, _caller_context())
+    schedule_id = get_medication_repository().add(record)
+    committed = commit_schedule_and_queue_task(
+        schedule_id, record["patient_id"], record.get("time_of_day") or "", duration_days=record.get("duration_days")
+    )
+    # Compact summary: the id and status, never the stored record or the rest of the table
+    queue_status = "QUEUED" if committed.startswith("COMMIT_SUCCESS") else committed
+    return (
+        f"SUCCESS_PERSISTED: schedule_id={schedule_id} patient_id={record['patient_id']} "
+        f"medication={record['medication']} time={record.get('time_of_day') or '-'} queue={queue_status}"
+    )
\ No newline at end of file
@@ -0,0 +1,54 @@
+from ava.runtime.cache import LRUTTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = LRUTTLCache("test-lru", max_entries=2, ttl_seconds=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_the_ttl():
+    clock = _Clock()
+    cache = LRUTTLCache("test-ttl", ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    clock.now += 5
+    cache.set("b", 3)  # a rewrite restarts the entry's lifetime
+    clock.now += 6
+
+    assert cache.get("a", "missing") == "missing"
+    assert cache.get("b") == 3
+    assert cache.hit_rate == 0.5
+    clock.now += 10
+    assert cache.purge_expired() == 1
+    assert len(cache) == 0
+
+
+def test_disk_tier_survives_a_new_instance_and_honours_deletes(tmp_path):
+    clock, path = _Clock(), str(tmp_path / "cache.sqlite3")
+    first = LRUTTLCache("test-disk", ttl_seconds=10, disk_path=path, clock=clock)
+    first.set("kept", {"dose": 500})
+    first.set("deleted", [1, 2])
+    first.delete("deleted")
+
+    second = LRUTTLCache("test-disk", ttl_seconds=10, disk_path=path, clock=clock)
+    other = LRUTTLCache("other-namespace", disk_path=path, clock=clock)
+    assert second.get("kept") == {"dose": 500}
+    assert second.get("deleted") is None
+    assert other.get("kept") is None
+
+    clock.now += 11
+    assert LRUTTLCache("test-disk", disk_path=path, clock=clock).get("kept") is None
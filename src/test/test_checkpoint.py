@@ -0,0 +1,113 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+
+from ava.dao.checkpoint import BoundedMemorySaver, SQLiteCheckpointSaver
+
+
+class _Thread:
+    """Writes successive checkpoints of one thread the way a graph run does."""
+
+    def __init__(self, saver, thread_id="c1"):
+        self.saver, self.thread_id, self.step, self.parent = saver, thread_id, 0, None
+
+    def put(self, **values):
+        self.step += 1
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = values
+        checkpoint["channel_versions"] = {channel: self.step for channel in values}
+        config = {"configurable": {"thread_id": self.thread_id, "checkpoint_ns": "", "checkpoint_id": self.parent}}
+        saved = self.saver.put(config, checkpoint, {"step": self.step}, dict(checkpoint["channel_versions"]))
+        self.parent = saved["configurable"]["checkpoint_id"]
+        return self.parent
+
+    def latest(self, saver=None):
+        return (saver or self.saver).get_tuple({"configurable": {"thread_id": self.thread_id}}).checkpoint["channel_values"]
+
+
+def _kinds(saver, thread_id="c1"):
+    if isinstance(saver, SQLiteCheckpointSaver):
+        return [kind for (kind,) in saver._conn.execute("SELECT kind FROM checkpoint_blobs WHERE thread_id = ?", (thread_id,))]
+    return [blob.kind for blob in saver._threads[thread_id].blobs.values()]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def saver(request, tmp_path):
+    if request.param == "memory":
+        yield BoundedMemorySaver(max_delta_chain=3, keep_checkpoints=2)
+    else:
+        saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"), max_delta_chain=3, keep_checkpoints=2)
+        yield saver
+        saver.close()
+
+
+def test_round_trip_across_snapshot_boundaries(saver):
+    thread, messages, files = _Thread(saver), [], {}
+    for turn in range(10):
+        messages = messages + [HumanMessage(f"turn {turn}", id=f"h{turn}"), AIMessage(f"reply {turn}", id=f"a{turn}")]
+        files = {**files, f"/notes/{turn}.md": {"content": [str(turn)]}}
+        thread.put(messages=messages, files=files)
+        assert thread.latest() == {"messages": messages, "files": files}
+    kinds = _kinds(saver)
+    assert "full" in kinds and ("delta" in kinds or "dict_delta" in kinds)
+
+
+def test_in_place_mutation_after_a_put_is_not_lost(saver):
+    thread = _Thread(saver)
+    messages = [HumanMessage("hi", id="h0")]
+    files = {"/a.md": {"content": ["a"]}, "/b.md": {"content": ["b"]}, "/c.md": {"content": ["c"]}}
+    thread.put(messages=messages, files=files)
+
+    # The graph edits the objects it was handed, then writes new containers built on them
+    messages[0] = HumanMessage("edited", id="h0")
+    messages.append(AIMessage("reply", id="a0"))
+    files["/a.md"] = {"content": ["rewritten"]}
+    thread.put(messages=messages + [HumanMessage("more", id="h1")], files=dict(files))
+
+    assert thread.latest() == {"messages": messages + [HumanMessage("more", id="h1")], "files": files}
+
+
+def test_equal_values_that_are_not_the_same_objects_still_delta(saver):
+    thread = _Thread(saver)
+    thread.put(messages=[HumanMessage("hi", id="h0")])
+    copied = [HumanMessage("hi", id="h0"), AIMessage("hello", id="a0")]
+    thread.put(messages=copied)
+    assert thread.latest()["messages"] == copied
+    assert "delta" in _kinds(saver)
+
+
+def test_pruning_keeps_the_latest_checkpoints_readable(saver):
+    thread, messages, ids = _Thread(saver), [], []
+    for turn in range(8):
+        messages = messages + [HumanMessage(f"turn {turn}", id=f"h{turn}")]
+        ids.append(thread.put(messages=messages))
+
+    assert [t.checkpoint["id"] for t in saver.list({"configurable": {"thread_id": "c1"}})] == ids[:-3:-1]
+    assert saver.get_tuple({"configurable": {"thread_id": "c1", "checkpoint_id": ids[0]}}) is None
+    previous = saver.get_tuple({"configurable": {"thread_id": "c1", "checkpoint_id": ids[-2]}})
+    assert previous.checkpoint["channel_values"]["messages"] == messages[:-1]
+    assert thread.latest()["messages"] == messages
+
+
+def test_sqlite_reload_continues_the_delta_chain(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    first = SQLiteCheckpointSaver(path, max_delta_chain=3)
+    thread, messages = _Thread(first), []
+    for turn in range(4):
+        messages = messages + [HumanMessage(f"turn {turn}", id=f"h{turn}")]
+        thread.put(messages=messages, files={"/plan.md": {"content": [str(turn)]}})
+    first.close()
+
+    reloaded = SQLiteCheckpointSaver(path, max_delta_chain=3)
+    thread.saver = reloaded
+    resumed = thread.latest()
+    assert resumed["messages"] == messages
+
+    # The graph resumes from a decoded (not identical) copy of the state
+    messages = list(resumed["messages"]) + [AIMessage("after restart", id="a9")]
+    thread.put(messages=messages, files=resumed["files"])
+    reloaded.close()
+
+    again = SQLiteCheckpointSaver(path)
+    assert thread.latest(again) == {"messages": messages, "files": {"/plan.md": {"content": ["3"]}}}
+    again.close()
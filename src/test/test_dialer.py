@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ava.bench.agora_stub import create_stub_app
+from ava.runtime import dialer as dialer_module
+from ava.runtime.dialer import AgoraDialer, CircuitBreaker, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _stub(**options):
+    return create_stub_app(latency_s=0.0, jitter_s=0.0, **options)
+
+
+def _dialer(app, breaker=None, **kwargs) -> AgoraDialer:
+    return AgoraDialer(
+        "http://agora.test/calls", rate=1000, burst=1000, backoff_base=0.0,
+        breaker=breaker or CircuitBreaker(failure_threshold=100), transport=httpx.ASGITransport(app=app), **kwargs
+    )
+
+
+async def _dial(dialer, *call_ids):
+    async with dialer:
+        return await asyncio.gather(*(dialer.dial(call_id, {"schedule_id": call_id}) for call_id in call_ids))
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retryable_status_is_retried_until_attempts_run_out(status):
+    app = _stub(failure_rate=1.0, failure_status=status)
+
+    [result] = asyncio.run(_dial(_dialer(app, max_retries=2), "c1"))
+
+    assert (result.ok, result.status, result.attempts) == (False, status, 3)
+    assert app.state.calls == 3
+
+
+def test_other_client_errors_are_not_retried():
+    app = _stub(failure_rate=1.0, failure_status=400)
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    [result] = asyncio.run(_dial(_dialer(app, breaker, max_retries=2), "c1"))
+
+    assert (result.ok, result.status, result.attempts, result.error) == (False, 400, 1, "HTTP 400")
+    assert app.state.calls == 1
+    # A rejected request says nothing about the provider's health
+    assert breaker.state == "closed"
+
+
+def test_successful_call_is_not_retried():
+    app = _stub()
+
+    [result] = asyncio.run(_dial(_dialer(app), "c1"))
+
+    assert (result.ok, result.status, result.attempts) == (True, 202, 1)
+    assert app.state.calls == 1
+
+
+def test_open_breaker_fails_fast_and_lets_a_single_probe_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=clock)
+    down = _stub(failure_rate=1.0, failure_status=503)
+
+    # Two failures open the circuit; the remaining retry is refused without a request
+    [first] = asyncio.run(_dial(_dialer(down, breaker, max_retries=3), "c1"))
+    assert (first.ok, first.attempts, first.error) == (False, 2, "provider circuit is open")
+    assert breaker.state == "open" and down.state.calls == 2
+
+    [refused] = asyncio.run(_dial(_dialer(down, breaker), "c2"))
+    assert (refused.ok, refused.attempts) == (False, 0)
+    assert down.state.calls == 2
+
+    # Half-open: of two concurrent calls only one probes; its failure reopens the circuit
+    clock.now += 30.0
+    probe, other = asyncio.run(_dial(_dialer(down, breaker, max_retries=0), "c3", "c4"))
+    assert (probe.attempts, other.attempts) == (1, 0)
+    assert down.state.calls == 3
+    assert breaker.state == "open"
+
+    # A successful probe closes it again
+    clock.now += 30.0
+    up = _stub()
+    [recovered] = asyncio.run(_dial(_dialer(up, breaker), "c5"))
+    assert (recovered.ok, recovered.attempts) == (True, 1)
+    assert breaker.state == "closed"
+
+
+def test_token_bucket_paces_calls_after_the_burst(monkeypatch):
+    clock, slept = FakeClock(), []
+
+    async def sleep(delay):
+        slept.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr(dialer_module.asyncio, "sleep", sleep)
+    bucket = TokenBucket(rate=10.0, burst=2, clock=clock)
+
+    async def acquire(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(acquire(4))
+    assert slept == pytest.approx([0.1, 0.1])
+
+    # Idle time refills the bucket, but never beyond the burst
+    clock.now += 10.0
+    slept.clear()
+    asyncio.run(acquire(3))
+    assert slept == pytest.approx([0.1])
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from queue import Full
+
+import pytest
+
+from ava.runtime.consumer import OrchestratorConsumer
+from ava.runtime.event_queue import PriorityEventQueue
+
+
+def test_critical_events_are_taken_before_routine_ones():
+    queue = PriorityEventQueue()
+    queue.put({"id": 1})
+    queue.put({"id": 2, "priority": "critical"})
+    queue.put({"id": 3})
+
+    assert [event["id"] for event in queue.get_batch(3)] == [2, 1, 3]
+
+
+def test_overflow_policies():
+    rejecting = PriorityEventQueue(maxsize=1, overflow="reject")
+    rejecting.put({"id": 1})
+    with pytest.raises(Full):
+        rejecting.put({"id": 2, "priority": "critical"})
+
+    dropping = PriorityEventQueue(maxsize=2, overflow="drop_oldest")
+    dropping.put({"id": 1})
+    dropping.put({"id": 2, "priority": "critical"})
+    dropping.put({"id": 3})
+    assert [event["id"] for event in dropping.get_batch(5)] == [2, 3]
+
+    # A routine arrival never displaces a critical event; a critical one displaces the oldest
+    critical = PriorityEventQueue(maxsize=2, overflow="drop_oldest")
+    critical.put({"id": 1, "priority": "critical"})
+    critical.put({"id": 2, "priority": "critical"})
+    critical.put({"id": 3})
+    assert critical.qsize() == 2
+    critical.put({"id": 4, "priority": "critical"})
+    assert [event["id"] for event in critical.get_batch(5)] == [2, 4]
+    critical.task_done(2)
+    assert critical.join(timeout=0.01)
+
+
+def test_join_waits_for_task_done():
+    queue = PriorityEventQueue()
+    queue.put({"id": 1})
+    batch = queue.get_batch(1)
+    assert not queue.join(timeout=0.01)
+    queue.task_done(len(batch))
+    assert queue.join(timeout=0.01)
+
+
+def test_aget_batch_wakes_on_put_from_another_thread():
+    queue = PriorityEventQueue()
+
+    async def consume():
+        threading.Timer(0.05, queue.put, args=({"id": 1},)).start()
+        return await queue.aget_batch(4, timeout=2)
+
+    started = time.monotonic()
+    assert asyncio.run(consume()) == [{"id": 1}]
+    assert time.monotonic() - started < 1
+
+
+def test_aget_batch_times_out_and_returns_on_close():
+    queue = PriorityEventQueue()
+
+    async def consume():
+        assert await queue.aget_batch(1, timeout=0.05) == []
+        asyncio.get_running_loop().call_later(0.05, queue.close)
+        return await queue.aget_batch(1, timeout=5)
+
+    assert asyncio.run(consume()) == []
+    assert not queue._async_waiters
+
+
+def test_async_consumer_runs_sync_handlers_off_the_event_loop():
+    queue = PriorityEventQueue()
+    handled, handler_threads = [], set()
+
+    def handler(batch):
+        handler_threads.add(threading.get_ident())
+        time.sleep(0.05)
+        handled.extend(batch)
+
+    async def run():
+        consumer = OrchestratorConsumer(queue, handler, workers=1, mode="async", poll_interval=0.05)
+        consumer.start()
+        for i in range(3):
+            queue.put({"id": i})
+        ticks = 0
+        while len(handled) < 3:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert await consumer.astop()
+        return ticks
+
+    loop_thread = threading.get_ident()
+    assert asyncio.run(run()) > 3  # the loop kept ticking while the handler slept
+    assert [event["id"] for event in handled] == [0, 1, 2]
+    assert loop_thread not in handler_threads
+
+
+def test_async_consumer_awaits_coroutine_handlers():
+    queue = PriorityEventQueue()
+    handled = []
+
+    async def handler(batch):
+        await asyncio.sleep(0)
+        handled.extend(batch)
+
+    async def run():
+        consumer = OrchestratorConsumer(queue, handler, workers=2, batch_size=2, mode="async", poll_interval=0.05)
+        consumer.start()
+        for i in range(5):
+            queue.put({"id": i})
+        assert await consumer.astop(timeout=2)
+
+    asyncio.run(run())
+    assert sorted(event["id"] for event in handled) == [0, 1, 2, 3, 4]
@@ -0,0 +1,68 @@
+import asyncio
+
+from ava.runtime.idempotency import IdempotentTurns, delivery_key
+
+
+def _counting_turn(calls, reply="ok", cacheable=True, delay=0.0):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return reply, cacheable
+    return compute
+
+
+def test_delivery_key_prefers_the_delivery_id_and_normalizes_text():
+    assert delivery_key("c1", "Yes", "abc") == "id:abc"
+    assert delivery_key("c1", "  Yes please ") == delivery_key("c1", "yes   PLEASE")
+    assert delivery_key("c1", "yes") != delivery_key("c2", "yes")
+
+
+def test_concurrent_retries_join_the_run_in_flight():
+    turns, calls = IdempotentTurns(ttl_seconds=30), []
+    key = delivery_key("c1", "take my pills")
+
+    async def run():
+        return await asyncio.gather(*(turns.run("c1", key, _counting_turn(calls, delay=0.05)) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["ok", "ok", "ok"]
+    assert len(calls) == 1
+    assert turns.inflight == 0
+
+
+def test_repeated_utterance_after_the_run_is_a_new_turn():
+    turns, calls = IdempotentTurns(ttl_seconds=30), []
+    key = delivery_key("c1", "yes")
+
+    async def run():
+        await turns.run("c1", key, _counting_turn(calls))
+        await turns.run("c1", key, _counting_turn(calls))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_explicit_delivery_id_is_replayed_until_the_channel_moves_on():
+    turns, calls = IdempotentTurns(ttl_seconds=30), []
+    first, second = delivery_key("c1", "yes", "d-1"), delivery_key("c1", "no", "d-2")
+
+    async def run():
+        replies = [await turns.run("c1", first, _counting_turn(calls, reply="one")),
+                   await turns.run("c1", first, _counting_turn(calls, reply="again"))]
+        await turns.run("c1", second, _counting_turn(calls, reply="two"))
+        replies.append(await turns.run("c1", first, _counting_turn(calls, reply="three")))
+        return replies
+
+    assert asyncio.run(run()) == ["one", "one", "three"]
+    assert len(calls) == 3
+
+
+def test_uncacheable_replies_are_not_replayed():
+    turns, calls = IdempotentTurns(ttl_seconds=30), []
+    key = delivery_key("c1", "yes", "d-1")
+
+    async def run():
+        await turns.run("c1", key, _counting_turn(calls, reply="hold", cacheable=False))
+        return await turns.run("c1", key, _counting_turn(calls, reply="done"))
+
+    assert asyncio.run(run()) == "done"
+    assert len(calls) == 2
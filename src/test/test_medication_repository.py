@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from ava.dao import db
+from ava.dao.db import SEED_SCHEDULES, SQLiteConnectionPool, SQLiteMedicationRepository
+from ava.tools.user_query_parsing_tools import _to_schedule_record
+
+
+@pytest.fixture
+def repository(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "medications.sqlite3"), size=2)
+    repository = SQLiteMedicationRepository(pool)
+    repository.seed(SEED_SCHEDULES)
+    yield repository
+    pool.close()
+
+
+def test_seed_keeps_fixed_ids(repository):
+    assert repository.get("SCH-001")["patient_id"] == "USER-456"
+
+
+def test_add_ignores_caller_schedule_id(repository):
+    schedule_id = repository.add({"schedule_id": "SCH-001", "patient_id": "USER-999", "medication": "Metformin 500mg"})
+
+    assert schedule_id != "SCH-001"
+    assert repository.get("SCH-001")["patient_id"] == "USER-456"
+    assert repository.get(schedule_id)["patient_id"] == "USER-999"
+
+
+def test_add_collision_raises_instead_of_replacing(repository, monkeypatch):
+    monkeypatch.setattr(db, "generate_schedule_id", lambda: "SCH-001")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        repository.add({"patient_id": "USER-999", "medication": "Metformin 500mg"})
+    assert repository.get("SCH-001")["medication"] == "Amlodipine 10mg"
+
+
+def test_schedule_record_coerces_null_patient_id():
+    record = _to_schedule_record({"medication_name": "Metformin", "dosage_mg": 500, "patient_id": None})
+
+    assert record["patient_id"] == "UNKNOWN"
+    assert record["medication"] == "Metformin 500mg"
+
+
+def test_schedule_record_takes_caller_identity_over_model_data():
+    record = _to_schedule_record(
+        {"medication": "Metformin 500mg", "patient_id": "USER-456", "schedule_id": "SCH-001"},
+        {"patient_id": "USER-123", "phone_number": "+1-555-000-1111"},
+    )
+
+    assert record["patient_id"] == "USER-123"
+    assert record["phone_number"] == "+1-555-000-1111"
+    assert "schedule_id" not in record
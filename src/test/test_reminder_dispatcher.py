@@ -0,0 +1,118 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from ava.dao.db import SQLiteConnectionPool
+from ava.dao.reminder_jobs import ReminderJob, SQLiteReminderJobStore
+from ava.runtime.dispatcher import ReminderDispatcher
+
+
+class FakeClock:
+    def __init__(self, start: datetime):
+        self.now = start.timestamp()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fire_until(dispatcher: ReminderDispatcher, clock: FakeClock, until: datetime, fired: list) -> None:
+    """Step the clock from firing to firing, as the dispatcher thread would."""
+    while dispatcher._heap and dispatcher._heap[0][0] <= until.timestamp():
+        clock.now = dispatcher._heap[0][0]
+        batch = dispatcher._pop_due(clock.now)
+        fired.extend((job.schedule_id, datetime.fromtimestamp(clock.now)) for job in batch)
+        dispatcher._rearm(batch, clock.now)
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _job(schedule_id, time_of_day, first: datetime, **kwargs) -> ReminderJob:
+    return ReminderJob(schedule_id, "USER-1", time_of_day, first.timestamp(), **kwargs)
+
+
+def test_multi_time_schedule_fires_at_every_time_of_day():
+    start = datetime(2026, 5, 4, 7, 0)
+    clock = FakeClock(start)
+    dispatcher = ReminderDispatcher(None, lambda batch: None, clock=clock)
+    dispatcher.add(_job("SCH-1", "08:00,14:00,20:00", start.replace(hour=8)))
+
+    fired = []
+    _fire_until(dispatcher, clock, start + timedelta(hours=48), fired)
+
+    assert [(when.day, when.hour) for _, when in fired] == [
+        (4, 8), (4, 14), (4, 20), (5, 8), (5, 14), (5, 20),
+    ]
+
+
+def test_recurrence_keeps_local_time_across_dst(local_tz):
+    # US daylight saving time starts on 2026-03-08
+    start = datetime(2026, 3, 6, 7, 0)
+    clock = FakeClock(start)
+    dispatcher = ReminderDispatcher(None, lambda batch: None, clock=clock)
+    dispatcher.add(_job("SCH-1", "08:00", start.replace(hour=8)))
+
+    fired = []
+    _fire_until(dispatcher, clock, datetime(2026, 3, 10, 12, 0), fired)
+
+    assert [(when.day, when.hour, when.minute) for _, when in fired] == [
+        (6, 8, 0), (7, 8, 0), (8, 8, 0), (9, 8, 0), (10, 8, 0),
+    ]
+
+
+def test_reminder_ends_after_end_at_and_one_off_fires_once():
+    start = datetime(2026, 5, 4, 7, 0)
+    clock = FakeClock(start)
+    dispatcher = ReminderDispatcher(None, lambda batch: None, clock=clock)
+    dispatcher.add(_job("SCH-1", "08:00,20:00", start.replace(hour=8),
+                        end_at=datetime(2026, 5, 5, 23, 59, 59).timestamp()))
+    dispatcher.add(_job("SCH-2", "09:00", start.replace(hour=9), interval_s=0))
+
+    fired = []
+    _fire_until(dispatcher, clock, start + timedelta(days=4), fired)
+
+    assert [schedule_id for schedule_id, _ in fired].count("SCH-1") == 4
+    assert [schedule_id for schedule_id, _ in fired].count("SCH-2") == 1
+    assert len(dispatcher) == 0
+
+
+def test_cancelled_job_does_not_fire():
+    start = datetime(2026, 5, 4, 7, 0)
+    clock = FakeClock(start)
+    dispatcher = ReminderDispatcher(None, lambda batch: None, clock=clock)
+    dispatcher.add(_job("SCH-1", "08:00", start.replace(hour=8)))
+    dispatcher.add(_job("SCH-2", "08:00", start.replace(hour=8)))
+
+    assert dispatcher.cancel("SCH-1")
+    fired = []
+    _fire_until(dispatcher, clock, start + timedelta(hours=2), fired)
+
+    assert [schedule_id for schedule_id, _ in fired] == ["SCH-2"]
+
+
+def test_restart_rolls_missed_reminders_to_next_time_of_day(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "jobs.sqlite3"), size=2)
+    store = SQLiteReminderJobStore(pool)
+    store.upsert_many([
+        _job("SCH-1", "08:00,20:00", datetime(2026, 5, 1, 8, 0)),
+        _job("SCH-2", "09:00", datetime(2026, 5, 2, 9, 0), interval_s=0),
+    ])
+    clock = FakeClock(datetime(2026, 5, 4, 12, 0))
+
+    dispatcher = ReminderDispatcher(store, lambda batch: None, misfire_grace_s=3600, clock=clock)
+    dispatcher._load()
+
+    assert datetime.fromtimestamp(dispatcher.get("SCH-1").next_fire_at) == datetime(2026, 5, 4, 20, 0)
+    # The missed one-off is dropped from the store, not just skipped
+    assert dispatcher.get("SCH-2") is None
+    assert [(job.schedule_id, datetime.fromtimestamp(job.next_fire_at)) for job in store.iter_all()] == [
+        ("SCH-1", datetime(2026, 5, 4, 20, 0))
+    ]
+    pool.close()
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+
+from ava.tools import reminder_tools
+from ava.tools.reminder_tools import adispatch_reminder_events, process_reminder_call, reminder_data_problem
+
+COMPLETE = {"schedule_id": "SCH-1", "patient_id": "USER-1", "medication": "Metformin 500mg", "phone_number": "+1-555"}
+
+
+def test_reminder_data_problem():
+    assert reminder_data_problem(COMPLETE, "USER-1") is None
+    assert reminder_data_problem(None, "USER-1") == "schedule not found"
+    assert reminder_data_problem({**COMPLETE, "phone_number": None}, None) == "missing phone_number"
+    assert reminder_data_problem(COMPLETE, "USER-2").startswith("patient mismatch")
+
+
+@pytest.mark.parametrize("data, problem", [
+    (None, "schedule not found"),
+    ({key: value for key, value in COMPLETE.items() if key != "phone_number"}, "missing phone_number"),
+])
+def test_process_reminder_call_reports_incomplete_schedules(monkeypatch, data, problem):
+    monkeypatch.setattr(reminder_tools, "fetch_medication_data", lambda schedule_id: data)
+
+    result = process_reminder_call.invoke({"schedule_id": "SCH-1", "patient_id": "USER-1"})
+
+    assert result == f"DELEGATION_FAILURE: Could not process SCH-1: {problem}."
+
+
+def test_process_reminder_call_dials_complete_schedules(monkeypatch):
+    monkeypatch.setattr(reminder_tools, "fetch_medication_data", lambda schedule_id: COMPLETE)
+    monkeypatch.delenv("AGORA_CALL_URL", raising=False)
+
+    result = process_reminder_call.invoke({"schedule_id": "SCH-1", "patient_id": "USER-1"})
+
+    assert result.startswith("DELEGATION_COMPLETE: AGORA_SUCCESS")
+
+
+def test_async_dispatch_looks_up_and_dials_off_the_event_loop(monkeypatch):
+    lookup_threads = []
+
+    def fetch_many(schedule_ids):
+        lookup_threads.append(threading.get_ident())
+        return {schedule_id: {**COMPLETE, "schedule_id": schedule_id} for schedule_id in schedule_ids if schedule_id != "SCH-9"}
+
+    monkeypatch.setattr(reminder_tools, "fetch_medication_data_many", fetch_many)
+    monkeypatch.setattr(reminder_tools, "publish_reminders_via_agora", lambda records: ["AGORA_SUCCESS"] * len(records))
+    events = [{"schedule_id": "SCH-1", "patient_id": "USER-1"}, {"schedule_id": "SCH-9", "patient_id": "USER-1"}]
+
+    results, needs_llm = asyncio.run(adispatch_reminder_events(events))
+
+    assert results == {"SCH-1": "DELEGATION_COMPLETE: AGORA_SUCCESS"}
+    assert needs_llm == [(events[1], "schedule not found")]
+    assert lookup_threads and threading.get_ident() not in lookup_threads
@@ -0,0 +1,43 @@
+import pytest
+
+from ava.tools.schedule_rules import parse_schedule_rules
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("500 mg metformin twice a day at 8am and 8pm for 10 days",
+     ("Metformin", 500, 2, "day", "08:00,20:00", 10)),
+    ("Remind me to take lisinopril 10mg once daily at 9 AM",
+     ("Lisinopril", 10, 1, "day", "09:00", None)),
+    ("take 1 g amoxicillin three times a day at 7am, 3pm and 11pm for the next 7 days",
+     ("Amoxicillin", 1000, 3, "day", "07:00,15:00,23:00", 7)),
+    ("atorvastatin 20 mg every night for 2 weeks",
+     ("Atorvastatin", 20, 1, "day", "21:00", 14)),
+])
+def test_formulaic_instructions_parse_without_a_model(text, expected):
+    schedule = parse_schedule_rules(text)
+    assert schedule is not None
+    assert (schedule.medication_name, schedule.dosage_mg, schedule.frequency_count, schedule.frequency_unit,
+            schedule.time_of_day, schedule.duration_days) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "500 mg metformin only for tomorrow morning 8 AM",
+    "500 mg metformin tomorrow at 8am",
+    "500 mg metformin at 6pm on Mondays",
+    "500 mg metformin daily at 8am starting next week",
+    "500 mg metformin daily at 8am from the 3rd until the 10th",
+    "500 mg metformin every other day at 8am",
+    "500 mg metformin at 8am today",
+    "500 mg metformin at 8am with breakfast",
+    "500 mg metformin at 8am if my sugar is high",
+    "metformin 500 mg or 850 mg at 8am",
+    # Counts the rules do not read would silently change the dose or frequency
+    "take 2 tablets of metformin 500mg at 8am",
+    "take two tablets of metformin 500mg at 8am",
+    "500mg metformin 2 times at 8am",
+    "500mg metformin at 8am 30",
+    # Two doses but only one time of day: the second time would be a guess
+    "500 mg metformin twice a day at 8am for 10 days",
+])
+def test_instructions_outside_the_grammar_fall_back(text):
+    assert parse_schedule_rules(text) is None
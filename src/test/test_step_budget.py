@@ -0,0 +1,52 @@
+from langchain.agents.middleware.types import ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from ava.agents.step_budget import (
+    BUDGET_EXHAUSTED_TEXT, FINAL_STEP_NOTE, StepBudgetMiddleware, model_calls_this_run,
+)
+from ava.bench.fake_model import ScriptedChatModel
+
+
+def _run(calls):
+    messages = [HumanMessage("earlier"), AIMessage("old reply"), HumanMessage("remind me")]
+    for i in range(calls):
+        messages += [AIMessage("", tool_calls=[{"name": "think_tool", "args": {}, "id": f"t{i}"}]),
+                     ToolMessage("ok", tool_call_id=f"t{i}")]
+    return messages
+
+
+def _request(messages):
+    return ModelRequest(model=ScriptedChatModel(model="test"), messages=messages, tools=[{"name": "think_tool"}],
+                        system_message=SystemMessage("You are Ava."), state={"messages": messages})
+
+
+def _sent(middleware, messages):
+    sent = []
+    response = middleware.wrap_model_call(
+        _request(messages), lambda request: sent.append(request) or ModelResponse(result=[AIMessage("model")])
+    )
+    return sent[0] if sent else None, response
+
+
+def test_model_calls_are_counted_since_the_latest_user_message():
+    assert model_calls_this_run(_run(0)) == 0
+    assert model_calls_this_run(_run(3)) == 3
+
+
+def test_calls_within_budget_pass_through_unchanged():
+    request, response = _sent(StepBudgetMiddleware("test", max_model_calls=3), _run(1))
+    assert request.tool_choice is None
+    assert response.result[0].content == "model"
+
+
+def test_last_budgeted_call_is_made_without_tools():
+    request, _ = _sent(StepBudgetMiddleware("test", max_model_calls=3), _run(2))
+    assert request.tool_choice == "none"
+    assert request.system_message.content.startswith("You are Ava.")
+    assert request.system_message.content.endswith(FINAL_STEP_NOTE)
+
+
+def test_calls_past_the_budget_end_the_run_without_a_model_call():
+    request, response = _sent(StepBudgetMiddleware("test", max_model_calls=3), _run(3))
+    assert request is None
+    assert response.result[0].content == BUDGET_EXHAUSTED_TEXT
@@ -0,0 +1,103 @@
+import asyncio
+
+from ava.runtime.deadline import TurnDeadline
+
+
+def _turn(reply, delay=0.0, started=None):
+    async def turn():
+        if started is not None:
+            started.append(reply)
+        await asyncio.sleep(delay)
+        return reply
+    return turn
+
+
+def test_turn_within_the_deadline_is_answered():
+    outcome = asyncio.run(TurnDeadline(deadline_s=1).run("c1", _turn("hi")))
+    assert (outcome.status, outcome.reply, outcome.carried) == ("done", "hi", None)
+
+
+def test_slow_turn_is_deferred_and_carried_into_the_next_turn():
+    deadline = TurnDeadline(deadline_s=0.05)
+
+    async def run():
+        first = await deadline.run("c1", _turn("schedule saved", delay=0.1))
+        await asyncio.sleep(0.1)
+        second = await deadline.run("c1", _turn("you're welcome"))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status == "deferred"
+    assert (second.status, second.reply, second.carried) == ("done", "you're welcome", "schedule saved")
+    assert deadline.background == 0
+
+
+def test_channel_stays_busy_while_its_background_turn_runs():
+    deadline, started = TurnDeadline(deadline_s=0.05), []
+
+    async def run():
+        await deadline.run("c1", _turn("slow", delay=0.5, started=started))
+        busy = await deadline.run("c1", _turn("second", started=started))
+        other = await deadline.run("c2", _turn("other channel", started=started))
+        await deadline.drain()
+        return busy, other
+
+    busy, other = asyncio.run(run())
+    assert busy.status == "busy"
+    assert other.reply == "other channel"
+    assert started == ["slow", "other channel"]
+
+
+def test_foreground_turns_wait_for_the_channel_and_receive_the_carried_reply():
+    deadline, order = TurnDeadline(deadline_s=0.2), []
+
+    async def streamed():
+        async with deadline.foreground("c1") as outcome:
+            order.append(("stream", outcome.status, outcome.carried))
+            await asyncio.sleep(0.05)
+            order.append(("stream", "end", None))
+
+    async def run():
+        await deadline.run("c1", _turn("from the background", delay=0.25))
+        await asyncio.sleep(0.1)
+        stream = asyncio.create_task(streamed())
+        await asyncio.sleep(0.2)
+        blocking = asyncio.create_task(deadline.run("c1", _turn("after the stream")))
+        await stream
+        return await blocking
+
+    blocking = asyncio.run(run())
+    assert order == [("stream", "done", "from the background"), ("stream", "end", None)]
+    assert (blocking.status, blocking.reply, blocking.carried) == ("done", "after the stream", None)
+
+
+def test_foreground_turn_is_busy_while_a_background_turn_runs():
+    deadline = TurnDeadline(deadline_s=0.05)
+
+    async def run():
+        await deadline.run("c1", _turn("slow", delay=0.5))
+        async with deadline.foreground("c1") as outcome:
+            status = outcome.status
+        await deadline.drain()
+        return status
+
+    assert asyncio.run(run()) == "busy"
+
+
+def test_concurrent_turns_on_one_channel_run_one_at_a_time():
+    deadline, running, overlaps = TurnDeadline(deadline_s=1), [], []
+
+    def turn(name):
+        async def run():
+            overlaps.append(len(running))
+            running.append(name)
+            await asyncio.sleep(0.05)
+            running.remove(name)
+            return name
+        return run
+
+    async def run():
+        return await asyncio.gather(deadline.run("c1", turn("a")), deadline.run("c1", turn("b")))
+
+    assert [outcome.reply for outcome in asyncio.run(run())] == ["a", "b"]
+    assert overlaps == [0, 0]
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from ava.runtime.concurrency import TurnLimiter, TurnRejected
+
+
+async def _hold(limiter, release, results, name):
+    try:
+        async with limiter.slot():
+            results.append(f"{name}:in")
+            await release.wait()
+    except TurnRejected:
+        results.append(f"{name}:rejected")
+
+
+def test_turns_beyond_slots_and_queue_are_rejected_at_once():
+    limiter, results = TurnLimiter(max_inflight=1, max_waiting=1, wait_timeout=5), []
+
+    async def run():
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(limiter, release, results, name)) for name in "abc"]
+        await asyncio.sleep(0.01)
+        counts = (limiter.inflight, limiter.waiting)
+        release.set()
+        await asyncio.gather(*tasks)
+        return counts
+
+    assert asyncio.run(run()) == (1, 1)
+    assert results == ["a:in", "c:rejected", "b:in"]
+    assert (limiter.inflight, limiter.waiting) == (0, 0)
+
+
+def test_waiting_turn_is_rejected_after_the_timeout():
+    limiter, results = TurnLimiter(max_inflight=1, max_waiting=4, wait_timeout=0.05), []
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release, results, "a"))
+        await asyncio.sleep(0)
+        await _hold(limiter, release, results, "b")
+        release.set()
+        await holder
+        # The slot is free again afterwards
+        async with limiter.slot():
+            results.append("c:in")
+
+    asyncio.run(run())
+    assert results == ["a:in", "b:rejected", "c:in"]
+
+
+def test_slot_is_released_when_the_turn_fails():
+    limiter = TurnLimiter(max_inflight=1, max_waiting=0)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("model error")
+        async with limiter.slot():
+            return limiter.inflight
+
+    assert asyncio.run(run()) == 1
+    assert limiter.inflight == 0
+
+
+def test_at_least_one_slot_is_required():
+    with pytest.raises(ValueError):
+        TurnLimiter(max_inflight=0, max_waiting=1)
@@ -0,0 +1,103 @@
+from ava.states import vfs
+from ava.states.state import file_reducer
+from ava.tools.file_tools import write_file
+from ava.tools.task_tool import _changed_files
+
+
+def test_file_reducer_applies_a_delta_in_write_order_without_touching_its_inputs():
+    left = {"/a.md": "a", "/b.md": "b"}
+    right = {"/a.md": "a2", "/b.md": None, "/c.md": "c"}
+
+    merged = file_reducer(left, right)
+
+    assert list(merged.items()) == [("/a.md", "a2"), ("/c.md", "c")]
+    assert left == {"/a.md": "a", "/b.md": "b"}
+    assert file_reducer(left, None) is left
+
+
+def test_enforce_quota_evicts_only_the_oldest_scratch_files(monkeypatch):
+    monkeypatch.setattr(vfs, "VFS_QUOTA_BYTES", 10)
+    left = {"/tool_outputs/old.txt": "xxxx", "/notes.md": "nnnn", "/tool_outputs/new.txt": "yyyy"}
+
+    merged = file_reducer(left, {"/plan.md": "pp"})
+
+    assert list(merged) == ["/notes.md", "/tool_outputs/new.txt", "/plan.md"]
+
+
+def test_enforce_quota_never_drops_notes_or_the_current_write():
+    files = {"/notes.md": "n" * 8, "/tool_outputs/a.txt": "t" * 8}
+
+    kept = vfs.enforce_quota(dict(files), protected=["/tool_outputs/a.txt"], quota=10)
+
+    assert kept == files
+
+
+def test_file_reducer_keeps_running_sizes_in_utf8_bytes(monkeypatch):
+    monkeypatch.setattr(vfs, "VFS_QUOTA_BYTES", 20)
+    files = file_reducer({}, {"/notes.md": "héllo", "/tool_outputs/a.txt": "aaaa"})
+    files = file_reducer(files, {"/tool_outputs/b.txt": "b" * 8, "/notes.md": "hé"})
+    files = file_reducer(files, {"/tool_outputs/c.txt": "c" * 8})
+
+    # "é" is two bytes; the oldest scratch file was evicted to get back under 20
+    assert list(files) == ["/tool_outputs/b.txt", "/notes.md", "/tool_outputs/c.txt"]
+    assert (files.size, files.scratch_size) == (19, 16)
+    recount = vfs.as_filesystem(dict(files))
+    assert (recount.size, recount.scratch_size) == (files.size, files.scratch_size)
+
+
+def test_file_reducer_measures_a_reloaded_plain_dict_once():
+    reloaded = {"/notes.md": "nnn", "/tool_outputs/a.txt": "tt"}
+
+    merged = file_reducer(reloaded, {"/notes.md": None})
+
+    assert merged == {"/tool_outputs/a.txt": "tt"}
+    assert (merged.size, merged.scratch_size) == (2, 2)
+    assert type(reloaded) is dict
+
+
+def test_write_file_refuses_a_write_that_cannot_fit(monkeypatch):
+    monkeypatch.setattr(vfs, "VFS_QUOTA_BYTES", 10)
+    state = {"files": {"/notes.md": "n" * 6, "/tool_outputs/a.txt": "t" * 50}, "messages": []}
+
+    def write(content):
+        return write_file.func(file_path="/plan.md", content=content, state=state, tool_call_id="call-1")
+
+    refused = write("p" * 5)
+    assert "files" not in refused.update
+    assert refused.update["messages"][0].content.startswith("Error: File '/plan.md' was not written")
+
+    # Scratch files do not count against a write: they are evicted to make room
+    assert write("p" * 4).update["files"] == {"/plan.md": "pppp"}
+    # Overwriting a file replaces its size rather than adding to it
+    state["files"]["/plan.md"] = "p" * 4
+    assert "files" in write("q" * 4).update
+
+
+def test_changed_files_reports_writes_and_removals_only():
+    shared = "unchanged"
+    before = {"/keep.md": shared, "/edit.md": "v1", "/gone.md": "x"}
+    after = {"/keep.md": shared, "/edit.md": "v2", "/new.md": "n"}
+
+    assert _changed_files(before, after) == {"/edit.md": "v2", "/new.md": "n", "/gone.md": None}
+    assert _changed_files(None, None) == {}
+
+
+def test_task_batch_update_keeps_sub_agent_deletions_in_request_order():
+    from langchain_core.messages import AIMessage
+    from ava.tools.task_tool import _batch_update
+
+    parent = {"files": {"/tool_outputs/old.txt": "x", "/plan.md": "v1"}}
+    tasks = [{"subagent_type": "medication-agent", "description": "a"},
+             {"subagent_type": "reminder-agent", "description": "b"},
+             {"subagent_type": "reminder-agent", "description": "c"}]
+    outcomes = [
+        {"files": {"/plan.md": "v2"}, "messages": [AIMessage("done a")]},  # removed the scratch file
+        RuntimeError("model error"),
+        {"files": {**parent["files"], "/plan.md": "v3", "/notes.md": "n"}, "messages": [AIMessage("done c")]},
+    ]
+
+    update = _batch_update(parent, tasks, outcomes, "call-1").update
+
+    assert update["files"] == {"/tool_outputs/old.txt": None, "/plan.md": "v3", "/notes.md": "n"}
+    assert file_reducer(parent["files"], update["files"]) == {"/plan.md": "v3", "/notes.md": "n"}
+    assert "Error: model error" in update["messages"][0].content